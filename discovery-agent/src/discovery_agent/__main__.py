@@ -0,0 +1,5 @@
+import sys
+
+from discovery_agent.cli import main
+
+sys.exit(main())
@@ -0,0 +1,13 @@
+"""
+Micro-benchmarks for the discovery hot paths.
+
+Run from discovery-agent/src:
+
+    python -m discovery_agent.benchmarks                      # 1k/10k/100k synthetic items
+    python -m discovery_agent.benchmarks --save               # record benchmarks/baseline.json
+    python -m discovery_agent.benchmarks --compare            # flag slowdowns against the baseline
+
+All inputs are synthetic and generated from a fixed seed, so results are
+comparable between runs on the same machine. Nothing touches the network, the
+Django database or the real leads workbook.
+"""
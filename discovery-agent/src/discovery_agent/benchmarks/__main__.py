@@ -0,0 +1,63 @@
+import argparse
+import os
+import sys
+
+from discovery_agent.benchmarks.cases import get_cases
+from discovery_agent.benchmarks.runner import DEFAULT_SIZES, compare, load_baseline, run_suite, save_baseline
+from discovery_agent.utils.config import PROJECT_ROOT
+
+DEFAULT_BASELINE = os.path.join(PROJECT_ROOT, "benchmarks", "baseline.json")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for the discovery hot paths.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="Synthetic input sizes (default: 1000 10000 100000).")
+    parser.add_argument("--only", nargs="+", metavar="CASE", help="Run only these benchmarks.")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed passes per size below 100k (best is kept).")
+    parser.add_argument("--full", action="store_true", help="Also run sizes above a benchmark's default cap.")
+    parser.add_argument("--save", nargs="?", const=DEFAULT_BASELINE, metavar="PATH",
+                        help="Write the results as a JSON baseline (default: benchmarks/baseline.json).")
+    parser.add_argument("--compare", nargs="?", const=DEFAULT_BASELINE, metavar="PATH",
+                        help="Compare against a JSON baseline and exit non-zero on slowdowns.")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Allowed slowdown before a result is flagged (0.2 = 20%%).")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        cases = get_cases(args.only)
+    except ValueError as e:
+        print(e)
+        return 2
+
+    results = run_suite(cases, args.sizes, args.repeat, args.full)
+
+    if args.save:
+        save_baseline(args.save, results)
+        print(f"\nBaseline written to {args.save}")
+
+    if args.compare:
+        if not os.path.exists(args.compare):
+            print(f"\nNo baseline at {args.compare}. Run with --save first.")
+            return 2
+        rows = compare(results, load_baseline(args.compare), args.threshold)
+        print(f"\n--- Compared to {args.compare} (flagging > {args.threshold:.0%} slower) ---")
+        for row in rows:
+            if row["ratio"] is None:
+                status = "new"
+            else:
+                status = f"{row['ratio']:.2f}x" + ("  SLOWER" if row["regressed"] else "")
+            print(f"{row['case']:<22} {row['size']:>7}  {row['best_seconds']:>9.4f}s  {status}")
+        regressions = [row for row in rows if row["regressed"]]
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) slowed down beyond the threshold.")
+            return 1
+        print("\nNo slowdowns beyond the threshold.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,218 @@
+"""
+The benchmarked hot paths.
+
+Each case prepares its synthetic input once per size (untimed), optionally sets up
+per-repeat state such as a fresh workbook or database (untimed), and then times
+only the call under test.
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import subprocess
+import sys
+import time
+from types import SimpleNamespace
+
+from discovery_agent.benchmarks import synthetic
+from discovery_agent.utils.metros import DFW_METRO, Metro
+
+# leads_lead as created by the Django migrations (lead_miner_web/leads)
+LEADS_TABLE_SQL = '''
+    CREATE TABLE "leads_lead" (
+        "id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, "company_name" varchar(255) NOT NULL,
+        "domain" varchar(255) NOT NULL, "discovery_source" varchar(100) NOT NULL,
+        "signal_type" varchar(100) NOT NULL, "signal_strength" varchar(20) NOT NULL,
+        "discovery_date" date NOT NULL, "signal_date" varchar(100) NOT NULL, "details" text NOT NULL,
+        "location" varchar(255) NOT NULL, "timeline" varchar(100) NOT NULL,
+        "source_url" varchar(500) NOT NULL UNIQUE, "county" varchar(100) NOT NULL,
+        "all_signals" varchar(255) NOT NULL, "notes" text NOT NULL, "status" varchar(20) NOT NULL,
+        "created_at" datetime NOT NULL, "updated_at" datetime NOT NULL, "employee_count" integer NULL,
+        "industry" varchar(100) NOT NULL, "contact_name" varchar(255) NOT NULL,
+        "contact_email" varchar(254) NOT NULL, "contact_phone" varchar(50) NOT NULL
+    )
+'''
+
+
+class BenchmarkCase:
+    """
+    One benchmarked call. max_size caps the default sizes for paths that are too slow at 100k;
+    sizes pins cases whose cost doesn't depend on an input size (e.g. CLI startup).
+    """
+
+    def __init__(self, name, prepare, run, setup=None, max_size=None, sizes=None):
+        self.name = name
+        self.prepare = prepare
+        self.run = run
+        self.setup = setup or (lambda data, workdir: data)
+        self.max_size = max_size
+        self.sizes = sizes
+
+
+def _bare_scraper(class_path):
+    # Skip __init__ (config file, API clients): the benchmarked methods only need the metro
+    from discovery_agent.scrapers import load_scraper_class
+    cls = load_scraper_class(class_path)
+    scraper = cls.__new__(cls)
+    scraper.logger = logging.getLogger(cls.__module__)
+    scraper.metro = Metro(DFW_METRO)
+    scraper.target_locations = scraper.metro.target_locations
+    scraper.location_matcher = scraper.metro.location_matcher
+    scraper.location = scraper.metro.location
+    return scraper
+
+
+def _dedup(items):
+    from discovery_agent.utils.deduplication import Deduplication
+    return Deduplication().deduplicate_raw_items(items)
+
+
+def _dedup_pairwise(items):
+    # The previous all-pairs comparison, kept as the reference point
+    from discovery_agent.utils.deduplication import Deduplication
+    return Deduplication()._deduplicate_pairwise(items)
+
+
+def _resolve_companies(leads):
+    from discovery_agent.utils.entity_resolution import resolve_leads
+    return resolve_leads(leads)
+
+
+def _location_filter(texts):
+    scraper = _bare_scraper("realestate")
+    return [text for text in texts if scraper._is_location_relevant(text)]
+
+
+def _clean_summaries(summaries):
+    from discovery_agent.utils.html_text import clean_html_summary
+    return [clean_html_summary(summary) for summary in summaries]
+
+
+def _clean_summaries_bs4(summaries):
+    # The previous approach (a BeautifulSoup tree per entry), kept as the reference point
+    from discovery_agent.utils.html_text import _clean_with_soup
+    return [_clean_with_soup(summary) for summary in summaries]
+
+
+def _parse_jsearch(results):
+    scraper = _bare_scraper("jobs")
+    return [scraper._parse_jsearch_result(item) for item in results]
+
+
+def _remodel_permits(csv_text):
+    import csv
+    import io
+    from discovery_agent.scrapers import remodel_permits
+    scraper = remodel_permits.RemodelPermitScraper.__new__(remodel_permits.RemodelPermitScraper)
+    scraper.min_value = 100000
+    scraper._type_pattern = re.compile("|".join(map(re.escape, remodel_permits.DEFAULT_PERMIT_TYPES)), re.IGNORECASE)
+    scraper._excluded_pattern = re.compile("|".join(map(re.escape, remodel_permits.DEFAULT_EXCLUDED_USES)), re.IGNORECASE)
+    # Same decoding as OpenDataMirror.export_rows, then the scraper's row filter
+    rows = ({key: value for key, value in row.items() if value} for row in csv.DictReader(io.StringIO(csv_text)))
+    return [lead for lead in map(scraper.parse_row, rows) if lead]
+
+
+class _SlowChatClient:
+    """Chat client stand-in with a fixed network latency per completion and no leads."""
+
+    def __init__(self, latency=0.02):
+        self.latency = latency
+        self.chat = SimpleNamespace(completions=self)
+
+    def create(self, **kwargs):
+        time.sleep(self.latency)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content='{"leads": []}'))], usage=None)
+
+
+def _llm_batches(items, max_concurrency=4):
+    from discovery_agent.utils.llm_executor import LLMExecutor
+    from discovery_agent.utils.run_state import NullCheckpoint
+    scraper = _bare_scraper("realestate")
+    scraper.client, scraper.model_name = _SlowChatClient(), "benchmark"
+    scraper.llm = LLMExecutor(max_concurrency, requests_per_minute=None, tokens_per_minute=None)
+    scraper.verdicts = None
+    # Fixed batch_size, so every run sends the same batches
+    scraper.planner = None
+    scraper.checkpoint = NullCheckpoint()
+    scraper._failed_batches = 0
+    return list(scraper._process_batches(items))
+
+
+def _excel_setup(leads, workdir):
+    from discovery_agent.utils.excel_writer import ExcelWriter
+    return ExcelWriter(os.path.join(workdir, "leads.xlsx")), leads
+
+
+def _excel_save(args):
+    writer, leads = args
+    writer.save_leads(leads)
+
+
+def _db_setup(leads, workdir):
+    from discovery_agent.utils.db_writer import DatabaseWriter
+    db_path = os.path.join(workdir, "leads.sqlite3")
+    conn = sqlite3.connect(db_path)
+    conn.execute(LEADS_TABLE_SQL)
+    conn.commit()
+    conn.close()
+    return DatabaseWriter(db_path), leads
+
+
+def _db_setup_resolved(leads, workdir):
+    from discovery_agent.utils.entity_resolution import CompanyResolver, MergedSignalStore
+    writer, leads = _db_setup(leads, workdir)
+    writer.resolver = CompanyResolver(MergedSignalStore(os.path.join(workdir, "merged_signals.sqlite3")))
+    return writer, leads
+
+
+def _db_save(args):
+    writer, leads = args
+    return writer.save_leads(leads)
+
+
+def _startup(command, *sources):
+    # Fresh interpreter that imports what the CLI command needs, then exits
+    code = "import sys; from discovery_agent import cli; cli.load_command(sys.argv[1], sys.argv[2:])"
+    src_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    def run(_args):
+        subprocess.run([sys.executable, "-c", code, command] + list(sources), cwd=src_dir, check=True)
+    return BenchmarkCase("startup_" + "_".join((command,) + sources), lambda size: None, run, sizes=[1])
+
+
+CASES = [
+    # LSH candidates are cheap, but near-templated synthetic titles still verify a few each
+    BenchmarkCase("dedup_raw_items", synthetic.feed_items, _dedup, max_size=10000),
+    # Pairwise SequenceMatcher: quadratic, so only 1k by default (--full lifts the cap)
+    BenchmarkCase("dedup_raw_items_pairwise", synthetic.feed_items, _dedup_pairwise, max_size=1000),
+    BenchmarkCase("resolve_companies", synthetic.company_leads, _resolve_companies),
+    BenchmarkCase("location_relevance", synthetic.location_texts, _location_filter),
+    BenchmarkCase("summary_cleanup", synthetic.html_summaries, _clean_summaries),
+    BenchmarkCase("summary_cleanup_bs4", synthetic.html_summaries, _clean_summaries_bs4),
+    BenchmarkCase("parse_jsearch_result", synthetic.jsearch_results, _parse_jsearch),
+    BenchmarkCase("remodel_permit_rows", synthetic.permit_csv, _remodel_permits),
+    # Analysis batches against a 20 ms stand-in client: bound by latency, so one size is enough
+    BenchmarkCase("llm_batches", synthetic.feed_items, _llm_batches, sizes=[1000]),
+    # One batch at a time (max_concurrency 1), the previous behavior
+    BenchmarkCase("llm_batches_sequential", synthetic.feed_items, lambda items: _llm_batches(items, 1), sizes=[1000]),
+    BenchmarkCase("excel_save_leads", synthetic.leads, _excel_save, setup=_excel_setup, max_size=10000),
+    BenchmarkCase("db_save_leads", synthetic.leads, _db_save, setup=_db_setup),
+    # Same writer merging signals into company rows (about three signals per company)
+    BenchmarkCase("db_save_leads_resolved", synthetic.company_leads, _db_save, setup=_db_setup_resolved),
+    _startup("stats"),
+    _startup("run", "jobs"),
+    _startup("run", "realestate"),
+    _startup("run", "funding"),
+    _startup("run", "co"),
+    _startup("run", "remodel"),
+]
+
+
+def get_cases(names=None):
+    if not names:
+        return list(CASES)
+    unknown = set(names) - {case.name for case in CASES}
+    if unknown:
+        raise ValueError(f"Unknown benchmark(s): {', '.join(sorted(unknown))}")
+    return [case for case in CASES if case.name in names]
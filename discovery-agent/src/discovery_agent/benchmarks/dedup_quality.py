@@ -0,0 +1,63 @@
+"""
+Dedup quality check: the LSH dedup against the all-pairs reference.
+
+Runs both over the same synthetic feed items and reports how many items each
+keeps and where they disagree. Items only the LSH path keeps are duplicates it
+missed; items only the pairwise path keeps follow from such a miss (a different
+title got kept first).
+
+    python -m discovery_agent.benchmarks.dedup_quality --sizes 10000 20000
+"""
+
+import argparse
+import sys
+import time
+
+from discovery_agent.benchmarks import synthetic
+from discovery_agent.utils.deduplication import Deduplication
+
+
+def compare_dedup(items, similarity_threshold=0.85):
+    """Run both dedup paths over items and return a result row."""
+    dedup = Deduplication()
+
+    start = time.perf_counter()
+    lsh = dedup.deduplicate_raw_items(items, similarity_threshold)
+    lsh_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pairwise = dedup._deduplicate_pairwise(items, similarity_threshold)
+    pairwise_seconds = time.perf_counter() - start
+
+    lsh_links = {item["link"] for item in lsh}
+    pairwise_links = {item["link"] for item in pairwise}
+    return {
+        "size": len(items),
+        "kept_lsh": len(lsh),
+        "kept_pairwise": len(pairwise),
+        "only_lsh": len(lsh_links - pairwise_links),
+        "only_pairwise": len(pairwise_links - lsh_links),
+        "identical": [item["link"] for item in lsh] == [item["link"] for item in pairwise],
+        "lsh_seconds": round(lsh_seconds, 3),
+        "pairwise_seconds": round(pairwise_seconds, 3),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare LSH title dedup with the pairwise reference.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000],
+                        help="Synthetic feed sizes (default: 10000). The pairwise pass is quadratic.")
+    parser.add_argument("--threshold", type=float, default=0.85, help="similarity_threshold for both paths.")
+    args = parser.parse_args(argv)
+
+    for size in args.sizes:
+        row = compare_dedup(synthetic.feed_items(size), args.threshold)
+        print(f"{row['size']:>7} items  kept {row['kept_lsh']} (LSH) / {row['kept_pairwise']} (pairwise)  "
+              f"only LSH {row['only_lsh']}, only pairwise {row['only_pairwise']}  "
+              f"{'identical' if row['identical'] else 'DIFFERENT'}  "
+              f"{row['lsh_seconds']:.2f}s vs {row['pairwise_seconds']:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
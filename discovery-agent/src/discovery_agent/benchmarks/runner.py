@@ -0,0 +1,101 @@
+"""Timing, JSON baselines and baseline comparison for the benchmark suite."""
+
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+SLOW_PASS_SECONDS = 5.0
+
+
+def time_case(case, size, repeat=3):
+    """Run case at size `repeat` times and return a result row (best and median seconds)."""
+    data = case.prepare(size)
+    timings = []
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory(prefix="discovery-bench-") as workdir:
+            # Writers print/log progress; keep the benchmark output readable
+            with contextlib.redirect_stdout(io.StringIO()):
+                args = case.setup(data, workdir)
+                started = time.perf_counter()
+                case.run(args)
+                timings.append(time.perf_counter() - started)
+        if timings[-1] > SLOW_PASS_SECONDS:
+            # One slow pass is representative enough; don't triple the wait
+            break
+
+    best = min(timings)
+    return {
+        "case": case.name,
+        "size": size,
+        "repeat": len(timings),
+        "best_seconds": round(best, 6),
+        "median_seconds": round(statistics.median(timings), 6),
+        "us_per_item": round(best / size * 1e6, 3),
+        "items_per_second": round(size / best, 1) if best else None,
+    }
+
+
+def run_suite(cases, sizes=None, repeat=3, full=False, progress=print):
+    """Time every case at every size. Sizes above a case's max_size are skipped unless full."""
+    results = []
+    for case in cases:
+        for size in case.sizes or sizes or DEFAULT_SIZES:
+            if case.max_size and size > case.max_size and not full:
+                progress(f"{case.name:<22} {size:>7}  skipped (above {case.max_size}; use --full)")
+                continue
+            # Large inputs are slow enough that one pass is representative
+            row = time_case(case, size, repeat if size < 100000 else 1)
+            progress(f"{case.name:<22} {size:>7}  {row['best_seconds']:>9.4f}s  {row['us_per_item']:>9.2f} us/item  {row['items_per_second']:>11,.0f} items/s")
+            results.append(row)
+    return results
+
+
+def build_report(results):
+    return {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "machine": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+
+def save_baseline(path, results):
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(build_report(results), f, indent=2)
+        f.write("\n")
+
+
+def load_baseline(path):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def compare(results, baseline, threshold=0.2):
+    """
+    Compare best times against the baseline.
+    Returns rows with the ratio current/baseline; a row regressed if the ratio exceeds 1 + threshold.
+    """
+    previous = {(row["case"], row["size"]): row for row in baseline.get("results", [])}
+    rows = []
+    for row in results:
+        old = previous.get((row["case"], row["size"]))
+        if old is None or not old["best_seconds"]:
+            rows.append(dict(row, baseline_seconds=None, ratio=None, regressed=False))
+            continue
+        ratio = row["best_seconds"] / old["best_seconds"]
+        rows.append(dict(row, baseline_seconds=old["best_seconds"], ratio=round(ratio, 3), regressed=ratio > 1 + threshold))
+    return rows
@@ -0,0 +1,191 @@
+"""Deterministic synthetic inputs shaped like what the scrapers see in production."""
+
+import random
+
+COMPANIES = [
+    "Acme Logistics", "Globex", "Initech", "Umbrella Health", "Stark Industries", "Wayne Capital",
+    "Hooli", "Vandelay Industries", "Soylent Foods", "Cyberdyne Systems", "Tyrell Analytics",
+    "Wonka Brands", "Oscorp", "Massive Dynamic", "Pied Piper", "Dunder Mifflin", "Prestige Worldwide",
+    "Sterling Cooper", "Gringotts Financial", "Monarch Solutions",
+]
+VERBS = [
+    "signs lease for", "relocates headquarters to", "expands office in", "opens regional office in",
+    "breaks ground on campus in", "raises Series B to grow in", "announces return to office in",
+    "completes build-out in",
+]
+CITIES = [
+    "Dallas", "Plano", "Frisco", "Irving", "Fort Worth", "Richardson", "Addison", "Southlake",
+    "Austin", "Houston", "Denver", "Phoenix", "Atlanta", "Chicago", "Charlotte", "Nashville",
+]
+FILLER = (
+    "The company said the move consolidates several teams and adds room for growth over the "
+    "next two years, according to people familiar with the plans."
+)
+JOB_TITLES = [
+    "Facilities Manager", "Director of Workplace Experience", "Office Manager",
+    "VP of Real Estate", "Head of Facilities", "Workplace Coordinator",
+]
+
+
+def _rng(seed):
+    return random.Random(seed)
+
+
+def feed_items(count, seed=7, duplicate_rate=0.15):
+    """Raw RSS items (title/link/summary/...) with a share of near-duplicate titles."""
+    rng = _rng(seed)
+    items = []
+    for i in range(count):
+        if items and rng.random() < duplicate_rate:
+            # Same story from another outlet: small edits to an earlier headline
+            original = rng.choice(items)["title"]
+            title = original.replace(" in ", " into ", 1) + rng.choice(["", " - report", " | Dallas News"])
+        else:
+            title = f"{rng.choice(COMPANIES)} {i} {rng.choice(VERBS)} {rng.choice(CITIES)} {rng.randint(10, 500)}k sq ft"
+        items.append({
+            "title": title,
+            "link": f"https://news.example.com/story/{i}",
+            "published": "Mon, 06 Jan 2025 12:00:00 GMT",
+            "summary": f"{title}. {FILLER}",
+            "context": "Synthetic",
+            "source_type": "google_news_synthetic",
+        })
+    return items
+
+
+def html_summaries(count, seed=11):
+    """Google News / bizjournals style description fragments."""
+    rng = _rng(seed)
+    summaries = []
+    for i in range(count):
+        company = rng.choice(COMPANIES)
+        city = rng.choice(CITIES)
+        summaries.append(
+            f'<p><a href="https://news.example.com/story/{i}?utm_source=rss" target="_blank">'
+            f'{company} {rng.choice(VERBS)} {city}</a>&nbsp;&nbsp;<font color="#6f6f6f">Example Journal</font></p>'
+            f'<p>{FILLER} &amp; more.</p><img src="https://img.example.com/{i}.jpg" width="1" height="1" />'
+        )
+    return summaries
+
+
+def location_texts(count, seed=13):
+    """Title + summary strings; roughly half mention a target location."""
+    rng = _rng(seed)
+    return [
+        f"{rng.choice(COMPANIES)} {rng.choice(VERBS)} {rng.choice(CITIES)}. {FILLER}"
+        for _ in range(count)
+    ]
+
+
+def jsearch_results(count, seed=17):
+    """Items as returned in the `data` list of the JSearch API."""
+    rng = _rng(seed)
+    results = []
+    for i in range(count):
+        results.append({
+            "job_id": f"job-{i}",
+            "job_title": rng.choice(JOB_TITLES),
+            "employer_name": f"{rng.choice(COMPANIES)} {i}",
+            "employer_website": rng.choice(["", "https://www.example.com"]),
+            "job_city": rng.choice(["Dallas", "Plano", "Irving", ""]),
+            "job_state": "TX",
+            "job_posted_at_datetime_utc": f"2025-01-{rng.randint(1, 28):02d}T08:00:00.000Z",
+            "job_apply_link": f"https://jobs.example.com/apply/{i}",
+            "job_description": FILLER * 4,
+        })
+    return results
+
+
+def leads(count, seed=19):
+    """Lead dicts as produced by the scrapers and handed to the writers."""
+    rng = _rng(seed)
+    return [{
+        "discovery_date": "2025-01-06",
+        "company_name": f"{rng.choice(COMPANIES)} {i}",
+        "domain": "",
+        "discovery_source": "rss_google_news_synthetic_ai",
+        "signal_type": rng.choice(["lease", "relocation", "expansion", "hiring"]),
+        "signal_strength": rng.choice(["High", "Very High", "Medium"]),
+        "signal_date": "2025-01-06",
+        "details": f"Signal: LEASE. Size: {rng.randint(5, 90)},000 sqft. Industry: Technology. AI: {FILLER}",
+        "location": rng.choice(CITIES),
+        "timeline": "Q2 2025",
+        "source_url": f"https://news.example.com/story/{i}",
+        "county": "Dallas/Tarrant/Collin",
+        "all_signals": "real_estate_news",
+        "notes": f"Headline: synthetic {i}\nSummary: {FILLER}",
+    } for i in range(count)]
+
+
+SYLLABLES = ["ac", "bel", "cor", "dyn", "el", "fab", "gen", "hal", "in", "jo", "ka", "lum", "mer", "nov", "or", "pra", "quin", "ros", "sol", "tor"]
+NAME_KINDS = ["Logistics", "Capital", "Health", "Systems", "Foods", "Analytics", "Brands", "Energy", "Partners", "Labs"]
+NAME_SUFFIXES = ["", " Inc.", ", Inc.", " LLC", " Corp", " Corporation", " Co."]
+SIGNAL_SOURCES = ["job_posting", "funding_news", "real_estate_news", "certificate_of_occupancy", "remodel_permit"]
+
+
+def company_leads(count, seed=23, signals_per_company=3):
+    """
+    Leads where each company recurs about signals_per_company times under name variants
+    ("Acme Corp", "ACME CORP INC."), sometimes with its website.
+    """
+    rng = _rng(seed)
+    words = [a + b + c for a in SYLLABLES for b in SYLLABLES for c in ("", "a", "o")]
+    companies = [
+        (f"{rng.choice(words).title()} {rng.choice(words).title()} {rng.choice(NAME_KINDS)}", f"{i}")
+        for i in range(max(1, count // signals_per_company))
+    ]
+    results = []
+    for i in range(count):
+        name, key = rng.choice(companies)
+        variant = name + rng.choice(NAME_SUFFIXES)
+        if rng.random() < 0.2:
+            variant = variant.upper()
+        website = f"https://www.{name.split()[0].lower()}{key}.com/about" if rng.random() < 0.5 else ""
+        results.append({
+            "company_name": variant,
+            "domain": website,
+            "discovery_source": "synthetic",
+            "discovery_date": "2025-01-06",
+            "signal_type": rng.choice(["lease", "relocation", "expansion", "hiring", "funding"]),
+            "signal_strength": rng.choice(["Low", "Medium", "High", "Very High"]),
+            "details": f"Synthetic signal {i}.",
+            "source_url": f"https://signals.example.com/{i}",
+            "all_signals": rng.choice(SIGNAL_SOURCES),
+            "notes": "",
+        })
+    return results
+
+
+PERMIT_TYPES = [
+    "Building (BU) Commercial Alteration", "Building (BU) Commercial Renovation",
+    "Building (BU) Commercial New Construction", "Building (BU) Single Family Alteration",
+    "Electrical (EL) Commercial Alteration", "Plumbing (PL) Single Family Repair",
+]
+PERMIT_COLUMNS = [
+    "permit_number", "permit_type", "issued_date", "value", "area",
+    "work_description", "land_use", "street_address", "zip_code",
+]
+
+
+def permit_csv(count, seed=23):
+    """Text of a Dallas building permits (e7gq-4sah) CSV export with count rows."""
+    import csv
+    import io
+
+    rng = _rng(seed)
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(PERMIT_COLUMNS)
+    for i in range(count):
+        writer.writerow([
+            f"2501{i:07d}",
+            rng.choice(PERMIT_TYPES),
+            f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T00:00:00.000",
+            rng.choice([str(rng.randint(1, 2000) * 1000), f"${rng.randint(1, 2000) * 1000:,}.00", ""]),
+            str(rng.randint(500, 60000)),
+            f"Interior finish out, suite {i}, {FILLER}",
+            rng.choice(["OFFICE", "MEDICAL OFFICE", "SINGLE FAMILY", "RETAIL", ""]),
+            f"{rng.randint(100, 9999)} Main St",
+            f"752{rng.randint(0, 99):02d}",
+        ])
+    return out.getvalue()
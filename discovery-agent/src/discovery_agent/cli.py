@@ -0,0 +1,117 @@
+"""
+Command-line interface for the discovery agent.
+
+    python -m discovery_agent run [jobs|realestate|funding|co|remodel ...] [--resume]
+    python -m discovery_agent daemon
+    python -m discovery_agent stats [--days N]
+
+Only argparse and the scraper name registry are imported up front. Every command
+imports what it needs when it runs (openpyxl and the chosen scrapers for `run`,
+just sqlite3 for `stats`), so startup stays fast; the startup_* benchmarks in
+`python -m discovery_agent.benchmarks` keep an eye on it.
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+
+from discovery_agent.scrapers import SCRAPER_CLASSES
+
+
+def load_command(name, sources=None):
+    """Import everything command name needs before it does any work (also used by the startup benchmarks)."""
+    if name == "run":
+        from discovery_agent import main as entry
+        from discovery_agent.scrapers import load_scraper_class
+        import discovery_agent.shards  # noqa: F401 (writers, sink, orchestrator)
+        for source in sources or discovery_agent.shards.DEFAULT_SOURCES:
+            load_scraper_class(source)
+        return entry.run_discovery
+    if name == "daemon":
+        from discovery_agent import main as entry
+        import discovery_agent.daemon  # noqa: F401
+        import discovery_agent.shards  # noqa: F401
+        return entry.run_daemon
+    if name == "stats":
+        return print_stats
+    raise ValueError(f"Unknown command: {name}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="discovery", description="Discovery Agent: find buying signals for office furniture leads.")
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+
+    run = commands.add_parser("run", help="Run discovery once for the given sources (default: jobs, realestate, funding).")
+    # Validated in main(): argparse rejects an empty nargs="*" list when choices are set
+    run.add_argument("sources", nargs="*", metavar="SOURCE",
+                     help=f"One or more of: {', '.join(sorted(SCRAPER_CLASSES))}.")
+    run.add_argument("--resume", action="store_true",
+                     help="Continue the last interrupted run from its checkpoints instead of starting over.")
+
+    commands.add_parser("daemon", help="Stay resident and run each source on its own schedule (see `scheduler` in config.yaml).")
+
+    stats = commands.add_parser("stats", help="Show lead counts, recent runs and the last run's metrics.")
+    stats.add_argument("--days", type=int, default=7, help="Window for the recent lead counts (default: 7).")
+    return parser
+
+
+def print_stats(days=7):
+    """Print lead counts by source, recent runs and per-source totals from the last metrics report."""
+    from discovery_agent.utils.config import PROJECT_ROOT, load_config
+    from discovery_agent.utils.db_writer import DatabaseWriter
+    from discovery_agent.utils.run_state import RunStateStore
+
+    try:
+        db_writer = DatabaseWriter()
+        totals = db_writer.get_source_counts()
+        recent = db_writer.get_source_counts(days)
+        print(f"Leads in database: {sum(totals.values())} ({sum(recent.values())} in the last {days} days)")
+        for source, count in sorted(totals.items(), key=lambda pair: -pair[1]):
+            print(f"  {source or '(none)':<32} {count:>6}  ({recent.get(source, 0)} recent)")
+    except FileNotFoundError as e:
+        print(f"Warning: {e}")
+
+    run_state_path = os.path.join(PROJECT_ROOT, "data", "run_state.sqlite3")
+    if os.path.exists(run_state_path):
+        print("\nRecent runs:")
+        for run in RunStateStore(run_state_path).recent_runs():
+            status = "finished" if run["finished_at"] else "incomplete"
+            done = ", ".join(run["done_sources"]) or "-"
+            print(f"  {run['run_id']}  {status:<10}  done: {done}")
+
+    try:
+        config = load_config()
+    except FileNotFoundError:
+        config = {}
+    metrics_dir = (config.get('metrics') or {}).get('dir') or os.path.join(PROJECT_ROOT, "data", "metrics")
+    reports = sorted(glob.glob(os.path.join(metrics_dir, "run_*.json")), key=os.path.getmtime)
+    if reports:
+        with open(reports[-1], "r") as f:
+            report = json.load(f)
+        print(f"\nLast run metrics ({os.path.basename(reports[-1])}):")
+        for row in report.get("stages", []):
+            if row["stage"] == "total":
+                print(f"  {row['source']:<12} {row['seconds']:>8.1f}s  {row['items_out']:>5} leads  {row['errors']} errors")
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        unknown = [source for source in args.sources if source not in SCRAPER_CLASSES]
+        if unknown:
+            parser.error(f"unknown source(s): {', '.join(unknown)} (choose from {', '.join(sorted(SCRAPER_CLASSES))})")
+        run_discovery = load_command("run", args.sources)
+        return 0 if run_discovery(args.sources or None, resume=args.resume) else 1
+    if args.command == "daemon":
+        load_command("daemon")()
+        return 0
+    load_command("stats")(args.days)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""
+Resident scheduler daemon for the discovery agent.
+
+Instead of a cold process per run, the daemon imports everything once, keeps one
+warm scraper instance (and its LLM client) per source and metro, and triggers each
+source on its own cadence with jitter. A triggered source runs for every configured
+metro in turn (the Dallas open-data sources only for dfw). A source is never run twice at the same time:
+if its previous run is still going when the next one is due, the trigger is skipped.
+"""
+
+import logging
+import signal
+import threading
+import time
+
+import schedule
+
+from discovery_agent.scrapers import load_scraper_class, runs_in_metro
+from discovery_agent.utils.metrics import get_metrics, reset_metrics, write_run_reports
+from discovery_agent.utils.metros import load_metros
+
+
+class DiscoveryDaemon:
+    """Runs discovery sources on per-source schedules, streaming leads into a sink."""
+
+    def __init__(self, config, sink, db_writer=None):
+        self.logger = logging.getLogger(__name__)
+        self.config = config
+        self.settings = (config or {}).get('scheduler', {}) or {}
+        self.sink = sink
+        # The sink's DatabaseWriter, shared with the scrapers for their known-URL lookups
+        self.db_writer = db_writer
+        self.scheduler = schedule.Scheduler()
+        self.poll_seconds = self.settings.get('poll_seconds', 5)
+        self.metros = load_metros(config)
+
+        self._scrapers = {}
+        self._locks = {}
+        self._stop = threading.Event()
+
+    def schedule_sources(self):
+        """Register a job for every source in the `scheduler.sources` config section."""
+        for name, cadence in (self.settings.get('sources') or {}).items():
+            interval = int(cadence.get('every_minutes', 60) * 60)
+            jitter = int(cadence.get('jitter_seconds', 0))
+            self._locks[name] = threading.Lock()
+
+            # schedule picks a random interval in [interval - jitter, interval + jitter] for every run
+            self.scheduler.every(max(1, interval - jitter)).to(interval + jitter).seconds.do(self.trigger, name)
+            self.logger.info(f"Scheduled '{name}' every {interval // 60} min (+/- {jitter}s jitter).")
+
+    def trigger(self, name):
+        """Start a run of source name in the background unless one is already running."""
+        lock = self._locks.setdefault(name, threading.Lock())
+        if not lock.acquire(blocking=False):
+            self.logger.warning(f"Source '{name}' is still running. Skipping this trigger.")
+            return
+
+        worker = threading.Thread(target=self._run_source, args=(name, lock), name=f"daemon-{name}", daemon=True)
+        worker.start()
+
+    def _get_scraper(self, name, metro):
+        # Built once per (source, metro) and reused, so clients and imports stay warm between runs
+        key = (name, metro.name)
+        if key not in self._scrapers:
+            self._scrapers[key] = load_scraper_class(name)(metro=metro, db_writer=self.db_writer)
+        return self._scrapers[key]
+
+    def _run_source(self, name, lock):
+        try:
+            for metro in self.metros:
+                if runs_in_metro(name, metro.name):
+                    self._run_metro_source(name, metro)
+        finally:
+            lock.release()
+
+        # Refresh the daemon reports after every run
+        try:
+            write_run_reports(self.config, suffix="_daemon")
+        except OSError as e:
+            self.logger.warning(f"Failed to write daemon metrics: {e}")
+
+    def _run_metro_source(self, name, metro):
+        # One metro failing doesn't stop the source's run for the others
+        label = f"{metro.name}:{name}"
+        started = time.monotonic()
+        count = 0
+        errors = 0
+        try:
+            scraper = self._get_scraper(name, metro)
+            leads = scraper.stream() if hasattr(scraper, 'stream') else scraper.run()
+            for lead in leads or []:
+                self.sink.put(lead)
+                count += 1
+            self.logger.info(f"Scheduled run of '{label}' finished in {time.monotonic() - started:.1f}s with {count} leads.")
+        except Exception as e:
+            errors = 1
+            self.logger.error(f"Scheduled run of '{label}' failed: {e}")
+
+        # Daemon metrics accumulate since startup
+        get_metrics().record(label, "total", time.monotonic() - started, items_out=count, errors=errors)
+
+    def stop(self, *args):
+        self._stop.set()
+
+    def run_forever(self):
+        """Block, running due jobs until stopped by SIGINT/SIGTERM."""
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        reset_metrics("daemon", mode="daemon")
+        self.sink.start()
+        self.schedule_sources()
+        if self.settings.get('run_on_start', True):
+            for name in self._locks:
+                self.trigger(name)
+
+        self.logger.info("Discovery daemon started.")
+        try:
+            while not self._stop.is_set():
+                self.scheduler.run_pending()
+                self._stop.wait(self.poll_seconds)
+        finally:
+            self.logger.info("Discovery daemon stopping. Flushing buffered leads...")
+            self.sink.close()
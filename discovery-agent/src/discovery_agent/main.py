@@ -1,3 +1,4 @@
+import argparse
 import os
 import sys
 
@@ -11,22 +12,41 @@ sys.path.append(src_dir)
 # Project root is two levels up from this file (src/discovery_agent/main.py -> discovery-agent/)
 PROJECT_ROOT = os.path.dirname(os.path.dirname(current_dir))
 
-from discovery_agent.utils.logging_setup import setup_logging
-from discovery_agent.utils.excel_writer import ExcelWriter
-from discovery_agent.utils.db_writer import DatabaseWriter
-from discovery_agent.scrapers.job_postings import JobPostingScraper
-# from discovery_agent.scrapers.certificates_of_occupancy import CertificateOfOccupancyScraper
-from discovery_agent.scrapers.real_estate_news import RealEstateDiscovery
-from discovery_agent.scrapers.funding_news import FundingNewsDiscovery
+# Heavy imports (openpyxl, the scrapers and their openai/feedparser/bs4 dependencies)
+# happen inside the functions below, so `discovery stats` and `--help` start fast.
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Discovery Agent: find buying signals for office furniture leads.")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue the last interrupted run from its checkpoints instead of starting over.")
+    parser.add_argument("--daemon", action="store_true",
+                        help="Stay resident and run each source on its own schedule (see `scheduler` in config.yaml).")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.daemon:
+        run_daemon()
+    else:
+        run_discovery(resume=args.resume)
+
+def _setup_logging():
+    from discovery_agent.utils.logging_setup import setup_logging
 
-def main():
     # Ensure logs directory exists (relative to project root)
     logs_dir = os.path.join(PROJECT_ROOT, "logs")
     if not os.path.exists(logs_dir):
         os.makedirs(logs_dir)
 
-    setup_logging(os.path.join(logs_dir, "discovery_agent.log"))
-    print("Starting Discovery Agent...")
+    log_file = os.path.join(logs_dir, "discovery_agent.log")
+    setup_logging(log_file)
+    return log_file
+
+def _open_writers():
+    """Return (excel_writer, db_writer); db_writer is None in Excel-only mode."""
+    from discovery_agent.utils.config import load_config
+    from discovery_agent.utils.excel_writer import ExcelWriter
+    from discovery_agent.utils.db_writer import DatabaseWriter
 
     # Initialize Excel Repository (relative to project root)
     data_dir = os.path.join(PROJECT_ROOT, "data")
@@ -37,51 +57,120 @@ def main():
 
     # Initialize Database Writer
     try:
-        db_writer = DatabaseWriter()
-        use_database = True
+        # Signals of a company that already has a lead are merged into that lead
+        db_writer = DatabaseWriter.from_config(load_config())
         print(f"Database connected. Current lead count: {db_writer.get_lead_count()}")
     except FileNotFoundError as e:
         print(f"Warning: {e}")
         print("Continuing with Excel-only mode.")
-        use_database = False
-
-    all_new_leads = []
-
-    # 1. Job Postings
-    print("\n--- Running Job Posting Scraper ---")
-    job_scraper = JobPostingScraper()
-    job_leads = job_scraper.run()
-    print(f"Found {len(job_leads)} leads from job postings.")
-    all_new_leads.extend(job_leads)
-
-    # 2. Real Estate Signals
-    print("\n--- Running Real Estate Signal Discovery ---")
-    re_discovery = RealEstateDiscovery()
-    re_leads = re_discovery.run()
-    print(f"Found {len(re_leads)} leads from real estate news.")
-    all_new_leads.extend(re_leads)
-
-    # 3. Funding Signals
-    print("\n--- Running Funding News Discovery ---")
-    funding_discovery = FundingNewsDiscovery()
-    funding_leads = funding_discovery.run()
-    print(f"Found {len(funding_leads)} leads from funding news.")
-    all_new_leads.extend(funding_leads)
-
-    # Save to Excel (always)
-    print(f"\nSaving total {len(all_new_leads)} leads to Excel...")
-    excel_writer.save_leads(all_new_leads)
-
-    # Save to Database (if available)
+        db_writer = None
+    return excel_writer, db_writer
+
+def run_daemon():
+    """Stay resident and run each source on its own schedule."""
+    from discovery_agent.utils.config import load_config
+    from discovery_agent.utils.lead_sink import LeadSink
+    from discovery_agent.daemon import DiscoveryDaemon
+
+    _setup_logging()
+    print("Starting Discovery Agent daemon...")
+    excel_writer, db_writer = _open_writers()
+    config = load_config()
+    DiscoveryDaemon(config, LeadSink.from_config(config, excel_writer, db_writer), db_writer).run_forever()
+
+def run_discovery(source_names=None, resume=False):
+    """
+    Run the given sources (default: jobs, real estate, funding) for every configured metro.
+    Returns True if the run finished completely.
+    """
+    from discovery_agent.utils.config import load_config
+    from discovery_agent.utils.lead_sink import LeadSink
+    from discovery_agent.utils.run_state import RunStateStore
+    from discovery_agent.utils.metros import load_metros
+    from discovery_agent.utils.metrics import reset_metrics, write_run_reports
+    from discovery_agent.shards import DEFAULT_SOURCES, run_metro, run_shards
+
+    source_names = source_names or DEFAULT_SOURCES
+    log_file = _setup_logging()
+    print("Starting Discovery Agent...")
+
+    data_dir = os.path.join(PROJECT_ROOT, "data")
+    excel_writer, db_writer = _open_writers()
+    use_database = db_writer is not None
+
+    # Run all sources concurrently; a failing or hung source does not block the others.
+    # Leads are streamed into the sink, which writes them to the DB and Excel in small batches.
+    config = load_config()
+    sink = LeadSink.from_config(config, excel_writer, db_writer)
+
+    # Run-state checkpoints so an interrupted run can be resumed
+    run_state_path = os.path.join(data_dir, "run_state.sqlite3")
+    run_state = RunStateStore(run_state_path)
+    run_state.prune(config.get('run_state', {}).get('retention_days', 7))
+    run_id = run_state.latest_unfinished_run() if resume else None
+    if run_id:
+        print(f"Resuming run {run_id} from checkpoints.")
+    else:
+        if resume:
+            print("No interrupted run found. Starting a new run.")
+        run_id = run_state.start_run()
+
+    metros = load_metros(config)
+    metro_results = {}
+    sink_stats = []
+
+    if len(metros) == 1:
+        print(f"\n--- Running Discovery Sources ({', '.join(source_names)}) for {metros[0].display_name} ---")
+        reset_metrics(run_id, metro=metros[0].name)
+        with sink:
+            metro_results[metros[0].name] = run_metro(metros[0], config, sink, run_state, run_id, source_names, db_writer)
+        sink_stats.append(sink.stats())
+        json_path, prom_path = write_run_reports(config)
+        print(f"Run metrics written to {json_path} and {prom_path}")
+    else:
+        # One shard per metro in a process pool, all writing to the shared lead store
+        print(f"\n--- Running Discovery Shards for {len(metros)} metros ---")
+        shards = run_shards(metros, config, run_id, excel_writer.filepath, run_state_path, use_database, log_file, source_names)
+        for metro_name, results, stats, error in shards:
+            if error is not None:
+                print(f"Shard {metro_name} failed: {error}")
+                metro_results[metro_name] = None
+                continue
+            metro_results[metro_name] = results
+            sink_stats.append(stats)
+
+    for metro_name, results in metro_results.items():
+        for name, result in (results or {}).items():
+            if result.ok:
+                print(f"[{metro_name}] Found {result.count} leads from {name} ({result.elapsed:.1f}s).")
+            elif result.status == "skipped":
+                print(f"[{metro_name}] Source {name} already completed in run {run_id}. Skipped.")
+            else:
+                print(f"[{metro_name}] Source {name} {result.status}: {result.error}")
+
+    completed = all(results is not None and all(r.complete for r in results.values()) for results in metro_results.values())
+    if completed:
+        run_state.finish_run(run_id)
+    else:
+        print(f"Run {run_id} incomplete. Re-run with --resume to continue from its checkpoints.")
+
+    print(f"\nStreamed total {sum(stats['received'] for stats in sink_stats)} leads.")
+    totals = {}
+    for stats in sink_stats:
+        for target, counts in stats['targets'].items():
+            total = totals.setdefault(target, {"saved": 0, "skipped": 0, "errors": 0})
+            for key in total:
+                total[key] += counts[key]
+    for target, total in totals.items():
+        print(f"{target}: {total['saved']} saved, {total['skipped']} skipped, {total['errors']} failed batches.")
+
     if use_database:
-        print("Saving leads to database...")
-        saved, skipped = db_writer.save_leads(all_new_leads)
-        print(f"Database: {saved} new leads saved, {skipped} duplicates skipped.")
         print(f"Total leads in database: {db_writer.get_lead_count()}")
 
     print("\nDiscovery process completed.")
     if use_database:
         print("View leads at: http://127.0.0.1:8000/admin/leads/lead/")
+    return completed
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,29 @@
+import importlib
+
+# Discovery sources by short name. Classes are resolved lazily so callers only
+# pay for the imports (openai, feedparser, bs4, ...) of the sources they run.
+SCRAPER_CLASSES = {
+    "jobs": "discovery_agent.scrapers.job_postings.JobPostingScraper",
+    "realestate": "discovery_agent.scrapers.real_estate_news.RealEstateDiscovery",
+    "funding": "discovery_agent.scrapers.funding_news.FundingNewsDiscovery",
+    "co": "discovery_agent.scrapers.certificates_of_occupancy.CertificateOfOccupancyScraper",
+    "remodel": "discovery_agent.scrapers.remodel_permits.RemodelPermitScraper",
+}
+
+# Sources backed by one metro's open data (city of Dallas datasets): they run once, in
+# that metro's shard, instead of repeating the same work for every configured metro
+SINGLE_METRO_SOURCES = {
+    "co": "dfw",
+    "remodel": "dfw",
+}
+
+
+def runs_in_metro(name, metro_name):
+    """Whether source name runs for the metro called metro_name."""
+    return SINGLE_METRO_SOURCES.get(name, metro_name) == metro_name
+
+
+def load_scraper_class(name):
+    """Import and return the scraper class registered under name."""
+    module_path, class_name = SCRAPER_CLASSES[name].rsplit(".", 1)
+    return getattr(importlib.import_module(module_path), class_name)
@@ -1,34 +1,25 @@
-import requests
 from datetime import datetime, timedelta
 import logging
-import yaml
-import os
-import urllib.parse
+from discovery_agent.utils.config import load_config
+from discovery_agent.utils.open_data_mirror import OpenDataMirror
 
 class CertificateOfOccupancyScraper:
-    def __init__(self):
+    source_name = "co"
+
+    def __init__(self, metro=None, checkpoint=None, db_writer=None):
+        # The Dallas Open Data CO dataset only covers the city of Dallas, so metro,
+        # checkpoint and db_writer are accepted for interface parity with the other sources but unused
+        # (the source only runs in the dfw shard, see SINGLE_METRO_SOURCES)
         self.logger = logging.getLogger(__name__)
-        self.config = self._load_config()
-        self.base_url = "https://www.dallasopendata.com/resource/dryn-sntn.json"
+        self.config = load_config()
+        self.dataset = "dryn-sntn"
         self.min_sqft = self.config['public_records'].get('co_min_sqft', 5000)
         self.lookback_days = self.config['public_records'].get('lookback_days', 90) # Increase default lookback for testing
+        # Local SQLite mirror of the dataset, synced incrementally from the API
+        self.mirror = OpenDataMirror.from_config(self.config)
         
-    def _load_config(self):
-        # Robust config loading
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        # src/discovery_agent/scrapers -> src/discovery_agent -> src -> discovery-agent
-        root_dir = os.path.dirname(os.path.dirname(os.path.dirname(current_dir)))
-        config_path = os.path.join(root_dir, 'config', 'config.yaml')
-        
-        if not os.path.exists(config_path):
-             root_dir = os.path.dirname(root_dir)
-             config_path = os.path.join(root_dir, 'config', 'config.yaml')
-             
-        if not os.path.exists(config_path):
-            config_path = "config/config.yaml"
-            
-        with open(config_path, 'r') as f:
-            return yaml.safe_load(f)
+    def stream(self):
+        yield from self.run()
 
     def run(self):
         self.logger.info("Running Certificate of Occupancy Scraper (Dallas)...")
@@ -36,46 +27,40 @@ class CertificateOfOccupancyScraper:
         # Calculate date threshold
         threshold_date = (datetime.now() - timedelta(days=self.lookback_days)).strftime("%Y-%m-%dT00:00:00")
         
-        # Construct SoQL Query
-        # We want:
+        # Pull only records issued since the last sync into the local mirror, then
+        # filter the lookback window locally:
         # 1. Issued recently
         # 2. Sq Ft > threshold
         # 3. Not cancelled/revoked (status check if available, otherwise just date_issued)
-        
-        where_clause = f"date_issued >= '{threshold_date}' AND sq_ft >= {self.min_sqft}"
-        
-        params = {
-            "$where": where_clause,
-            "$limit": 1000,
-            "$order": "date_issued DESC"
-        }
-        
         try:
-            response = requests.get(self.base_url, params=params)
-            
-            if response.status_code != 200:
-                self.logger.error(f"Dallas API Error: {response.status_code} - {response.text}")
-                return []
-                
-            data = response.json()
-            self.logger.info(f"Fetched {len(data)} raw CO records.")
-            
-            leads = []
-            for item in data:
-                lead = self._parse_record(item)
-                if lead:
-                    leads.append(lead)
-                    
-            return leads
-            
+            self.mirror.sync(self.dataset, since=threshold_date)
         except Exception as e:
-            self.logger.error(f"Error fetching COs: {e}")
-            return []
+            # Fall back to whatever the mirror already holds
+            self.logger.error(f"Error syncing COs: {e}")
+
+        leads = []
+        fetched = 0
+        for item in self.mirror.records(self.dataset, since=threshold_date):
+            fetched += 1
+            if self._sq_ft(item) < self.min_sqft:
+                continue
+            lead = self._parse_record(item)
+            if lead:
+                leads.append(lead)
+
+        self.logger.info(f"Found {fetched} CO records in the lookback window, {len(leads)} above {self.min_sqft} sqft.")
+        return leads
+
+    @staticmethod
+    def _sq_ft(item):
+        try:
+            return float(item.get('sq_ft') or 0)
+        except (TypeError, ValueError):
+            return 0
 
     def _parse_record(self, item):
         try:
             business_name = item.get('business_name', 'Unknown')
-            sq_ft_str = item.get('sq_ft', '0')
             land_use = item.get('land_use', 'Unknown')
             date_issued = item.get('date_issued', '')
             address = item.get('address', '')
@@ -92,7 +77,7 @@ class CertificateOfOccupancyScraper:
                 # Let's log it but keep it if sqft is high enough, maybe tag it
                 pass
 
-            sq_ft = int(sq_ft_str) if sq_ft_str.isdigit() else 0
+            sq_ft = int(self._sq_ft(item))
             
             # Signal Strength Logic
             signal_strength = "Medium"
@@ -1,59 +1,116 @@
+import csv
 import feedparser
 import urllib.parse
 from datetime import datetime
 import logging
-import yaml
 import os
-import re
 import time
 import json
-from openai import OpenAI, AzureOpenAI
-from bs4 import BeautifulSoup
+from discovery_agent.utils.config import load_config
+from discovery_agent.utils.run_state import NullCheckpoint
+from discovery_agent.utils.metros import Metro, default_metro
+from discovery_agent.utils.metrics import get_metrics
+from discovery_agent.utils.llm_client import create_llm_client
+from discovery_agent.utils.llm_executor import get_llm_executor
+from discovery_agent.utils.batch_planner import BatchPlanner
+from discovery_agent.utils.http_client import get_http_client
+from discovery_agent.utils.feed_fetcher import AsyncFeedFetcher
+from discovery_agent.utils.feed_watermarks import FeedWatermarks
+from discovery_agent.utils.html_text import clean_html_summary
+from discovery_agent.utils.location_matcher import format_places
+from discovery_agent.utils.known_urls import KnownUrls
+from discovery_agent.utils.title_history import TitleHistory
+from discovery_agent.utils.verdict_store import VerdictStore, content_key, prompt_version
+
+ANALYSIS_SYSTEM_PROMPT = "You extract funding data. Return valid JSON only."
+ANALYSIS_PROMPT = """
+        You are an Expert Funding Analyst identifying companies that recently raised capital in {display_name}.
+        These companies are likely to expand their offices and need furniture.
+
+        Review the following news items and identify ONLY valid funding events.
+
+        VALID Funding Signals:
+        - Series A, B, C, D funding rounds
+        - Seed funding or Venture Capital investment
+        - Private Equity investment (growth equity, not buyouts)
+        - The company receiving funds MUST be headquartered in the {display_name} ({short_name}) metro area
+
+        EXCLUDE (Not Valid):
+        - M&A where the company is being ACQUIRED/SOLD (unless explicitly mentions expansion)
+        - Real Estate investment funds or REITs
+        - Stock market news (IPO filings without funding context)
+        - Restaurant/Hospitality businesses (not our target market)
+        - Healthcare/Medical practices (not our target market)
+        - Charitable donations or grants
+        - The investor being from {short_name} (we want the COMPANY to be in {short_name})
+
+        Items to Analyze:
+        {items_text}
+
+        Return a JSON OBJECT with a key "leads" containing a list of valid items.
+        Each item in the list should have:
+        - original_index: integer
+        - company_name: string (The company RAISING the money)
+        - funding_amount: string (e.g. "$15M", "Undisclosed")
+        - round_type: string (Series A, Seed, Growth Equity, etc.)
+        - industry: string (e.g. "SaaS", "FinTech", "Professional Services", "Manufacturing")
+        - location: string (Specific city in {short_name})
+        - company_website: string (if mentioned, otherwise "Unknown")
+        - reason: string (Brief explanation of why this is a valid lead)
+
+        Also return a key "rejected" listing the original_index of every item that is NOT valid.
+        Do not list items you left out only because another item covers the same event.
+
+        If no items are relevant, return {{"leads": [], "rejected": [<every original_index>]}}
+        """
+# Hash of the prompt templates: stored verdicts only count for the same version
+PROMPT_VERSION = prompt_version(ANALYSIS_SYSTEM_PROMPT, ANALYSIS_PROMPT)
 
 class FundingNewsDiscovery:
-    def __init__(self):
+    source_name = "funding"
+
+    def __init__(self, metro=None, checkpoint=None, db_writer=None):
         self.logger = logging.getLogger(__name__)
-        self.config = self._load_config()
+        self.config = load_config()
+        # Metro to search (queries, location filter, regional feeds)
+        self.metro = metro or default_metro(self.config)
+        # Stage checkpoints for resumable runs (no-op unless a run-state store is used)
+        self.checkpoint = checkpoint or NullCheckpoint()
+        # The pipeline's leads database, read for known URLs (None in Excel-only mode)
+        self.db_writer = db_writer
         
+        self.http = get_http_client(self.config)
+        self.feed_fetcher = AsyncFeedFetcher.from_config(self.config, self.http)
+        # Per-feed watermarks so each run only processes new articles (None if disabled)
+        self.watermarks = FeedWatermarks.from_config(self.config, f"{self.source_name}:{self.metro.name}")
+        # Lead URLs and stored LLM verdicts, loaded at the start of every run
+        self.known_urls = None
+        self.verdicts = None
+        # Titles analyzed in earlier runs, to skip syndicated repeats (None if disabled)
+        self.title_history = TitleHistory.load(self.config, f"{self.source_name}:{self.metro.name}")
+
         # AI Setup
-        self.openai_key = self.config['api_keys'].get('openai_api_key', '')
-        self.azure_endpoint = self.config['api_keys'].get('azure_openai_endpoint', '')
-        self.azure_deployment = self.config['api_keys'].get('azure_deployment_name', 'gpt-4o-mini')
-        self.azure_version = self.config['api_keys'].get('azure_api_version', '2024-02-15-preview')
-        
-        self.client = None
-        
-        if self.openai_key and "YOUR_" not in self.openai_key:
-            if self.azure_endpoint and "YOUR_" not in self.azure_endpoint:
-                # Use Azure OpenAI
-                self.logger.info("Initializing Azure OpenAI Client for Funding News...")
-                self.client = AzureOpenAI(
-                    api_key=self.openai_key,
-                    api_version=self.azure_version,
-                    azure_endpoint=self.azure_endpoint
-                )
-                self.model_name = self.azure_deployment
-            else:
-                # Use Standard OpenAI
-                self.client = OpenAI(api_key=self.openai_key)
-                self.model_name = "gpt-4o-mini"
-        else:
-            self.logger.warning("OpenAI API Key not found. AI filtering disabled.")
+        self.client, self.model_name = create_llm_client(self.config.get('api_keys'), "Funding News")
+        # Shared concurrency and RPM/TPM budgets for every chat completion
+        self.llm = get_llm_executor(self.config)
+        # Batch sizes from token budgets and measured usage (None if disabled: fixed batch_size)
+        self.planner = None
+        # LLM batches that failed in the current run (their items are retried next run)
+        self._failed_batches = 0
+        if self.client:
+            prompt_overhead = len(ANALYSIS_SYSTEM_PROMPT) + len(ANALYSIS_PROMPT)
+            self.planner = BatchPlanner.from_config(self.config, self.source_name, self.model_name, prompt_overhead)
 
         # RSS Feeds
         self.base_google_news_url = "https://news.google.com/rss/search?q={}&hl=en-US&gl=US&ceid=US:en"
         
         # Direct Tech/Funding Feeds
-        self.direct_feeds = [
-            "https://dallasinnovates.com/feed/", # Excellent for local funding
-            "https://techcrunch.com/feed/",      # National, needs filtering
-            "https://feeds.feedburner.com/venturebeat/SZYF" # VentureBeat
-        ]
+        self.direct_feeds = self.metro.funding_feeds
         
         # Funding Specific Queries
-        # Focus on Dallas/DFW explicitly
-        cities = "Dallas OR Plano OR Frisco OR Irving OR Richardson OR Addison"
-        regional = "DFW OR \"Dallas-Fort Worth\""
+        # Focus on the metro explicitly
+        cities = Metro.or_clause(self.metro.funding_cities)
+        regional = Metro.or_clause(self.metro.regional_terms)
         
         self.google_queries = [
             # 1. Venture Capital Rounds
@@ -67,38 +124,59 @@ class FundingNewsDiscovery:
         ]
         
         # Strict Client-Side Location Filter (Same as Real Estate)
-        self.target_locations = [
-            "dallas", "fort worth", "dfw", "metroplex", "arlington", "plano", "garland", 
-            "irving", "mckinney", "frisco", "grand prairie", "mesquite", "denton", 
-            "richardson", "lewisville", "addison", "allen", "southlake", "grapevine", 
-            "coppell", "rockwall", "carrollton", "farmers branch", "the colony", 
-            "flower mound", "keller"
-        ]
+        self.target_locations = self.metro.funding_target_locations
+        self.location_matcher = self.metro.funding_location_matcher
 
-    def _load_config(self):
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        root_dir = os.path.dirname(os.path.dirname(os.path.dirname(current_dir)))
-        config_path = os.path.join(root_dir, 'config', 'config.yaml')
-        
-        if not os.path.exists(config_path):
-             root_dir = os.path.dirname(root_dir)
-             config_path = os.path.join(root_dir, 'config', 'config.yaml')
-             
-        if not os.path.exists(config_path):
-            config_path = "config/config.yaml"
-            
-        with open(config_path, 'r') as f:
-            return yaml.safe_load(f)
-            
     def _is_location_relevant(self, text):
-        """Check if text contains any of the target DFW locations."""
-        text_lower = text.lower()
-        return any(loc in text_lower for loc in self.target_locations)
+        """Check if text mentions any of the metro's target locations."""
+        return self.location_matcher.is_relevant(text)
 
     def run(self):
-        self.logger.info("Running Funding News Discovery...")
-        
-        raw_items = []
+        return list(self.stream())
+
+    def stream(self):
+        """Yield analyzed leads batch by batch as they become available."""
+        self.logger.info(f"Running Funding News Discovery ({self.metro.name})...")
+
+        self._failed_batches = 0
+        self.known_urls = KnownUrls.load(self.config, self.source_name, self.db_writer)
+        if self.client:
+            self.verdicts = VerdictStore.from_config(self.config, f"{self.source_name}:{self.metro.name}", self.model_name, PROMPT_VERSION)
+        if self.watermarks is not None:
+            self.watermarks.reset()
+
+        raw_items = self.checkpoint.load_or_run("fetched", self._fetch_all_items)
+        # Checkpointed with the items, so a resumed run still commits them at the end
+        feed_marks = self.checkpoint.load_or_run("feed_marks", self._pending_feed_marks)
+        unique_list = self.checkpoint.load_or_run("deduped", lambda: self._deduplicate_items(self._drop_seen_titles(self._drop_known_urls(raw_items))))
+
+        # 3. Batch AI Analysis
+        yield from self._process_batches(unique_list)
+
+        # Every new entry has been analyzed: advance the feed watermarks (otherwise retry them next run)
+        if self.watermarks is not None and self.client and not self._failed_batches:
+            self.watermarks.commit(feed_marks)
+        # Same rule for the title history: a failed batch is retried next run, not skipped as seen
+        if self.title_history is not None and self.client and not self._failed_batches:
+            self.title_history.remember(unique_list)
+
+    def _pending_feed_marks(self):
+        return self.watermarks.pending() if self.watermarks is not None else {}
+
+    def _drop_known_urls(self, items):
+        # Already leads: don't spend LLM tokens on them again
+        return self.known_urls.filter(items, 'link') if self.known_urls is not None else items
+
+    def _drop_seen_titles(self, items):
+        # Same story under another URL in an earlier run (e.g. syndicated days later)
+        return self.title_history.filter(items, 'title') if self.title_history is not None else items
+
+    def _item_key(self, item):
+        return item.get('link') or content_key(item.get('title'), item.get('summary'))
+
+    def _feed_requests(self):
+        """(url, context, source_type) for every Google News query and direct feed."""
+        feeds = []
         
         # 1. Process Google News Feeds
         for idx, query_template in enumerate(self.google_queries):
@@ -106,15 +184,10 @@ class FundingNewsDiscovery:
             encoded_query = urllib.parse.quote(query)
             feed_url = self.base_google_news_url.format(encoded_query)
             
-            self.logger.info(f"Fetching Funding RSS for Query #{idx+1}")
-            items = self._fetch_feed_items(feed_url, query_template, f"funding_google_q{idx+1}")
-            raw_items.extend(items)
-            time.sleep(1) 
+            feeds.append((feed_url, query_template, f"funding_google_q{idx+1}"))
             
         # 2. Process Direct Feeds
         for feed_url in self.direct_feeds:
-            self.logger.info(f"Fetching Direct Feed: {feed_url}")
-            
             source_name = "direct_unknown"
             if "dallasinnovates" in feed_url:
                 source_name = "direct_dallas_innovates"
@@ -123,27 +196,48 @@ class FundingNewsDiscovery:
             elif "venturebeat" in feed_url:
                 source_name = "direct_venturebeat"
                 
-            items = self._fetch_feed_items(feed_url, "Tech News", source_name)
-            raw_items.extend(items)
-            
+            feeds.append((feed_url, "Tech News", source_name))
+
+        return feeds
+
+    def _fetch_all_items(self):
+        feeds = self._feed_requests()
+        self.logger.info(f"Fetching {len(feeds)} RSS feeds concurrently...")
+        metrics = get_metrics()
+        with metrics.stage(self.source_name, "rss_fetch_all", len(feeds)):
+            results = self.feed_fetcher.fetch_all([feed_url for feed_url, _, _ in feeds])
+
+        raw_items = []
+        for (feed_url, context, source_type), result in zip(feeds, results):
+            metrics.record(self.source_name, "feed_fetch", result.elapsed, errors=0 if result.ok else 1)
+            if result.error is not None:
+                self.logger.error(f"Error fetching feed {feed_url}: {result.error}")
+            elif result.response.status_code != 200:
+                self.logger.warning(f"Failed to fetch feed {feed_url}: Status {result.response.status_code}")
+            else:
+                raw_items.extend(self._parse_feed_items(feed_url, result.response, context, source_type))
+        return raw_items
+
+    def _deduplicate_items(self, raw_items):
+        metrics = get_metrics()
+
         # Deduplicate
-        unique_items = {}
-        for item in raw_items:
-            unique_items[item['link']] = item
-        unique_list = list(unique_items.values())
+        with metrics.stage(self.source_name, "dedup_links", len(raw_items)) as stage:
+            unique_items = {}
+            for item in raw_items:
+                unique_items[item['link']] = item
+            unique_list = list(unique_items.values())
+            stage.items_out = len(unique_list)
         
         self.logger.info(f"Collected {len(unique_list)} unique funding articles. Starting AI analysis...")
         
         # DEBUG LOG
-        self._save_raw_audit_log(unique_list)
+        with metrics.stage(self.source_name, "audit_log", len(unique_list)):
+            self._save_raw_audit_log(unique_list)
 
-        # 3. Batch AI Analysis
-        final_leads = self._process_batches(unique_list)
-        
-        return final_leads
+        return unique_list
 
     def _save_raw_audit_log(self, items):
-        import pandas as pd
         try:
             # Resolve absolute path to data directory
             current_dir = os.path.dirname(os.path.abspath(__file__)) 
@@ -153,50 +247,61 @@ class FundingNewsDiscovery:
             if not os.path.exists(data_dir):
                 os.makedirs(data_dir)
                 
-            df = pd.DataFrame(items)
             # Select useful columns
             cols = ['title', 'source_type', 'published', 'link', 'summary']
-            df = df[cols] if set(cols).issubset(df.columns) else df
-            
             output_path = os.path.join(data_dir, "debug_funding_rss_log.csv")
-            
-            if os.path.exists(output_path):
-                df.to_csv(output_path, mode='a', header=False, index=False)
-            else:
-                df.to_csv(output_path, index=False)
+
+            # Append if exists, or create new (with a header row)
+            write_header = not os.path.exists(output_path)
+            with open(output_path, 'a', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=cols, extrasaction='ignore')
+                if write_header:
+                    writer.writeheader()
+                writer.writerows(items)
         except Exception as e:
             self.logger.warning(f"Failed to save audit log: {e}")
 
-    def _fetch_feed_items(self, feed_url, context, source_type):
-        import requests
+    def _parse_feed_items(self, feed_url, response, context, source_type):
         items = []
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-            response = requests.get(feed_url, headers=headers, timeout=10)
-            
-            if response.status_code != 200:
+            if self.watermarks is not None and self.watermarks.is_unchanged(feed_url, response):
+                self.logger.info(f"Feed unchanged since last run, skipping: {feed_url}")
                 return []
-                
-            feed = feedparser.parse(response.content)
+
+            with get_metrics().stage(self.source_name, "feed_parse") as parse_stage:
+                feed = feedparser.parse(response.content)
+                parse_stage.items_out = len(feed.entries)
+
+            entries = feed.entries
+            if self.watermarks is not None:
+                with get_metrics().stage(self.source_name, "watermark_filter", len(entries)) as watermark_stage:
+                    entries = self.watermarks.new_entries(feed_url, response, entries)
+                    watermark_stage.items_out = len(entries)
+
+            cleanup_seconds = 0.0
+            filter_seconds = 0.0
+            filter_in = 0
+            filter_dropped = 0
             
-            for entry in feed.entries:
+            for entry in entries:
                 raw_summary = entry.get('description', '') or entry.get('summary', '')
-                clean_summary = raw_summary
-                if raw_summary:
-                    try:
-                        soup = BeautifulSoup(raw_summary, "html.parser")
-                        clean_summary = soup.get_text(separator=" ", strip=True)
-                    except Exception:
-                        pass
+                started = time.perf_counter()
+                clean_summary = clean_html_summary(raw_summary)
+                cleanup_seconds += time.perf_counter() - started
+                
+                content_text = (entry.get('title', '') + " " + clean_summary)
                 
                 # STRICT LOCATION FILTER (Client-Side)
                 # Apply to Google News AND National feeds (TechCrunch)
                 # Only Dallas Innovates is safe to skip this
+                # Places are matched for every entry: they also tag the lead's location
+                started = time.perf_counter()
+                places = self.location_matcher.matches(content_text)
+                filter_seconds += time.perf_counter() - started
                 if "dallasinnovates" not in source_type:
-                    content_text = (entry.get('title', '') + " " + clean_summary)
-                    if not self._is_location_relevant(content_text):
+                    filter_in += 1
+                    if not places:
+                        filter_dropped += 1
                         continue
 
                 items.append({
@@ -205,130 +310,165 @@ class FundingNewsDiscovery:
                     "published": entry.get('published', datetime.now().strftime("%Y-%m-%d")),
                     "summary": clean_summary[:500],
                     "context": context,
-                    "source_type": source_type
+                    "source_type": source_type,
+                    "places": places
                 })
+
+            metrics = get_metrics()
+            metrics.record(self.source_name, "html_cleanup", cleanup_seconds, len(entries), len(entries))
+            metrics.record(self.source_name, "location_filter", filter_seconds, filter_in, filter_in - filter_dropped)
         except Exception as e:
             self.logger.error(f"Error parsing feed {feed_url}: {e}")
         return items
 
     def _process_batches(self, items, batch_size=20):
         if not self.client:
-            return []
-            
-        final_leads = []
-        for i in range(0, len(items), batch_size):
-            batch = items[i:i + batch_size]
-            self.logger.info(f"Processing funding batch {i//batch_size + 1} ({len(batch)} items)...")
-            analyzed_leads = self._analyze_batch(batch)
-            final_leads.extend(analyzed_leads)
-            
-        return final_leads
+            return
 
-    def _analyze_batch(self, batch_items):
-        items_text = ""
-        for idx, item in enumerate(batch_items):
-            items_text += f"ITEM {idx}:\nTitle: {item['title']}\nSummary: {item['summary']}\nLink: {item['link']}\n\n"
-            
-        prompt = f"""
-        You are an Expert Funding Analyst identifying companies that recently raised capital in Dallas/Fort Worth.
-        These companies are likely to expand their offices and need furniture.
+        # Items analyzed in an earlier run with the same model and prompt reuse that verdict
+        if self.verdicts is not None:
+            items, cached = self.verdicts.partition(items, self._item_key)
+            for original, verdict in cached:
+                if verdict['accepted']:
+                    yield self._build_lead(original, verdict['fields'])
 
-        Review the following news items and identify ONLY valid funding events.
+        # Items analyzed before this run was interrupted are not sent again
+        items, analyzed = self.checkpoint.partition_analyzed(items, self._item_key)
+        yield from analyzed
 
-        VALID Funding Signals:
-        - Series A, B, C, D funding rounds
-        - Seed funding or Venture Capital investment
-        - Private Equity investment (growth equity, not buyouts)
-        - The company receiving funds MUST be headquartered in Dallas/Fort Worth/DFW Metroplex
+        if self.planner is not None:
+            batches = self.planner.plan(items, self._item_text)
+        else:
+            batches = [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+        # Batches run concurrently within the LLM budgets; results come back in batch order
+        # Failures are counted here, on the consuming thread, not in the worker threads
+        for leads, ok in self.llm.map(self._run_batch, enumerate(batches, 1)):
+            if not ok:
+                self._failed_batches += 1
+            yield from leads
 
-        EXCLUDE (Not Valid):
-        - M&A where the company is being ACQUIRED/SOLD (unless explicitly mentions expansion)
-        - Real Estate investment funds or REITs
-        - Stock market news (IPO filings without funding context)
-        - Restaurant/Hospitality businesses (not our target market)
-        - Healthcare/Medical practices (not our target market)
-        - Charitable donations or grants
-        - The investor being from DFW (we want the COMPANY to be in DFW)
+    def _run_batch(self, numbered_batch):
+        number, batch = numbered_batch
+        self.logger.info(f"Processing funding batch {number} ({len(batch)} items)...")
+        with get_metrics().stage(self.source_name, "llm_batch", len(batch)) as llm_stage:
+            leads = self._analyze_batch(batch)
+            llm_stage.items_out = len(leads or [])
+        # (leads, whether the batch was analyzed)
+        return leads or [], leads is not None
 
-        Items to Analyze:
-        {items_text}
+    def _build_lead(self, original, valid_item):
+        """Lead dict for a kept item from the LLM's fields for it."""
+        # Signal Strength: >$10M is Very High
+        amount_str = valid_item.get('funding_amount', '0')
+        signal_strength = "High"
+        if "M" in amount_str or "B" in amount_str:
+             # Basic heuristic: if double digit millions
+             if any(c in amount_str for c in ['1','2','3','4','5','6','7','8','9']):
+                 signal_strength = "Very High"
 
-        Return a JSON OBJECT with a key "leads" containing a list of valid items.
-        Each item in the list should have:
-        - original_index: integer
-        - company_name: string (The company RAISING the money)
-        - funding_amount: string (e.g. "$15M", "Undisclosed")
-        - round_type: string (Series A, Seed, Growth Equity, etc.)
-        - industry: string (e.g. "SaaS", "FinTech", "Professional Services", "Manufacturing")
-        - location: string (Specific city in DFW)
-        - company_website: string (if mentioned, otherwise "Unknown")
-        - reason: string (Brief explanation of why this is a valid lead)
+        # Extract new fields
+        industry = valid_item.get('industry', 'Unknown')
+        company_website = valid_item.get('company_website', 'Unknown')
+        funding_amount = valid_item.get('funding_amount', 'Undisclosed')
+        round_type = valid_item.get('round_type', 'Unknown')
+        reason = valid_item.get('reason', '')
 
-        If no items are relevant, return {{"leads": []}}
+        # Build rich details string
+        details = f"Raised {funding_amount} ({round_type}). Industry: {industry}."
+        if company_website and company_website != "Unknown":
+            details += f" Website: {company_website}."
+        details += f" AI: {reason}"
+
+        return {
+            "discovery_date": datetime.now().strftime("%Y-%m-%d"),
+            "company_name": valid_item.get('company_name', 'Unknown'),
+            "domain": company_website if company_website != "Unknown" else "",
+            "discovery_source": f"funding_{original['source_type']}",
+            "signal_type": "funding_round",
+            "signal_strength": signal_strength,
+            "signal_date": original['published'],
+            "details": details,
+            # Fall back to the places the location filter matched before the generic metro label
+            "location": valid_item.get('location') or format_places(original.get('places')) or f"{self.metro.short_name} Area",
+            "timeline": "Immediate (Hiring)",
+            "source_url": original['link'],
+            "county": self.metro.funding_county_label,
+            "all_signals": "funding_news",
+            "notes": f"Headline: {original['title']}\nSummary: {original['summary']}"
+        }
+
+    def _record_verdicts(self, batch_items, valid_items, rejected, complete):
         """
+        Store verdicts for the kept items, and for the explicit rejections if the response
+        was complete. Items the LLM left out (same-event duplicates, or items cut off by a
+        truncated response) get no verdict and are analyzed again next run.
+        """
+        if self.verdicts is None:
+            return
+        fields = {}
+        for valid_item in valid_items:
+            fields.setdefault(valid_item.get('original_index'), valid_item)
+        rejected = {idx for idx in rejected if isinstance(idx, int)} - set(fields) if complete else set()
+        self.verdicts.record([
+            (self._item_key(item), idx in fields, None, fields.get(idx))
+            for idx, item in enumerate(batch_items) if idx in fields or idx in rejected
+        ])
+
+    def _item_text(self, item):
+        return f"Title: {item['title']}\nSummary: {item['summary']}\nLink: {item['link']}"
+
+    def _analyze_batch(self, batch_items):
+        """Leads found in one batch, or None if the LLM call failed."""
+        items_text = ""
+        for idx, item in enumerate(batch_items):
+            items_text += f"ITEM {idx}:\n{self._item_text(item)}\n\n"
+            
+        prompt = ANALYSIS_PROMPT.format(display_name=self.metro.display_name, short_name=self.metro.short_name, items_text=items_text)
         
         try:
-            response = self.client.chat.completions.create(
+            expected_completion = self.planner.expected_completion_tokens(batch_items) if self.planner is not None else None
+            response = self.llm.complete(
+                self.client,
+                expected_completion_tokens=expected_completion,
                 model=self.model_name,
                 messages=[
-                    {"role": "system", "content": "You extract funding data. Return valid JSON only."},
+                    {"role": "system", "content": ANALYSIS_SYSTEM_PROMPT},
                     {"role": "user", "content": prompt}
                 ],
                 response_format={"type": "json_object"},
                 temperature=0
             )
             
+            if self.planner is not None:
+                truncated = response.choices[0].finish_reason == "length"
+                self.planner.record(len(ANALYSIS_SYSTEM_PROMPT) + len(prompt), len(batch_items), response.usage, truncated)
+
+            # A response cut off at the token limit may have left out items it would have kept
+            complete = response.choices[0].finish_reason == "stop"
             result = json.loads(response.choices[0].message.content)
             valid_indices_list = result.get('leads', [])
             
             leads = []
+            item_leads = {}
             for valid_item in valid_indices_list:
                 idx = valid_item.get('original_index')
                 if idx is not None and 0 <= idx < len(batch_items):
                     original = batch_items[idx]
                     
-                    # Signal Strength: >$10M is Very High
-                    amount_str = valid_item.get('funding_amount', '0')
-                    signal_strength = "High"
-                    if "M" in amount_str or "B" in amount_str:
-                         # Basic heuristic: if double digit millions
-                         if any(c in amount_str for c in ['1','2','3','4','5','6','7','8','9']):
-                             signal_strength = "Very High"
-
-                    # Extract new fields
-                    industry = valid_item.get('industry', 'Unknown')
-                    company_website = valid_item.get('company_website', 'Unknown')
-                    funding_amount = valid_item.get('funding_amount', 'Undisclosed')
-                    round_type = valid_item.get('round_type', 'Unknown')
-                    reason = valid_item.get('reason', '')
-
-                    # Build rich details string
-                    details = f"Raised {funding_amount} ({round_type}). Industry: {industry}."
-                    if company_website and company_website != "Unknown":
-                        details += f" Website: {company_website}."
-                    details += f" AI: {reason}"
-
-                    lead = {
-                        "discovery_date": datetime.now().strftime("%Y-%m-%d"),
-                        "company_name": valid_item.get('company_name', 'Unknown'),
-                        "domain": company_website if company_website != "Unknown" else "",
-                        "discovery_source": f"funding_{original['source_type']}",
-                        "signal_type": "funding_round",
-                        "signal_strength": signal_strength,
-                        "signal_date": original['published'],
-                        "details": details,
-                        "location": valid_item.get('location', "DFW Area"),
-                        "timeline": "Immediate (Hiring)",
-                        "source_url": original['link'],
-                        "county": "Dallas/Collin",
-                        "all_signals": "funding_news",
-                        "notes": f"Headline: {original['title']}\nSummary: {original['summary']}"
-                    }
+                    lead = self._build_lead(original, valid_item)
                     leads.append(lead)
+                    item_leads.setdefault(idx, []).append(lead)
                     self.logger.info(f"[FUNDING] {lead['company_name']} - {lead['details']}")
 
+            self._record_verdicts(batch_items, valid_indices_list, result.get('rejected') or [], complete)
+            # An incomplete response only settles the items it returned
+            self.checkpoint.save_analyzed(
+                [(item, item_leads.get(idx, [])) for idx, item in enumerate(batch_items) if complete or idx in item_leads],
+                self._item_key
+            )
             return leads
 
         except Exception as e:
             self.logger.error(f"Batch AI Analysis Failed: {e}")
-            return []
+            get_metrics().record_error(self.source_name, "llm_batch")
+            return None
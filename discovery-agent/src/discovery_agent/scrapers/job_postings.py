@@ -1,112 +1,20 @@
-import requests
-import time
-import random
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import logging
-import yaml
-import os
 import json
-from openai import OpenAI, AzureOpenAI
-
-class JobPostingScraper:
-    def __init__(self):
-        self.logger = logging.getLogger(__name__)
-        self.config = self._load_config()
-        self.rapidapi_key = self.config['api_keys'].get('rapidapi_key', '')
-        self.base_url = "https://jsearch.p.rapidapi.com/search"
-
-        self.target_titles = self.config['job_posting']['target_titles']
-        self.location = "Dallas, TX"
-
-        # AI Setup
-        self.openai_key = self.config['api_keys'].get('openai_api_key', '')
-        self.azure_endpoint = self.config['api_keys'].get('azure_openai_endpoint', '')
-        self.azure_deployment = self.config['api_keys'].get('azure_deployment_name', 'gpt-4o-mini')
-        self.azure_version = self.config['api_keys'].get('azure_api_version', '2024-02-15-preview')
-
-        self.client = None
-
-        if self.openai_key and "YOUR_" not in self.openai_key:
-            if self.azure_endpoint and "YOUR_" not in self.azure_endpoint:
-                # Use Azure OpenAI
-                self.logger.info("Initializing Azure OpenAI Client for Job Analysis...")
-                self.client = AzureOpenAI(
-                    api_key=self.openai_key,
-                    api_version=self.azure_version,
-                    azure_endpoint=self.azure_endpoint
-                )
-                self.model_name = self.azure_deployment
-            else:
-                # Use Standard OpenAI
-                self.client = OpenAI(api_key=self.openai_key)
-                self.model_name = "gpt-4o-mini"
-        else:
-            self.logger.warning("OpenAI API Key not found. AI filtering disabled.")
-
-    def _load_config(self):
-        # Load config from yaml
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        # Go up to 'discovery-agent' folder
-        # src/discovery_agent/scrapers -> src/discovery_agent -> src -> discovery-agent
-        root_dir = os.path.dirname(os.path.dirname(os.path.dirname(current_dir)))
-        config_path = os.path.join(root_dir, 'config', 'config.yaml')
-
-        if not os.path.exists(config_path):
-            # Try one level higher just in case
-             root_dir = os.path.dirname(root_dir)
-             config_path = os.path.join(root_dir, 'config', 'config.yaml')
-
-        if not os.path.exists(config_path):
-            # Try CWD fallback
-            config_path = "config/config.yaml"
-
-        if not os.path.exists(config_path):
-             raise FileNotFoundError(f"Config file not found.")
-
-        with open(config_path, 'r') as f:
-            return yaml.safe_load(f)
-
-    def run(self):
-        self.logger.info("Running Job Posting Scraper via JSearch (RapidAPI)...")
-        raw_leads = []
-
-        if not self.rapidapi_key or self.rapidapi_key == "YOUR_RAPIDAPI_KEY":
-            self.logger.error("RapidAPI key not configured in config.yaml")
-            return []
-
-        for title in self.target_titles:
-            self.logger.info(f"Searching for title: {title}")
-            leads = self.search_jsearch(title)
-            raw_leads.extend(leads)
-            # Be polite
-            time.sleep(2)
-
-        self.logger.info(f"Collected {len(raw_leads)} raw job leads. Starting AI analysis...")
-
-        # Run AI Analysis
-        final_leads = self._process_batches(raw_leads)
-        return final_leads
-
-    def _process_batches(self, leads, batch_size=10):
-        if not self.client:
-            return leads # Return raw if no AI
-
-        final_leads = []
-        for i in range(0, len(leads), batch_size):
-            batch = leads[i:i + batch_size]
-            self.logger.info(f"Processing job batch {i//batch_size + 1} ({len(batch)} items)...")
-            analyzed_leads = self._analyze_batch(batch)
-            final_leads.extend(analyzed_leads)
-
-        return final_leads
-
-    def _analyze_batch(self, batch_leads):
-        items_text = ""
-        for idx, lead in enumerate(batch_leads):
-            desc = lead.get('full_description', '')[:1000] # Limit to 1000 chars to save tokens
-            items_text += f"ITEM {idx}:\nTitle: {lead['headline']}\nCompany: {lead['company_name']}\nDescription: {desc}\n\n"
-
-        prompt = f"""
+from discovery_agent.utils.config import load_config
+from discovery_agent.utils.run_state import NullCheckpoint
+from discovery_agent.utils.metros import default_metro
+from discovery_agent.utils.metrics import get_metrics
+from discovery_agent.utils.llm_client import create_llm_client
+from discovery_agent.utils.llm_executor import get_llm_executor
+from discovery_agent.utils.batch_planner import BatchPlanner
+from discovery_agent.utils.http_client import get_http_client
+from discovery_agent.utils.known_urls import KnownUrls
+from discovery_agent.utils.verdict_store import VerdictStore, content_key, prompt_version
+
+ANALYSIS_SYSTEM_PROMPT = "You analyze job roles for procurement authority. Return valid JSON."
+ANALYSIS_PROMPT = """
         You are an Expert in Commercial Office Procurement and Facilities Management.
         Analyze job postings to identify roles that have AUTHORITY or INFLUENCE over buying OFFICE FURNITURE or managing OFFICE MOVES/BUILD-OUTS.
 
@@ -143,43 +51,183 @@ class JobPostingScraper:
         - reasoning: Brief explanation of why this role does or doesn't buy furniture
 
         """
+# Hash of the prompt templates: stored verdicts only count for the same version
+PROMPT_VERSION = prompt_version(ANALYSIS_SYSTEM_PROMPT, ANALYSIS_PROMPT)
+
+# JSearch returns (at most) 10 postings per page; a shorter page is the last one
+JSEARCH_PAGE_SIZE = 10
+
+class JobPostingScraper:
+    source_name = "jobs"
+
+    def __init__(self, metro=None, checkpoint=None, db_writer=None):
+        self.logger = logging.getLogger(__name__)
+        self.config = load_config()
+        # Metro to search (JSearch location)
+        self.metro = metro or default_metro(self.config)
+        # Stage checkpoints for resumable runs (no-op unless a run-state store is used)
+        self.checkpoint = checkpoint or NullCheckpoint()
+        # The pipeline's leads database, read for known URLs (None in Excel-only mode)
+        self.db_writer = db_writer
+        self.rapidapi_key = self.config['api_keys'].get('rapidapi_key', '')
+        self.base_url = "https://jsearch.p.rapidapi.com/search"
+
+        job_settings = self.config['job_posting']
+        self.target_titles = job_settings['target_titles']
+        # Paginated harvesting: pages per title, and how many pages are requested at once
+        self.max_pages = max(1, int(job_settings.get('max_pages', 3)))
+        self.page_concurrency = max(1, int(job_settings.get('page_concurrency', 2)))
+        self.page_size = JSEARCH_PAGE_SIZE
+        self.location = self.metro.location
+        self.http = get_http_client(self.config)
+        # Lead URLs and stored LLM verdicts, loaded at the start of every run
+        self.known_urls = None
+        self.verdicts = None
+
+        # AI Setup
+        self.client, self.model_name = create_llm_client(self.config.get('api_keys'), "Job Analysis")
+        # Shared concurrency and RPM/TPM budgets for every chat completion
+        self.llm = get_llm_executor(self.config)
+        # Batch sizes from token budgets and measured usage (None if disabled: fixed batch_size)
+        self.planner = None
+        if self.client:
+            prompt_overhead = len(ANALYSIS_SYSTEM_PROMPT) + len(ANALYSIS_PROMPT)
+            self.planner = BatchPlanner.from_config(self.config, self.source_name, self.model_name, prompt_overhead)
+
+    def run(self):
+        return list(self.stream())
+
+    def stream(self):
+        """Yield analyzed job leads batch by batch as they become available."""
+        self.logger.info(f"Running Job Posting Scraper via JSearch (RapidAPI) for {self.location}...")
+
+        if not self.rapidapi_key or self.rapidapi_key == "YOUR_RAPIDAPI_KEY":
+            self.logger.error("RapidAPI key not configured in config.yaml")
+            return
+
+        self.known_urls = KnownUrls.load(self.config, self.source_name, self.db_writer)
+        if self.client:
+            self.verdicts = VerdictStore.from_config(self.config, f"{self.source_name}:{self.metro.name}", self.model_name, PROMPT_VERSION)
+        raw_leads = self.checkpoint.load_or_run("fetched", self._search_all_titles)
+        # Postings that are already leads never reach the LLM again
+        if self.known_urls is not None:
+            raw_leads = self.known_urls.filter(raw_leads, 'source_url')
+
+        self.logger.info(f"Collected {len(raw_leads)} raw job leads. Starting AI analysis...")
+
+        # Run AI Analysis
+        yield from self._process_batches(raw_leads)
+
+    def _search_all_titles(self):
+        raw_leads = []
+        # Job ids / apply links seen so far, so a posting listed under several titles is analyzed once
+        seen = set()
+        for title in self.target_titles:
+            self.logger.info(f"Searching for title: {title}")
+            # Pacing comes from the RapidAPI/JSearch token buckets in the HTTP client
+            leads = self.search_jsearch(title, seen)
+            raw_leads.extend(leads)
+        return raw_leads
+
+    def _process_batches(self, leads, batch_size=10):
+        if not self.client:
+            yield from leads # Return raw if no AI
+            return
+
+        # Postings analyzed in an earlier run with the same model and prompt reuse that verdict
+        if self.verdicts is not None:
+            leads, cached = self.verdicts.partition(leads, self._item_key)
+            for lead, verdict in cached:
+                if verdict['accepted']:
+                    yield self._apply_analysis(lead, verdict['fields'])
+
+        # Postings analyzed before this run was interrupted are not sent again
+        leads, analyzed = self.checkpoint.partition_analyzed(leads, self._item_key)
+        yield from analyzed
+
+        if self.planner is not None:
+            batches = self.planner.plan(leads, self._item_text)
+        else:
+            batches = [leads[i:i + batch_size] for i in range(0, len(leads), batch_size)]
+        # Batches run concurrently within the LLM budgets; results come back in batch order
+        for analyzed_leads in self.llm.map(self._run_batch, enumerate(batches, 1)):
+            yield from analyzed_leads
+
+    def _run_batch(self, numbered_batch):
+        number, batch = numbered_batch
+        self.logger.info(f"Processing job batch {number} ({len(batch)} items)...")
+        with get_metrics().stage(self.source_name, "llm_batch", len(batch)) as llm_stage:
+            analyzed_leads = self._analyze_batch(batch)
+            llm_stage.items_out = len(analyzed_leads)
+        return analyzed_leads
+
+    def _item_key(self, lead):
+        return lead.get('job_id') or lead.get('source_url') or content_key(
+            lead.get('headline'), lead.get('company_name'), lead.get('full_description')
+        )
+
+    def _apply_analysis(self, lead, analysis):
+        """Copy the LLM's analysis of a posting onto its lead and return the lead."""
+        lead['confidence'] = analysis.get('confidence', 50)
+        lead['reasoning'] = analysis.get('reasoning', 'AI Analysis Failed')
+        lead['signal_strength'] = analysis.get('signal_strength', 'Medium')
+        lead['industry'] = analysis.get('industry', 'Unknown')
+        lead['role_level'] = analysis.get('role_level', 'Unknown')
+
+        # Build rich details string
+        industry = lead['industry']
+        role_level = lead['role_level']
+        reasoning = lead['reasoning']
+        headline = lead.get('headline', 'Unknown Role')
+
+        details_parts = [f"Role: {headline}"]
+        details_parts.append(f"Level: {role_level}")
+        details_parts.append(f"Industry: {industry}")
+        details_parts.append(f"AI: {reasoning}")
+        lead['details'] = ". ".join(details_parts)
+        return lead
+
+    def _item_text(self, lead):
+        desc = lead.get('full_description', '')[:1000] # Limit to 1000 chars to save tokens
+        return f"Title: {lead['headline']}\nCompany: {lead['company_name']}\nDescription: {desc}"
+
+    def _analyze_batch(self, batch_leads):
+        items_text = ""
+        for idx, lead in enumerate(batch_leads):
+            items_text += f"ITEM {idx}:\n{self._item_text(lead)}\n\n"
+
+        prompt = ANALYSIS_PROMPT.format(items_text=items_text)
 
         try:
-            response = self.client.chat.completions.create(
+            expected_completion = self.planner.expected_completion_tokens(batch_leads) if self.planner is not None else None
+            response = self.llm.complete(
+                self.client,
+                expected_completion_tokens=expected_completion,
                 model=self.model_name,
                 messages=[
-                    {"role": "system", "content": "You analyze job roles for procurement authority. Return valid JSON."},
+                    {"role": "system", "content": ANALYSIS_SYSTEM_PROMPT},
                     {"role": "user", "content": prompt}
                 ],
                 response_format={"type": "json_object"},
                 temperature=0
             )
 
+            if self.planner is not None:
+                truncated = response.choices[0].finish_reason == "length"
+                self.planner.record(len(ANALYSIS_SYSTEM_PROMPT) + len(prompt), len(batch_leads), response.usage, truncated)
+
             result = json.loads(response.choices[0].message.content)
             analyses = result.get('analyses', [])
 
             # Map results back to leads
+            verdicts = []
+            analyzed = set()
             for analysis in analyses:
                 idx = analysis.get('original_index')
                 if idx is not None and 0 <= idx < len(batch_leads):
-                    lead = batch_leads[idx]
-                    lead['confidence'] = analysis.get('confidence', 50)
-                    lead['reasoning'] = analysis.get('reasoning', 'AI Analysis Failed')
-                    lead['signal_strength'] = analysis.get('signal_strength', 'Medium')
-                    lead['industry'] = analysis.get('industry', 'Unknown')
-                    lead['role_level'] = analysis.get('role_level', 'Unknown')
-
-                    # Build rich details string
-                    industry = lead['industry']
-                    role_level = lead['role_level']
-                    reasoning = lead['reasoning']
-                    headline = lead.get('headline', 'Unknown Role')
-
-                    details_parts = [f"Role: {headline}"]
-                    details_parts.append(f"Level: {role_level}")
-                    details_parts.append(f"Industry: {industry}")
-                    details_parts.append(f"AI: {reasoning}")
-                    lead['details'] = ". ".join(details_parts)
+                    analyzed.add(idx)
+                    lead = self._apply_analysis(batch_leads[idx], analysis)
+                    verdicts.append((self._item_key(lead), lead['confidence'] >= 50, lead['confidence'], analysis))
 
             # Filter and Return (Threshold: 50)
             valid_leads = []
@@ -193,20 +241,79 @@ class JobPostingScraper:
                 else:
                     self.logger.info(f"[REJECTED] {lead['headline']} | Conf: {lead['confidence']} | Industry: {lead.get('industry', 'Unknown')}")
 
+            # Postings the LLM skipped keep their defaults and get no verdict or checkpoint (analyzed again)
+            if self.verdicts is not None:
+                self.verdicts.record(verdicts)
+            self.checkpoint.save_analyzed(
+                [(lead, [lead] if lead.get('confidence', 0) >= 50 else []) for idx, lead in enumerate(batch_leads) if idx in analyzed],
+                self._item_key
+            )
             return valid_leads
 
         except Exception as e:
             self.logger.error(f"Batch AI Analysis Failed: {e}")
+            get_metrics().record_error(self.source_name, "llm_batch")
             return batch_leads # Return original if AI fails
 
-    def search_jsearch(self, job_title):
+    def search_jsearch(self, job_title, seen=None):
+        """
+        Fetch up to max_pages result pages for job_title, several pages at a time.
+        Postings whose job id / apply link is already in seen are dropped, and paging
+        stops at a short page or a page that holds only already-known postings.
+        """
+        seen = set() if seen is None else seen
         leads = []
+        metrics = get_metrics()
+        page = 1
+        done = False
+
+        while not done and page <= self.max_pages:
+            pages = list(range(page, min(page + self.page_concurrency, self.max_pages + 1)))
+            page += len(pages)
+            with ThreadPoolExecutor(max_workers=len(pages), thread_name_prefix="jsearch") as executor:
+                results = list(executor.map(lambda p: self._fetch_jsearch_page(job_title, p), pages))
+
+            # Handle pages in order so the stop decision matches a sequential walk
+            for items in results:
+                if not items:
+                    done = True
+                    break
+
+                new_items = []
+                for item in items:
+                    key = self._job_key(item)
+                    if key and key in seen:
+                        continue
+                    if key:
+                        seen.add(key)
+                    new_items.append(item)
+
+                duplicates = len(items) - len(new_items)
+                if duplicates:
+                    metrics.record(self.source_name, "jsearch_dedup", 0, items_in=len(items), items_out=len(new_items))
+
+                with metrics.stage(self.source_name, "jsearch_parse", len(new_items)) as parse_stage:
+                    for item in new_items:
+                        lead = self._parse_jsearch_result(item)
+                        if lead:
+                            leads.append(lead)
+                            parse_stage.items_out += 1
+                        else:
+                            parse_stage.errors += 1
+
+                if len(items) < self.page_size or not new_items:
+                    done = True
+                    break
+
+        if not leads:
+            self.logger.info(f"No new results found for {job_title}")
+        return leads
 
-        query = f"{job_title} in {self.location}"
-
+    def _fetch_jsearch_page(self, job_title, page):
+        """Return the raw postings on one JSearch result page ([] on error or no data)."""
         querystring = {
-            "query": query,
-            "page": "1",
+            "query": f"{job_title} in {self.location}",
+            "page": str(page),
             "num_pages": "1",
             "date_posted": "month" # Get fresh jobs from last month
         }
@@ -217,27 +324,25 @@ class JobPostingScraper:
         }
 
         try:
-            response = requests.get(self.base_url, headers=headers, params=querystring)
+            with get_metrics().stage(self.source_name, "jsearch_fetch") as fetch_stage:
+                response = self.http.get(self.base_url, params=querystring, headers=headers, rate_key="rapidapi")
+                if response.status_code != 200:
+                    fetch_stage.errors += 1
+                    self.logger.error(f"JSearch API Error: {response.status_code} - {response.text}")
+                    return []
 
-            if response.status_code != 200:
-                self.logger.error(f"JSearch API Error: {response.status_code} - {response.text}")
-                return []
-
-            data = response.json()
-
-            if 'data' not in data:
-                self.logger.info(f"No results found for {job_title}")
-                return []
-
-            for item in data['data']:
-                lead = self._parse_jsearch_result(item)
-                if lead:
-                    leads.append(lead)
+                items = response.json().get('data') or []
+                fetch_stage.items_out = len(items)
+                return items
 
         except Exception as e:
-            self.logger.error(f"Error searching JSearch for {job_title}: {e}")
+            self.logger.error(f"Error searching JSearch for {job_title} (page {page}): {e}")
+            return []
 
-        return leads
+    @staticmethod
+    def _job_key(item):
+        # The same posting comes back under several titles; job_id is stable, the apply link is the fallback
+        return item.get('job_id') or item.get('job_apply_link') or None
 
     def _parse_jsearch_result(self, item):
         try:
@@ -277,6 +382,7 @@ class JobPostingScraper:
                 "signal_strength": signal_strength,
                 "confidence": 80,
                 "signal_date": posted_date,
+                "job_id": item.get('job_id', ''),
                 "headline": job_title,
                 "summary": f"Hiring for {job_title} in {location}",
                 "reasoning": f"Job posting for {job_title} indicates potential facilities needs.",
@@ -1,63 +1,123 @@
+import csv
 import feedparser
 import urllib.parse
 from datetime import datetime
 import logging
-import yaml
 import os
-import re
 import time
 import json
-from openai import OpenAI, AzureOpenAI
-from bs4 import BeautifulSoup
 from discovery_agent.utils.deduplication import Deduplication
+from discovery_agent.utils.config import load_config
+from discovery_agent.utils.run_state import NullCheckpoint
+from discovery_agent.utils.metros import Metro, default_metro
+from discovery_agent.utils.metrics import get_metrics
+from discovery_agent.utils.llm_client import create_llm_client
+from discovery_agent.utils.llm_executor import get_llm_executor
+from discovery_agent.utils.batch_planner import BatchPlanner
+from discovery_agent.utils.http_client import get_http_client
+from discovery_agent.utils.feed_fetcher import AsyncFeedFetcher
+from discovery_agent.utils.feed_watermarks import FeedWatermarks
+from discovery_agent.utils.html_text import clean_html_summary
+from discovery_agent.utils.location_matcher import format_places
+from discovery_agent.utils.known_urls import KnownUrls
+from discovery_agent.utils.title_history import TitleHistory
+from discovery_agent.utils.verdict_store import VerdictStore, content_key, prompt_version
+
+ANALYSIS_SYSTEM_PROMPT = "You extract lead data. Return valid JSON only."
+ANALYSIS_PROMPT = """
+        You are an Expert Lead Analyst for the {display_name} Commercial Real Estate market.
+        You are identifying companies that will need OFFICE FURNITURE due to moves, expansions, or office changes.
+
+        Review the following news items and identify ONLY valid commercial office signals.
+
+        VALID Signals (These companies will likely need furniture):
+        1. Signing a new OFFICE lease (or renewing/expanding existing lease)
+        2. Relocating headquarters or opening a new regional office
+        3. Breaking ground on or completing a new corporate campus/office building
+        4. Mandating "Return to Office" (RTO) for employees (especially 4-5 days/week)
+        5. Major office renovation or build-out
+
+        IMPORTANT - EXCLUDE These (Not Valid Leads):
+        - Residential/Apartment/Multi-family news (CRITICAL - these are NOT office)
+        - Retail/Restaurant leases (not office furniture buyers)
+        - Industrial/Warehouse leases (not office furniture buyers)
+        - Real estate brokerages or landlords as the "company" (they broker deals, they don't buy furniture)
+        - General market reports without a specific TENANT/COMPANY name
+        - "Top Brokers" lists, awards, or opinion pieces
+        - News about a building being SOLD (unless a new tenant is named)
+
+        DEDUPLICATION:
+        - If multiple items refer to the SAME event/company, return ONLY ONE lead (the most detailed one)
+
+        Items to Analyze:
+        {items_text}
+
+        Return a JSON OBJECT with a key "leads" containing a list of valid items.
+        Each item in the list should have:
+        - original_index: integer (The ITEM number from input)
+        - company_name: string (The TENANT/COMPANY moving - NOT the landlord or broker)
+        - signal_type: string (lease | relocation | expansion | construction | rto | renovation)
+        - sq_ft: integer (0 if unknown)
+        - location: string (Specific City/Area in {short_name})
+        - timeline: string (e.g. "Q1 2025", "Summer 2025", "Immediate", "Unknown")
+        - industry: string (e.g. "Technology", "Financial Services", "Law Firm", "Professional Services")
+        - reason: string (Brief explanation of why this company needs furniture)
+
+        Also return a key "rejected" listing the original_index of every item that is NOT valid.
+        Do not list items you left out only because another item covers the same event.
+
+        If no items are relevant, return {{"leads": [], "rejected": [<every original_index>]}}
+"""
+# Hash of the prompt templates: stored verdicts only count for the same version
+PROMPT_VERSION = prompt_version(ANALYSIS_SYSTEM_PROMPT, ANALYSIS_PROMPT)
 
 class RealEstateDiscovery:
-    def __init__(self):
+    source_name = "realestate"
+
+    def __init__(self, metro=None, checkpoint=None, db_writer=None):
         self.logger = logging.getLogger(__name__)
-        self.config = self._load_config()
+        self.config = load_config()
+        # Metro to search (queries, location filter, regional feeds)
+        self.metro = metro or default_metro(self.config)
+        # Stage checkpoints for resumable runs (no-op unless a run-state store is used)
+        self.checkpoint = checkpoint or NullCheckpoint()
+        # The pipeline's leads database, read for known URLs (None in Excel-only mode)
+        self.db_writer = db_writer
         
+        self.http = get_http_client(self.config)
+        self.feed_fetcher = AsyncFeedFetcher.from_config(self.config, self.http)
+        # Per-feed watermarks so each run only processes new articles (None if disabled)
+        self.watermarks = FeedWatermarks.from_config(self.config, f"{self.source_name}:{self.metro.name}")
+        # Lead URLs and stored LLM verdicts, loaded at the start of every run
+        self.known_urls = None
+        self.verdicts = None
+        # Titles analyzed in earlier runs, to skip syndicated repeats (None if disabled)
+        self.title_history = TitleHistory.load(self.config, f"{self.source_name}:{self.metro.name}")
+
         # AI Setup
-        self.openai_key = self.config['api_keys'].get('openai_api_key', '')
-        self.azure_endpoint = self.config['api_keys'].get('azure_openai_endpoint', '')
-        self.azure_deployment = self.config['api_keys'].get('azure_deployment_name', 'gpt-4o-mini')
-        self.azure_version = self.config['api_keys'].get('azure_api_version', '2024-02-15-preview')
-        
-        self.client = None
-        
-        if self.openai_key and "YOUR_" not in self.openai_key:
-            if self.azure_endpoint and "YOUR_" not in self.azure_endpoint:
-                # Use Azure OpenAI
-                self.logger.info("Initializing Azure OpenAI Client...")
-                self.client = AzureOpenAI(
-                    api_key=self.openai_key,
-                    api_version=self.azure_version,
-                    azure_endpoint=self.azure_endpoint
-                )
-                self.model_name = self.azure_deployment
-            else:
-                # Use Standard OpenAI
-                self.client = OpenAI(api_key=self.openai_key)
-                self.model_name = "gpt-4o-mini"
-        else:
-            self.logger.warning("OpenAI API Key not found. AI filtering disabled.")
+        self.client, self.model_name = create_llm_client(self.config.get('api_keys'))
+        # Shared concurrency and RPM/TPM budgets for every chat completion
+        self.llm = get_llm_executor(self.config)
+        # Batch sizes from token budgets and measured usage (None if disabled: fixed batch_size)
+        self.planner = None
+        # LLM batches that failed in the current run (their items are retried next run)
+        self._failed_batches = 0
+        if self.client:
+            prompt_overhead = len(ANALYSIS_SYSTEM_PROMPT) + len(ANALYSIS_PROMPT)
+            self.planner = BatchPlanner.from_config(self.config, self.source_name, self.model_name, prompt_overhead)
 
         # RSS Feeds
         self.base_google_news_url = "https://news.google.com/rss/search?q={}&hl=en-US&gl=US&ceid=US:en"
         
-        self.direct_feeds = [
-            "https://rss.bizjournals.com/feed/225b05c17d74d990c84b5a662dbead1d328d16cf/14001?market=dallas&selectortype=channel&selectorvalue=1,2,3,4,5,9,7,15",
-            "https://www.bisnow.com/rss/dallas-ft-worth",
-            "https://fortworthbusiness.com/feed/",
-            "https://dallasinnovates.com/feed/"
-        ]
+        self.direct_feeds = self.metro.realestate_feeds
         
         # Advanced Google News Queries
         # Core cities for most queries
-        core_cities = "Dallas OR Plano OR Frisco OR Irving"
+        core_cities = Metro.or_clause(self.metro.core_cities)
         # Extended cities for some queries
-        extended_cities = "Dallas OR \"Fort Worth\" OR Plano OR Frisco OR Irving OR Southlake OR Allen"
+        extended_cities = Metro.or_clause(self.metro.extended_cities)
         # Regional catch-all
-        regional = "DFW OR \"Dallas-Fort Worth\""
+        regional = Metro.or_clause(self.metro.regional_terms)
 
         self.google_queries = [
             # 1. Leases with SqFt requirement (Filters out residential)
@@ -67,7 +127,7 @@ class RealEstateDiscovery:
             f'("headquarters" OR "corporate headquarters") (moving OR relocating) ({regional} OR {core_cities}) -personal',
             
             # 3. New Offices with employee context
-            f'("new office" OR "opening office") ({core_cities} OR Southlake OR Allen) (company OR firm) employees',
+            f'("new office" OR "opening office") ({Metro.or_clause(self.metro.new_office_cities)}) (company OR firm) employees',
             
             # 4. Expansions with hiring context
             f'("office expansion" OR "expanding operations") ({regional} OR {extended_cities}) (employees OR hiring)',
@@ -83,40 +143,60 @@ class RealEstateDiscovery:
         ]
         
         # Strict Client-Side Location Filter
-        self.target_locations = [
-            "dallas", "fort worth", "dfw", "metroplex", "arlington", "plano", "garland", 
-            "irving", "mckinney", "frisco", "grand prairie", "mesquite", "denton", 
-            "richardson", "lewisville", "addison", "allen", "southlake", "grapevine", 
-            "coppell", "rockwall", "carrollton", "farmers branch", "the colony", 
-            "flower mound", "keller", "burleson", "mansfield", "north richland hills", 
-            "euless", "bedford", "hurst", "lancaster", "desoto", "cedar hill", 
-            "las colinas", "legacy west", "uptown", "deep ellum", "bishop arts"
-        ]
+        self.target_locations = self.metro.target_locations
+        self.location_matcher = self.metro.location_matcher
 
-    def _load_config(self):
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        root_dir = os.path.dirname(os.path.dirname(os.path.dirname(current_dir)))
-        config_path = os.path.join(root_dir, 'config', 'config.yaml')
-        
-        if not os.path.exists(config_path):
-             root_dir = os.path.dirname(root_dir)
-             config_path = os.path.join(root_dir, 'config', 'config.yaml')
-             
-        if not os.path.exists(config_path):
-            config_path = "config/config.yaml"
-            
-        with open(config_path, 'r') as f:
-            return yaml.safe_load(f)
-            
     def _is_location_relevant(self, text):
-        """Check if text contains any of the target DFW locations."""
-        text_lower = text.lower()
-        return any(loc in text_lower for loc in self.target_locations)
+        """Check if text mentions any of the metro's target locations."""
+        return self.location_matcher.is_relevant(text)
 
     def run(self):
-        self.logger.info("Running Real Estate Signal Discovery (RSS + Batch AI)...")
-        
-        raw_items = []
+        return list(self.stream())
+
+    def stream(self):
+        """Yield analyzed leads batch by batch as they become available."""
+        self.logger.info(f"Running Real Estate Signal Discovery ({self.metro.name}, RSS + Batch AI)...")
+
+        self._failed_batches = 0
+        self.known_urls = KnownUrls.load(self.config, self.source_name, self.db_writer)
+        if self.client:
+            self.verdicts = VerdictStore.from_config(self.config, f"{self.source_name}:{self.metro.name}", self.model_name, PROMPT_VERSION)
+        if self.watermarks is not None:
+            self.watermarks.reset()
+
+        raw_items = self.checkpoint.load_or_run("fetched", self._fetch_all_items)
+        # Checkpointed with the items, so a resumed run still commits them at the end
+        feed_marks = self.checkpoint.load_or_run("feed_marks", self._pending_feed_marks)
+        final_unique_list = self.checkpoint.load_or_run("deduped", lambda: self._deduplicate_items(self._drop_seen_titles(self._drop_known_urls(raw_items))))
+
+        # 3. Batch AI Analysis
+        self.logger.info("Starting AI analysis...")
+        yield from self._process_batches(final_unique_list)
+
+        # Every new entry has been analyzed: advance the feed watermarks (otherwise retry them next run)
+        if self.watermarks is not None and self.client and not self._failed_batches:
+            self.watermarks.commit(feed_marks)
+        # Same rule for the title history: a failed batch is retried next run, not skipped as seen
+        if self.title_history is not None and self.client and not self._failed_batches:
+            self.title_history.remember(final_unique_list)
+
+    def _pending_feed_marks(self):
+        return self.watermarks.pending() if self.watermarks is not None else {}
+
+    def _drop_known_urls(self, items):
+        # Already leads: don't spend LLM tokens on them again
+        return self.known_urls.filter(items, 'link') if self.known_urls is not None else items
+
+    def _drop_seen_titles(self, items):
+        # Same story under another URL in an earlier run (e.g. syndicated days later)
+        return self.title_history.filter(items, 'title') if self.title_history is not None else items
+
+    def _item_key(self, item):
+        return item.get('link') or content_key(item.get('title'), item.get('summary'))
+
+    def _feed_requests(self):
+        """(url, context, source_type) for every Google News query and direct feed."""
+        feeds = []
         
         # 1. Process Google News Feeds (Advanced Queries)
         for idx, query_template in enumerate(self.google_queries):
@@ -125,16 +205,10 @@ class RealEstateDiscovery:
             encoded_query = urllib.parse.quote(query)
             feed_url = self.base_google_news_url.format(encoded_query)
             
-            self.logger.info(f"Fetching RSS for Query #{idx+1}")
-            # Source name: google_news_q1, q2, etc.
-            items = self._fetch_feed_items(feed_url, query_template, f"google_news_q{idx+1}")
-            raw_items.extend(items)
-            time.sleep(1) 
+            feeds.append((feed_url, query_template, f"google_news_q{idx+1}"))
             
         # 2. Process Direct Feeds
         for feed_url in self.direct_feeds:
-            self.logger.info(f"Fetching Direct Feed: {feed_url}")
-            
             # Better Source Naming
             source_name = "direct_unknown"
             if "bizjournals" in feed_url:
@@ -150,33 +224,55 @@ class RealEstateDiscovery:
                 domain = urllib.parse.urlparse(feed_url).netloc.replace("www.", "").split(".")[0]
                 source_name = f"direct_{domain}"
 
-            items = self._fetch_feed_items(feed_url, "Industry News", source_name)
-            raw_items.extend(items)
-            
+            feeds.append((feed_url, "Industry News", source_name))
+
+        return feeds
+
+    def _fetch_all_items(self):
+        feeds = self._feed_requests()
+        self.logger.info(f"Fetching {len(feeds)} RSS feeds concurrently...")
+        metrics = get_metrics()
+        with metrics.stage(self.source_name, "rss_fetch_all", len(feeds)):
+            results = self.feed_fetcher.fetch_all([feed_url for feed_url, _, _ in feeds])
+
+        raw_items = []
+        for (feed_url, context, source_type), result in zip(feeds, results):
+            metrics.record(self.source_name, "feed_fetch", result.elapsed, errors=0 if result.ok else 1)
+            if result.error is not None:
+                self.logger.error(f"Error fetching feed {feed_url}: {result.error}")
+            elif result.response.status_code != 200:
+                self.logger.warning(f"Failed to fetch feed {feed_url}: Status {result.response.status_code}")
+            else:
+                raw_items.extend(self._parse_feed_items(feed_url, result.response, context, source_type))
+        return raw_items
+
+    def _deduplicate_items(self, raw_items):
+        metrics = get_metrics()
+
         # Deduplicate based on Link URL
-        unique_items = {}
-        for item in raw_items:
-            unique_items[item['link']] = item
-            
-        unique_list = list(unique_items.values())
+        with metrics.stage(self.source_name, "dedup_links", len(raw_items)) as stage:
+            unique_items = {}
+            for item in raw_items:
+                unique_items[item['link']] = item
+
+            unique_list = list(unique_items.values())
+            stage.items_out = len(unique_list)
         self.logger.info(f"Collected {len(unique_list)} items (unique links).")
 
         # Deduplicate based on Title Similarity (Fuzzy Match)
-        deduplicator = Deduplication()
-        final_unique_list = deduplicator.deduplicate_raw_items(unique_list)
+        with metrics.stage(self.source_name, "dedup_titles", len(unique_list)) as stage:
+            deduplicator = Deduplication()
+            final_unique_list = deduplicator.deduplicate_raw_items(unique_list)
+            stage.items_out = len(final_unique_list)
         self.logger.info(f"After title deduplication: {len(final_unique_list)} items.")
         
         # DEBUG: Save Raw Items to CSV for Audit
-        self._save_raw_audit_log(final_unique_list)
-        
-        # 3. Batch AI Analysis
-        self.logger.info("Starting AI analysis...")
-        final_leads = self._process_batches(final_unique_list)
-        
-        return final_leads
+        with metrics.stage(self.source_name, "audit_log", len(final_unique_list)):
+            self._save_raw_audit_log(final_unique_list)
+
+        return final_unique_list
 
     def _save_raw_audit_log(self, items):
-        import pandas as pd
         try:
             # Resolve absolute path to data directory
             current_dir = os.path.dirname(os.path.abspath(__file__)) # src/discovery_agent/scrapers
@@ -186,57 +282,65 @@ class RealEstateDiscovery:
             if not os.path.exists(data_dir):
                 os.makedirs(data_dir)
                 
-            df = pd.DataFrame(items)
             # Select useful columns
             cols = ['title', 'source_type', 'published', 'link', 'summary']
-            df = df[cols] if set(cols).issubset(df.columns) else df
-            
             output_path = os.path.join(data_dir, "debug_raw_rss_log.csv")
-            
-            # Append if exists, or create new
-            if os.path.exists(output_path):
-                df.to_csv(output_path, mode='a', header=False, index=False)
-            else:
-                df.to_csv(output_path, index=False)
+
+            # Append if exists, or create new (with a header row)
+            write_header = not os.path.exists(output_path)
+            with open(output_path, 'a', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=cols, extrasaction='ignore')
+                if write_header:
+                    writer.writeheader()
+                writer.writerows(items)
             self.logger.info(f"Saved raw audit log to {output_path}")
         except Exception as e:
             self.logger.warning(f"Failed to save audit log: {e}")
 
-    def _fetch_feed_items(self, feed_url, context, source_type):
-        import requests
+    def _parse_feed_items(self, feed_url, response, context, source_type):
         items = []
         try:
-            # Use requests with User-Agent to bypass 403 Forbidden blocks
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-            response = requests.get(feed_url, headers=headers, timeout=10)
-            
-            if response.status_code != 200:
-                self.logger.warning(f"Failed to fetch feed {feed_url}: Status {response.status_code}")
+            if self.watermarks is not None and self.watermarks.is_unchanged(feed_url, response):
+                self.logger.info(f"Feed unchanged since last run, skipping: {feed_url}")
                 return []
-                
+
             # Parse the XML content string
-            feed = feedparser.parse(response.content)
+            with get_metrics().stage(self.source_name, "feed_parse") as parse_stage:
+                feed = feedparser.parse(response.content)
+                parse_stage.items_out = len(feed.entries)
+
+            entries = feed.entries
+            if self.watermarks is not None:
+                with get_metrics().stage(self.source_name, "watermark_filter", len(entries)) as watermark_stage:
+                    entries = self.watermarks.new_entries(feed_url, response, entries)
+                    watermark_stage.items_out = len(entries)
+
+            cleanup_seconds = 0.0
+            filter_seconds = 0.0
+            filter_in = 0
+            filter_dropped = 0
             
             # No pre-filtering here anymore. We capture everything the feed gives us for the AI to decide.
-            for entry in feed.entries:
+            for entry in entries:
                 raw_summary = entry.get('description', '') or entry.get('summary', '')
                 
                 # Clean HTML
-                clean_summary = raw_summary
-                if raw_summary:
-                    try:
-                        soup = BeautifulSoup(raw_summary, "html.parser")
-                        clean_summary = soup.get_text(separator=" ", strip=True)
-                    except Exception:
-                        pass # Fallback to raw if BS4 fails
+                started = time.perf_counter()
+                clean_summary = clean_html_summary(raw_summary)
+                cleanup_seconds += time.perf_counter() - started
+                
+                content_text = (entry.get('title', '') + " " + clean_summary)
                 
                 # STRICT LOCATION FILTER (Client-Side)
                 # Only apply to Google News results, as Direct Feeds are already curated
+                # Places are matched for every entry: they also tag the lead's location
+                started = time.perf_counter()
+                places = self.location_matcher.matches(content_text)
+                filter_seconds += time.perf_counter() - started
                 if source_type.startswith("google_news"):
-                    content_text = (entry.get('title', '') + " " + clean_summary)
-                    if not self._is_location_relevant(content_text):
+                    filter_in += 1
+                    if not places:
+                        filter_dropped += 1
                         continue
 
                 items.append({
@@ -245,8 +349,13 @@ class RealEstateDiscovery:
                     "published": entry.get('published', datetime.now().strftime("%Y-%m-%d")),
                     "summary": clean_summary[:500], # Clean text, then limit to 500 chars
                     "context": context,
-                    "source_type": source_type
+                    "source_type": source_type,
+                    "places": places
                 })
+
+            metrics = get_metrics()
+            metrics.record(self.source_name, "html_cleanup", cleanup_seconds, len(entries), len(entries))
+            metrics.record(self.source_name, "location_filter", filter_seconds, filter_in, filter_in - filter_dropped)
         except Exception as e:
             self.logger.error(f"Error parsing feed {feed_url}: {e}")
         return items
@@ -254,79 +363,132 @@ class RealEstateDiscovery:
     def _process_batches(self, items, batch_size=20):
         if not self.client:
             self.logger.error("No OpenAI Client available for batch processing.")
-            return []
+            return
+
+        # Items analyzed in an earlier run with the same model and prompt reuse that verdict
+        if self.verdicts is not None:
+            items, cached = self.verdicts.partition(items, self._item_key)
+            for original, verdict in cached:
+                if verdict['accepted']:
+                    yield self._build_lead(original, verdict['fields'])
 
-        all_leads = []
+        # Items analyzed before this run was interrupted are not sent again
+        items, analyzed = self.checkpoint.partition_analyzed(items, self._item_key)
+        yield from analyzed
         
-        # Split into chunks
-        for i in range(0, len(items), batch_size):
-            batch = items[i:i + batch_size]
-            self.logger.info(f"Processing batch {i//batch_size + 1} ({len(batch)} items)...")
-            
-            analyzed_leads = self._analyze_batch(batch)
-            all_leads.extend(analyzed_leads)
-            
-        return all_leads
+        if self.planner is not None:
+            batches = self.planner.plan(items, self._item_text)
+        else:
+            batches = [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+        # Batches run concurrently within the LLM budgets; results come back in batch order
+        # Failures are counted here, on the consuming thread, not in the worker threads
+        for leads, ok in self.llm.map(self._run_batch, enumerate(batches, 1)):
+            if not ok:
+                self._failed_batches += 1
+            yield from leads
 
-    def _analyze_batch(self, batch_items):
-        # Prepare the prompt input
-        items_text = ""
-        for idx, item in enumerate(batch_items):
-            items_text += f"ITEM {idx}:\nTitle: {item['title']}\nSummary: {item['summary']}\nLink: {item['link']}\n\n"
+    def _run_batch(self, numbered_batch):
+        number, batch = numbered_batch
+        self.logger.info(f"Processing batch {number} ({len(batch)} items)...")
+        with get_metrics().stage(self.source_name, "llm_batch", len(batch)) as llm_stage:
+            leads = self._analyze_batch(batch)
+            llm_stage.items_out = len(leads or [])
+        # (leads, whether the batch was analyzed)
+        return leads or [], leads is not None
 
-        prompt = f"""
-        You are an Expert Lead Analyst for the Dallas/Fort Worth Commercial Real Estate market.
-        You are identifying companies that will need OFFICE FURNITURE due to moves, expansions, or office changes.
+    def _build_lead(self, original, valid_item):
+        """Lead dict for a kept item from the LLM's fields for it."""
+        # Extract new fields
+        sq_ft = valid_item.get('sq_ft', 0)
+        timeline = valid_item.get('timeline', 'Unknown')
+        industry = valid_item.get('industry', 'Unknown')
+        signal_type = valid_item.get('signal_type', 'office_move')
+        reason = valid_item.get('reason', '')
 
-        Review the following news items and identify ONLY valid commercial office signals.
+        # Signal Strength Logic
+        signal_strength = "High"
+        if sq_ft > 10000:
+            signal_strength = "Very High"
+        elif signal_type == "rto":
+            signal_strength = "Very High"  # RTO mandates are strong signals
 
-        VALID Signals (These companies will likely need furniture):
-        1. Signing a new OFFICE lease (or renewing/expanding existing lease)
-        2. Relocating headquarters or opening a new regional office
-        3. Breaking ground on or completing a new corporate campus/office building
-        4. Mandating "Return to Office" (RTO) for employees (especially 4-5 days/week)
-        5. Major office renovation or build-out
+        # Build rich details string
+        details_parts = [f"Signal: {signal_type.upper()}"]
+        if sq_ft > 0:
+            details_parts.append(f"Size: {sq_ft:,} sqft")
+        details_parts.append(f"Industry: {industry}")
+        if timeline != "Unknown":
+            details_parts.append(f"Timeline: {timeline}")
+        details_parts.append(f"AI: {reason}")
+        details = ". ".join(details_parts)
 
-        IMPORTANT - EXCLUDE These (Not Valid Leads):
-        - Residential/Apartment/Multi-family news (CRITICAL - these are NOT office)
-        - Retail/Restaurant leases (not office furniture buyers)
-        - Industrial/Warehouse leases (not office furniture buyers)
-        - Real estate brokerages or landlords as the "company" (they broker deals, they don't buy furniture)
-        - General market reports without a specific TENANT/COMPANY name
-        - "Top Brokers" lists, awards, or opinion pieces
-        - News about a building being SOLD (unless a new tenant is named)
+        return {
+            "discovery_date": datetime.now().strftime("%Y-%m-%d"),
+            "company_name": valid_item.get('company_name', 'Unknown'),
+            "domain": "",
+            "discovery_source": f"rss_{original['source_type']}_ai",
+            "signal_type": signal_type,
+            "signal_strength": signal_strength,
+            "signal_date": original['published'],
+            "details": details,
+            # Fall back to the places the location filter matched before the generic metro label
+            "location": valid_item.get('location') or format_places(original.get('places')) or f"{self.metro.short_name} Area",
+            "timeline": timeline,
+            "source_url": original['link'],
+            "county": self.metro.county_label,
+            "all_signals": "real_estate_news",
+            "notes": f"Headline: {original['title']}\nSummary: {original['summary']}"
+        }
 
-        DEDUPLICATION:
-        - If multiple items refer to the SAME event/company, return ONLY ONE lead (the most detailed one)
+    def _record_verdicts(self, batch_items, valid_items, rejected, complete):
+        """
+        Store verdicts for the kept items, and for the explicit rejections if the response
+        was complete. Items the LLM left out (same-event duplicates, or items cut off by a
+        truncated response) get no verdict and are analyzed again next run.
+        """
+        if self.verdicts is None:
+            return
+        fields = {}
+        for valid_item in valid_items:
+            fields.setdefault(valid_item.get('original_index'), valid_item)
+        rejected = {idx for idx in rejected if isinstance(idx, int)} - set(fields) if complete else set()
+        self.verdicts.record([
+            (self._item_key(item), idx in fields, None, fields.get(idx))
+            for idx, item in enumerate(batch_items) if idx in fields or idx in rejected
+        ])
 
-        Items to Analyze:
-        {items_text}
+    def _item_text(self, item):
+        return f"Title: {item['title']}\nSummary: {item['summary']}\nLink: {item['link']}"
 
-        Return a JSON OBJECT with a key "leads" containing a list of valid items.
-        Each item in the list should have:
-        - original_index: integer (The ITEM number from input)
-        - company_name: string (The TENANT/COMPANY moving - NOT the landlord or broker)
-        - signal_type: string (lease | relocation | expansion | construction | rto | renovation)
-        - sq_ft: integer (0 if unknown)
-        - location: string (Specific City/Area in DFW)
-        - timeline: string (e.g. "Q1 2025", "Summer 2025", "Immediate", "Unknown")
-        - industry: string (e.g. "Technology", "Financial Services", "Law Firm", "Professional Services")
-        - reason: string (Brief explanation of why this company needs furniture)
+    def _analyze_batch(self, batch_items):
+        """Leads found in one batch, or None if the LLM call failed."""
+        # Prepare the prompt input
+        items_text = ""
+        for idx, item in enumerate(batch_items):
+            items_text += f"ITEM {idx}:\n{self._item_text(item)}\n\n"
 
-        If no items are relevant, return {{"leads": []}}
-"""
+        prompt = ANALYSIS_PROMPT.format(display_name=self.metro.display_name, short_name=self.metro.short_name, items_text=items_text)
         
         try:
-            response = self.client.chat.completions.create(
+            expected_completion = self.planner.expected_completion_tokens(batch_items) if self.planner is not None else None
+            response = self.llm.complete(
+                self.client,
+                expected_completion_tokens=expected_completion,
                 model=self.model_name,
                 messages=[
-                    {"role": "system", "content": "You extract lead data. Return valid JSON only."},
+                    {"role": "system", "content": ANALYSIS_SYSTEM_PROMPT},
                     {"role": "user", "content": prompt}
                 ],
                 response_format={"type": "json_object"},
                 temperature=0
             )
             
+            if self.planner is not None:
+                truncated = response.choices[0].finish_reason == "length"
+                self.planner.record(len(ANALYSIS_SYSTEM_PROMPT) + len(prompt), len(batch_items), response.usage, truncated)
+
+            # A response cut off at the token limit may have left out items it would have kept
+            complete = response.choices[0].finish_reason == "stop"
             result = json.loads(response.choices[0].message.content)
             valid_indices_list = result.get('leads', [])
             
@@ -334,6 +496,7 @@ class RealEstateDiscovery:
             valid_idx_set = set()
             
             leads = []
+            item_leads = {}
             for valid_item in valid_indices_list:
                 idx = valid_item.get('original_index')
                 if idx is not None and 0 <= idx < len(batch_items):
@@ -341,56 +504,24 @@ class RealEstateDiscovery:
                     original = batch_items[idx]
                     
                     self.logger.info(f"[KEPT] {original['title'][:50]}... | Reason: {valid_item.get('reason', '')}")
-
-                    # Extract new fields
-                    sq_ft = valid_item.get('sq_ft', 0)
-                    timeline = valid_item.get('timeline', 'Unknown')
-                    industry = valid_item.get('industry', 'Unknown')
-                    signal_type = valid_item.get('signal_type', 'office_move')
-                    reason = valid_item.get('reason', '')
-
-                    # Signal Strength Logic
-                    signal_strength = "High"
-                    if sq_ft > 10000:
-                        signal_strength = "Very High"
-                    elif signal_type == "rto":
-                        signal_strength = "Very High"  # RTO mandates are strong signals
-
-                    # Build rich details string
-                    details_parts = [f"Signal: {signal_type.upper()}"]
-                    if sq_ft > 0:
-                        details_parts.append(f"Size: {sq_ft:,} sqft")
-                    details_parts.append(f"Industry: {industry}")
-                    if timeline != "Unknown":
-                        details_parts.append(f"Timeline: {timeline}")
-                    details_parts.append(f"AI: {reason}")
-                    details = ". ".join(details_parts)
-
-                    lead = {
-                        "discovery_date": datetime.now().strftime("%Y-%m-%d"),
-                        "company_name": valid_item.get('company_name', 'Unknown'),
-                        "domain": "",
-                        "discovery_source": f"rss_{original['source_type']}_ai",
-                        "signal_type": signal_type,
-                        "signal_strength": signal_strength,
-                        "signal_date": original['published'],
-                        "details": details,
-                        "location": valid_item.get('location', "DFW Area"),
-                        "timeline": timeline,
-                        "source_url": original['link'],
-                        "county": "Dallas/Tarrant/Collin",
-                        "all_signals": "real_estate_news",
-                        "notes": f"Headline: {original['title']}\nSummary: {original['summary']}"
-                    }
+                    lead = self._build_lead(original, valid_item)
                     leads.append(lead)
+                    item_leads.setdefault(idx, []).append(lead)
             
             # Log Rejections
             for i, item in enumerate(batch_items):
                 if i not in valid_idx_set:
                     self.logger.info(f"[REJECTED] {item['title'][:50]}...")
 
+            self._record_verdicts(batch_items, valid_indices_list, result.get('rejected') or [], complete)
+            # An incomplete response only settles the items it returned
+            self.checkpoint.save_analyzed(
+                [(item, item_leads.get(idx, [])) for idx, item in enumerate(batch_items) if complete or idx in item_leads],
+                self._item_key
+            )
             return leads
 
         except Exception as e:
             self.logger.error(f"Batch AI Analysis Failed: {e}")
-            return []
+            get_metrics().record_error(self.source_name, "llm_batch")
+            return None
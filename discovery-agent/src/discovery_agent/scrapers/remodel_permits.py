@@ -1,7 +1,132 @@
+"""
+Commercial remodel permits from the Dallas building permits dataset (e7gq-4sah).
+
+Permits are read from the local open data mirror (the first sync streams the bulk
+export in, later syncs page in new permits only) and filtered row by row on the
+permit type and the valuation (`public_records.remodel_min_value`), so a full-year
+backfill never has to sit in memory.
+"""
+
+import logging
+import re
+from datetime import datetime, timedelta
+
+from discovery_agent.utils.config import load_config
+from discovery_agent.utils.open_data_mirror import OpenDataMirror
+
+DATASET = "e7gq-4sah"
+
+# Permit type keywords for commercial remodels / tenant improvements (case-insensitive)
+DEFAULT_PERMIT_TYPES = ["ALTERATION", "REMODEL", "RENOVATION", "FINISH OUT", "FINISH-OUT", "TENANT IMPROVEMENT"]
+
+# Residential permit types / land uses, which never need office furniture
+DEFAULT_EXCLUDED_USES = ["SINGLE FAMILY", "DUPLEX", "RESIDENTIAL", "TOWNHOUSE", "APARTMENT"]
+
+
 class RemodelPermitScraper:
-    def __init__(self):
-        pass
+    source_name = "remodel"
+
+    def __init__(self, metro=None, checkpoint=None, db_writer=None):
+        # Like the CO scraper, the dataset only covers the city of Dallas: metro, checkpoint
+        # and db_writer are accepted for interface parity with the other sources but unused
+        # (the source only runs in the dfw shard, see SINGLE_METRO_SOURCES)
+        self.logger = logging.getLogger(__name__)
+        self.config = load_config()
+        settings = self.config.get('public_records', {}) or {}
+        self.min_value = settings.get('remodel_min_value', 100000)
+        self.lookback_days = settings.get('lookback_days', 30)
+
+        # One compiled alternation per filter instead of a keyword loop per row
+        permit_types = settings.get('remodel_permit_types') or DEFAULT_PERMIT_TYPES
+        excluded = settings.get('remodel_excluded_uses') or DEFAULT_EXCLUDED_USES
+        self._type_pattern = re.compile("|".join(re.escape(t) for t in permit_types), re.IGNORECASE)
+        self._excluded_pattern = re.compile("|".join(re.escape(u) for u in excluded), re.IGNORECASE)
+
+        self.mirror = OpenDataMirror.from_config(self.config)
 
     def run(self):
-        print("Running Remodel Permit Scraper...")
-        pass
+        return list(self.stream())
+
+    def stream(self):
+        """Yield remodel permit leads issued within the lookback window."""
+        self.logger.info("Running Remodel Permit Scraper (Dallas)...")
+        threshold_date = (datetime.now() - timedelta(days=self.lookback_days)).strftime("%Y-%m-%dT00:00:00")
+
+        try:
+            self.mirror.sync(DATASET, since=threshold_date)
+        except Exception as e:
+            # Fall back to whatever the mirror already holds
+            self.logger.error(f"Error syncing building permits: {e}")
+
+        scanned = 0
+        found = 0
+        for row in self.mirror.records(DATASET, since=threshold_date):
+            scanned += 1
+            lead = self.parse_row(row)
+            if lead:
+                found += 1
+                yield lead
+
+        self.logger.info(f"Scanned {scanned} permits, {found} commercial remodels of ${self.min_value:,.0f} or more.")
+
+    @staticmethod
+    def _value(row):
+        value = row.get('value')
+        if not value:
+            return 0.0
+        try:
+            return float(value)
+        except ValueError:
+            # Exports may format currency ("$125,000.00")
+            try:
+                return float(value.replace('$', '').replace(',', ''))
+            except ValueError:
+                return 0.0
+
+    def parse_row(self, row):
+        """Return a lead for a qualifying permit row, or None. Cheapest checks run first."""
+        value = self._value(row)
+        if value < self.min_value:
+            return None
+        permit_type = row.get('permit_type', '')
+        if not self._type_pattern.search(permit_type):
+            return None
+        land_use = row.get('land_use', '')
+        if self._excluded_pattern.search(permit_type) or (land_use and self._excluded_pattern.search(land_use)):
+            return None
+
+        permit_number = row.get('permit_number', '')
+        issued = (row.get('issued_date') or '').split('T')[0] or datetime.now().strftime("%Y-%m-%d")
+        area = row.get('area', '')
+
+        signal_strength = "Medium"
+        if value >= 1000000:
+            signal_strength = "Very High"
+        elif value >= 250000:
+            signal_strength = "High"
+
+        address = row.get('street_address', '')
+        zip_code = row.get('zip_code', '')
+        work = (row.get('work_description') or '').strip()
+        contractor = (row.get('contractor') or '').strip()
+
+        return {
+            "discovery_date": datetime.now().strftime("%Y-%m-%d"),
+            # Permits name the site and the contractor, not the tenant: left for enrichment
+            # ("Unknown" never merges with another company); the address goes in location
+            "company_name": "Unknown",
+            "domain": "",
+            "discovery_source": "dallas_permit_api",
+            "signal_type": "remodel",
+            "signal_strength": signal_strength,
+            "signal_date": issued,
+            "details": f"{permit_type} permit valued at ${value:,.0f}" + (f" for {area} sqft" if area else "") + f". Land Use: {land_use or 'Unknown'}",
+            "location": f"{address}, Dallas, TX {zip_code}".strip(),
+            # Remodels usually finish 60-120 days after the permit
+            "timeline": "2-4 months (Remodel)",
+            # One URL per permit: source_url is unique in the leads table
+            "source_url": f"https://www.dallasopendata.com/resource/{DATASET}.json?permit_number={permit_number}",
+            "county": "Dallas",
+            "all_signals": "remodel_permit",
+            "notes": f"Permit#: {permit_number} | Work: {work[:200]}" + (f" | Contractor: {contractor[:120]}" if contractor else ""),
+        }
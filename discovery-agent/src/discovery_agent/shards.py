@@ -0,0 +1,163 @@
+"""
+Multi-metro sharded discovery.
+
+Each metro from the `metros` section of config.yaml is one shard. Shards run in a
+process pool (one process per metro, bounded by `sharding.max_processes`), each with
+its own query set and location filter, and all of them write to the shared lead
+store: SQLite handles cross-process writers, and Excel appends are serialized with
+a lock shared by the pool. The LLM budgets and rate limits are per process, so each
+shard process gets an equal share of them (shard_config).
+"""
+
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from discovery_agent.scrapers import SINGLE_METRO_SOURCES, load_scraper_class, runs_in_metro
+from discovery_agent.utils.config import load_config
+from discovery_agent.utils.db_writer import DatabaseWriter
+from discovery_agent.utils.excel_writer import ExcelWriter
+from discovery_agent.utils.lead_sink import LeadSink
+from discovery_agent.utils.llm_executor import get_llm_executor
+from discovery_agent.utils.logging_setup import setup_logging
+from discovery_agent.utils.metros import Metro
+from discovery_agent.utils.rate_limiter import DEFAULT_HOST_LIMIT, get_rate_limiter
+from discovery_agent.utils.metrics import get_metrics, reset_metrics, write_run_reports
+from discovery_agent.utils.orchestrator import ScraperOrchestrator, SourceResult
+from discovery_agent.utils.run_state import RunStateStore
+
+DEFAULT_SOURCES = ["jobs", "realestate", "funding"]
+
+# Set in each worker process by _init_shard
+_excel_lock = None
+
+
+def checkpoint_source(metro, name):
+    """Run-state key for a source within a metro shard."""
+    return f"{metro.name}:{name}"
+
+
+def run_metro(metro, config, sink, run_state, run_id, source_names=None, db_writer=None):
+    """
+    Run the sources for one metro in this process, streaming leads into sink.
+    db_writer (the sink's DatabaseWriter, if any) is shared with the scrapers for their known-URL lookups.
+    Returns a dict of source name -> SourceResult.
+    """
+    logger = logging.getLogger(__name__)
+    orchestrator = ScraperOrchestrator.from_config(config)
+
+    sources = []
+    skipped = {}
+    for name in source_names or DEFAULT_SOURCES:
+        if not runs_in_metro(name, metro.name):
+            logger.info(f"Source {name} only covers {SINGLE_METRO_SOURCES[name]}. Not run for {metro.name}.")
+            continue
+        key = checkpoint_source(metro, name)
+        if run_state.is_done(run_id, key):
+            logger.info(f"Source {key} already completed in run {run_id}. Skipping.")
+            skipped[name] = SourceResult(name, "skipped")
+            continue
+        scraper_class = load_scraper_class(name)
+        checkpoint = run_state.checkpoint(run_id, key)
+        sources.append((name, lambda cls=scraper_class, cp=checkpoint: cls(metro=metro, checkpoint=cp, db_writer=db_writer).stream()))
+
+    results = orchestrator.run(sources, on_lead=sink.put)
+    metrics = get_metrics()
+    for name, result in results.items():
+        metrics.record(name, "total", result.elapsed, items_out=result.count, errors=0 if result.ok else 1)
+        if result.ok:
+            run_state.mark_done(run_id, checkpoint_source(metro, name))
+
+    results.update(skipped)
+    return results
+
+
+def _split_bucket(settings, shares):
+    if not settings:
+        return settings
+    return dict(
+        settings,
+        rate_per_second=settings['rate_per_second'] / shares,
+        burst=max(1, settings.get('burst', 1) / shares),
+    )
+
+
+def shard_config(config, shares):
+    """config with the LLM budgets and rate limits split evenly between shares concurrent shard processes."""
+    if shares <= 1:
+        return config
+    config = dict(config or {})
+    llm = dict(config.get('llm_executor') or {})
+    for key, default in (('requests_per_minute', 60), ('tokens_per_minute', 100000)):
+        budget = llm.get(key, default)
+        # None / 0: unlimited, nothing to split
+        if budget:
+            llm[key] = budget / shares
+    llm['max_concurrency'] = max(1, int(llm.get('max_concurrency', 4)) // shares)
+    config['llm_executor'] = llm
+
+    limits = dict(config.get('rate_limits') or {})
+    limits['default'] = _split_bucket(limits.get('default', DEFAULT_HOST_LIMIT), shares)
+    for section in ('hosts', 'api_keys'):
+        limits[section] = {name: _split_bucket(bucket, shares) for name, bucket in (limits.get(section) or {}).items()}
+    config['rate_limits'] = limits
+    # The RapidAPI fallback pacing (one call per N seconds) becomes one call per shares * N seconds
+    job_settings = config.get('job_posting') or {}
+    if job_settings.get('rate_limit_seconds'):
+        config['job_posting'] = dict(job_settings, rate_limit_seconds=job_settings['rate_limit_seconds'] * shares)
+    return config
+
+
+def _init_shard(excel_lock, log_file, shares):
+    global _excel_lock
+    _excel_lock = excel_lock
+    setup_logging(log_file)
+    # Build this process's executor and rate limiter from its share of the budgets before any scraper asks for them
+    config = shard_config(load_config(), shares)
+    get_llm_executor(config)
+    get_rate_limiter(config)
+
+
+def _run_shard(metro_settings, run_id, excel_path, run_state_path, use_database, source_names):
+    config = load_config()
+    metro = Metro(metro_settings)
+    reset_metrics(run_id, metro=metro.name)
+
+    excel_writer = ExcelWriter(excel_path, lock=_excel_lock)
+    db_writer = DatabaseWriter.from_config(config) if use_database else None
+    sink = LeadSink.from_config(config, excel_writer, db_writer)
+    run_state = RunStateStore(run_state_path)
+
+    with sink:
+        results = run_metro(metro, config, sink, run_state, run_id, source_names, db_writer)
+    write_run_reports(config, suffix=f"_{metro.name}")
+    return results, sink.stats()
+
+
+def run_shards(metros, config, run_id, excel_path, run_state_path, use_database, log_file, source_names=None):
+    """
+    Run one shard per metro in a process pool.
+    Yields (metro name, results, sink stats, error) as shards finish.
+    """
+    settings = (config or {}).get('sharding', {}) or {}
+    max_processes = settings.get('max_processes') or os.cpu_count() or 1
+    processes = min(max_processes, len(metros))
+    excel_lock = multiprocessing.Lock()
+
+    with ProcessPoolExecutor(
+        max_workers=processes,
+        initializer=_init_shard,
+        initargs=(excel_lock, log_file, processes),
+    ) as pool:
+        futures = {
+            pool.submit(_run_shard, metro.to_dict(), run_id, excel_path, run_state_path, use_database, source_names): metro.name
+            for metro in metros
+        }
+        for future in as_completed(futures):
+            metro_name = futures[future]
+            try:
+                results, stats = future.result()
+                yield metro_name, results, stats, None
+            except Exception as e:
+                yield metro_name, {}, None, e
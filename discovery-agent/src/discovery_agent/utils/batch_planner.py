@@ -0,0 +1,142 @@
+"""
+Token-budget batch sizes for LLM analysis.
+
+Batch sizes used to be fixed (10 job postings, 20 news items). But an item can be
+a two-line summary or a 1000-character job description, so short items cost
+extra round trips and long ones risked a completion cut off mid-JSON.
+BatchPlanner packs items, in order, into batches that stay within
+`prompt_token_budget`, `completion_token_budget` and `max_items`:
+
+- An item's prompt tokens are the length of its prompt text times
+  tokens_per_char. Every batch also carries the prompt template
+  (prompt_overhead characters).
+- Its completion tokens are completion_per_item, the average output per item.
+  For news this is small, since most items get no output at all.
+
+Both estimates start from the config defaults. After every batch they move
+toward the usage the API reported (a running mean, then an exponential moving
+average). They are stored per source and model in SQLite, so each run starts
+from what earlier runs measured.
+"""
+
+import logging
+import threading
+import time
+
+from discovery_agent.utils.config import data_path
+from discovery_agent.utils.sqlite_helpers import sqlite_connection
+
+# "ITEM 12:\n" before and a blank line after each item's text in the prompt
+ITEM_FRAME_CHARS = 12
+
+
+class BatchPlanner:
+    """Packs items into LLM batches by estimated tokens, learning the estimates from usage."""
+
+    def __init__(self, db_path, source, model, prompt_overhead=0, prompt_token_budget=12000,
+                 completion_token_budget=4000, max_items=40, tokens_per_char=0.25,
+                 completion_per_item=80, smoothing=0.2):
+        self.logger = logging.getLogger(__name__)
+        self.db_path = db_path
+        self.source = source
+        self.model = model or ""
+        self.prompt_overhead = prompt_overhead
+        self.prompt_token_budget = prompt_token_budget
+        self.completion_token_budget = completion_token_budget
+        self.max_items = max(1, int(max_items))
+        self.tokens_per_char = tokens_per_char
+        self.completion_per_item = completion_per_item
+        self.smoothing = smoothing
+        self.samples = 0
+        self._lock = threading.Lock()
+
+        with sqlite_connection(self.db_path) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS batch_estimates (
+                    source TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    tokens_per_char REAL NOT NULL,
+                    completion_per_item REAL NOT NULL,
+                    samples INTEGER NOT NULL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (source, model)
+                )
+            ''')
+            row = conn.execute(
+                'SELECT tokens_per_char, completion_per_item, samples FROM batch_estimates WHERE source = ? AND model = ?',
+                (self.source, self.model)
+            ).fetchone()
+        if row:
+            self.tokens_per_char, self.completion_per_item, self.samples = row
+
+    @classmethod
+    def from_config(cls, config, source, model, prompt_overhead=0):
+        """Planner from the `batch_planner` config section, or None if disabled (fixed batch sizes)."""
+        settings = (config or {}).get('batch_planner', {}) or {}
+        if not settings.get('enabled', True):
+            return None
+        return cls(
+            settings.get('path') or data_path("batch_planner.sqlite3"),
+            source,
+            model,
+            prompt_overhead=prompt_overhead,
+            prompt_token_budget=settings.get('prompt_token_budget', 12000),
+            completion_token_budget=settings.get('completion_token_budget', 4000),
+            max_items=settings.get('max_items', 40),
+            tokens_per_char=settings.get('tokens_per_char', 0.25),
+            completion_per_item=settings.get('completion_tokens_per_item', 80),
+        )
+
+    def plan(self, items, text):
+        """Split items (in order) into batches within the budgets. text(item) is the item's prompt text."""
+        overhead = self.prompt_overhead * self.tokens_per_char
+        batches, batch = [], []
+        prompt_tokens, completion_tokens = overhead, 0.0
+        for item in items:
+            item_tokens = (len(text(item)) + ITEM_FRAME_CHARS) * self.tokens_per_char
+            full = (
+                len(batch) >= self.max_items
+                or prompt_tokens + item_tokens > self.prompt_token_budget
+                or completion_tokens + self.completion_per_item > self.completion_token_budget
+            )
+            # An item over budget on its own still gets a batch
+            if batch and full:
+                batches.append(batch)
+                batch, prompt_tokens, completion_tokens = [], overhead, 0.0
+            batch.append(item)
+            prompt_tokens += item_tokens
+            completion_tokens += self.completion_per_item
+        if batch:
+            batches.append(batch)
+        if batches:
+            self.logger.info(
+                f"Planned {len(batches)} batches for {len(items)} items "
+                f"({self.tokens_per_char:.3f} tokens/char, {self.completion_per_item:.0f} completion tokens/item)."
+            )
+        return batches
+
+    def expected_completion_tokens(self, batch):
+        return int(len(batch) * self.completion_per_item) + 1
+
+    def record(self, prompt_chars, item_count, usage, truncated=False):
+        """Move the estimates toward one batch's actual usage (response.usage) and store them."""
+        prompt_tokens = getattr(usage, 'prompt_tokens', None)
+        completion_tokens = getattr(usage, 'completion_tokens', None)
+        if not prompt_tokens or completion_tokens is None or not prompt_chars or not item_count:
+            return
+        per_item = completion_tokens / item_count
+        if truncated:
+            # Cut off at the output limit: the real output was longer than what was counted
+            per_item *= 2
+        with self._lock:
+            # Running mean for the first samples, then an exponential moving average
+            weight = max(self.smoothing, 1.0 / (self.samples + 1))
+            self.tokens_per_char += weight * (prompt_tokens / prompt_chars - self.tokens_per_char)
+            self.completion_per_item += weight * (per_item - self.completion_per_item)
+            self.samples += 1
+            with sqlite_connection(self.db_path) as conn:
+                conn.execute('''
+                    INSERT OR REPLACE INTO batch_estimates
+                        (source, model, tokens_per_char, completion_per_item, samples, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (self.source, self.model, self.tokens_per_char, self.completion_per_item, self.samples, time.time()))
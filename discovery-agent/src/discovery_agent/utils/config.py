@@ -0,0 +1,41 @@
+"""
+Shared configuration and path helpers for the discovery agent.
+"""
+
+import os
+import yaml
+
+# src/discovery_agent/utils -> src/discovery_agent -> src -> discovery-agent
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+
+def find_config_path():
+    """Locate config/config.yaml using the same search order as the scrapers."""
+    config_path = os.path.join(PROJECT_ROOT, 'config', 'config.yaml')
+
+    if not os.path.exists(config_path):
+        # Try one level higher just in case
+        config_path = os.path.join(os.path.dirname(PROJECT_ROOT), 'config', 'config.yaml')
+
+    if not os.path.exists(config_path):
+        # Try CWD fallback
+        config_path = "config/config.yaml"
+
+    if not os.path.exists(config_path):
+        raise FileNotFoundError("Config file not found.")
+
+    return config_path
+
+
+def load_config():
+    """Load config.yaml as a dictionary."""
+    with open(find_config_path(), 'r') as f:
+        return yaml.safe_load(f) or {}
+
+
+def data_path(*parts):
+    """Return a path inside discovery-agent/data, creating the directory if needed."""
+    data_dir = os.path.join(PROJECT_ROOT, "data")
+    if not os.path.exists(data_dir):
+        os.makedirs(data_dir, exist_ok=True)
+    return os.path.join(data_dir, *parts)
@@ -9,12 +9,17 @@ import os
 import logging
 from datetime import datetime
 
+from discovery_agent.utils.entity_resolution import CompanyResolver, merge_lead
+from discovery_agent.utils.metrics import get_metrics
+
 
 class DatabaseWriter:
     """Writes leads to the SQLite database used by the Django admin."""
 
-    def __init__(self, db_path=None):
+    def __init__(self, db_path=None, resolver=None):
         self.logger = logging.getLogger(__name__)
+        # Company entity resolution: signals of a known company are merged into its row (None: one row per signal)
+        self.resolver = resolver
 
         if db_path is None:
             # Default path: lead_miner_web/db.sqlite3
@@ -30,24 +35,59 @@ class DatabaseWriter:
             self.logger.error(f"Database not found at {self.db_path}. Run Django migrations first.")
             raise FileNotFoundError(f"Database not found at {self.db_path}")
 
+    @classmethod
+    def from_config(cls, config, db_path=None):
+        """Writer with company entity resolution per the `entity_resolution` config section."""
+        return cls(db_path, resolver=CompanyResolver.from_config(config))
+
     def save_leads(self, leads):
         """
         Save a list of lead dictionaries to the database.
-        Skips duplicates based on source_url.
+        Skips duplicates based on source_url. With a resolver, signals of a company that
+        already has a row are merged into that row (and counted as saved).
         Returns tuple of (saved_count, skipped_count).
         """
         if not leads:
             self.logger.info("No leads to save.")
             return (0, 0)
 
+        with get_metrics().stage("db_writer", "save_leads", len(leads)) as stage:
+            saved_count, skipped_count, error_count, merged_count = self._insert_leads(leads)
+            stage.items_out = saved_count
+            stage.errors = error_count
+
+        merged_text = f" ({merged_count} merged into existing companies)" if merged_count else ""
+        self.logger.info(f"Saved {saved_count} leads to database{merged_text}. Skipped {skipped_count} duplicates.")
+        return (saved_count, skipped_count)
+
+    def _insert_leads(self, leads):
         saved_count = 0
         skipped_count = 0
+        error_count = 0
+        merged = []
 
-        conn = sqlite3.connect(self.db_path)
+        # Generous busy timeout: several shard processes may write at the same time
+        conn = sqlite3.connect(self.db_path, timeout=30)
         cursor = conn.cursor()
+        if self.resolver is not None:
+            self.resolver.refresh(cursor)
+            already_merged = self.resolver.merged_store.existing(lead.get('source_url', '') for lead in leads)
 
         for lead in leads:
             try:
+                if self.resolver is not None:
+                    source_url = lead.get('source_url', '')
+                    if source_url in already_merged:
+                        # Already merged into a company's row (earlier run or earlier in this batch)
+                        skipped_count += 1
+                        continue
+                    row_id = self.resolver.match(lead)
+                    if row_id is not None and not self._is_lead_url(cursor, source_url) and self._merge_into_row(cursor, row_id, lead):
+                        merged.append((source_url, row_id))
+                        already_merged.add(source_url)
+                        saved_count += 1
+                        continue
+
                 # Parse discovery_date
                 discovery_date = lead.get('discovery_date', datetime.now().strftime('%Y-%m-%d'))
 
@@ -94,6 +134,8 @@ class DatabaseWriter:
                     lead.get('contact_phone', ''),
                 ))
                 saved_count += 1
+                if self.resolver is not None:
+                    self.resolver.register(cursor.lastrowid, lead)
 
             except sqlite3.IntegrityError as e:
                 # Duplicate source_url - skip
@@ -102,12 +144,30 @@ class DatabaseWriter:
             except Exception as e:
                 self.logger.error(f"Error saving lead {lead.get('company_name')}: {e}")
                 skipped_count += 1
+                error_count += 1
 
         conn.commit()
         conn.close()
+        if merged:
+            self.resolver.merged_store.add(merged)
 
-        self.logger.info(f"Saved {saved_count} leads to database. Skipped {skipped_count} duplicates.")
-        return (saved_count, skipped_count)
+        return (saved_count, skipped_count, error_count, len(merged))
+
+    def _is_lead_url(self, cursor, source_url):
+        return cursor.execute('SELECT 1 FROM leads_lead WHERE source_url = ?', (source_url,)).fetchone() is not None
+
+    def _merge_into_row(self, cursor, row_id, lead):
+        """Merge lead's signal into lead row row_id. Returns False if the row is gone."""
+        fields = ('signal_strength', 'all_signals', 'domain', 'notes')
+        row = cursor.execute(f'SELECT {", ".join(fields)} FROM leads_lead WHERE id = ?', (row_id,)).fetchone()
+        if row is None:
+            return False
+        record = merge_lead(dict(zip(fields, row)), lead)
+        cursor.execute('''
+            UPDATE leads_lead SET signal_strength = ?, all_signals = ?, domain = ?, notes = ?, updated_at = ?
+            WHERE id = ?
+        ''', tuple(record[field] for field in fields) + (datetime.now().isoformat(), row_id))
+        return True
 
     def get_lead_count(self):
         """Return total number of leads in database."""
@@ -118,14 +178,50 @@ class DatabaseWriter:
         conn.close()
         return count
 
-    def get_recent_source_urls(self, days=7):
-        """Get source URLs from the last N days to check for duplicates before API calls."""
+    def get_source_counts(self, days=None):
+        """Return {discovery_source: lead count}, optionally limited to the last N days."""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
-        cursor.execute('''
-            SELECT source_url FROM leads_lead
-            WHERE discovery_date >= date('now', ?)
-        ''', (f'-{days} days',))
-        urls = set(row[0] for row in cursor.fetchall())
+        if days is None:
+            cursor.execute('SELECT discovery_source, COUNT(*) FROM leads_lead GROUP BY discovery_source')
+        else:
+            cursor.execute('''
+                SELECT discovery_source, COUNT(*) FROM leads_lead
+                WHERE discovery_date >= date('now', ?)
+                GROUP BY discovery_source
+            ''', (f'-{days} days',))
+        counts = dict(cursor.fetchall())
+        conn.close()
+        return counts
+
+    def get_recent_source_urls(self, days=7):
+        """Get source URLs from the last N days (all if days is None) to check for duplicates before API calls."""
+        return set(self.iter_source_urls(days))
+
+    def _source_url_query(self, select, days):
+        if days is None:
+            return f'SELECT {select} FROM leads_lead', ()
+        return f"SELECT {select} FROM leads_lead WHERE discovery_date >= date('now', ?)", (f'-{days} days',)
+
+    def count_source_urls(self, days=7):
+        """Number of lead and merged signal URLs from the last N days (all if days is None)."""
+        conn = sqlite3.connect(self.db_path)
+        count = conn.execute(*self._source_url_query('COUNT(*)', days)).fetchone()[0]
         conn.close()
-        return urls
+        if self.resolver is not None:
+            count += self.resolver.merged_store.count(days)
+        return count
+
+    def iter_source_urls(self, days=7):
+        """
+        Yield source URLs from the last N days (all if days is None) without loading them all at once,
+        including signals merged into another lead's row.
+        """
+        conn = sqlite3.connect(self.db_path)
+        try:
+            for (url,) in conn.execute(*self._source_url_query('source_url', days)):
+                yield url
+        finally:
+            conn.close()
+        if self.resolver is not None:
+            yield from self.resolver.merged_store.urls(days)
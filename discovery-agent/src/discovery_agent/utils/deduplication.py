@@ -1,6 +1,7 @@
-import re
 from difflib import SequenceMatcher
 
+from discovery_agent.utils.near_duplicates import NearDuplicateIndex, normalize_title
+
 class Deduplication:
     def __init__(self):
         pass
@@ -8,16 +9,35 @@ class Deduplication:
     def deduplicate_raw_items(self, items, similarity_threshold=0.85):
         """
         Deduplicate raw RSS items based on Title similarity.
-        Keeps the first occurrence.
+        Keeps the first occurrence. Titles are looked up in a MinHash-LSH index,
+        so only likely matches are compared (see utils/near_duplicates.py).
         """
         unique_items = []
-        seen_titles = []
+        index = NearDuplicateIndex(similarity_threshold)
 
         for item in items:
-            title = item.get('title', '')
             # Normalize title (remove special chars, lowercase)
-            clean_title = re.sub(r'[^\w\s]', '', title).lower().strip()
-            
+            clean_title = normalize_title(item.get('title', ''))
+
+            if not clean_title:
+                continue
+
+            if index.add_if_new(clean_title):
+                unique_items.append(item)
+
+        return unique_items
+
+    def _deduplicate_pairwise(self, items, similarity_threshold=0.85):
+        """
+        Reference implementation: compares every title with every kept title.
+        Quadratic; kept for the dedup quality benchmark.
+        """
+        unique_items = []
+        seen_titles = []
+
+        for item in items:
+            clean_title = normalize_title(item.get('title', ''))
+
             if not clean_title:
                 continue
 
@@ -28,12 +48,9 @@ class Deduplication:
                 if ratio > similarity_threshold:
                     is_duplicate = True
                     break
-            
+
             if not is_duplicate:
                 unique_items.append(item)
                 seen_titles.append(clean_title)
-                
-        return unique_items
 
-    def deduplicate(self, leads):
-        return leads
+        return unique_items
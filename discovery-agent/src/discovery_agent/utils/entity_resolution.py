@@ -0,0 +1,329 @@
+"""
+Company entity resolution for leads.
+
+Every signal used to become its own lead, so "Acme Corp" hiring a Facilities
+Manager, "Acme Corporation, Inc." raising a Series B and "ACME" signing a lease
+were three unrelated rows. Leads are now matched to a company record by:
+
+1. Website domain (the lead's `domain`: JSearch's employer_website or the funding
+   scraper's company_website), ignoring job boards and social sites.
+2. Normalized company name (lowercase, no punctuation, no legal suffix).
+3. A blocking key (the name's tokens cut to five characters). Names in the same
+   block count as the same company above `name_similarity` (SequenceMatcher),
+   which catches small spelling variants, but only when the domain or location
+   agrees too: "Acme Dental" in Plano and "Acme Rental" in Frisco stay apart.
+   Names with digits must match exactly.
+
+All three are dictionary lookups, so matching stays constant per lead instead of
+comparing every pair. A matched signal is merged into the record: combined
+all_signals, the strongest signal_strength, and a note with its details.
+"""
+
+import logging
+import re
+import time
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+
+from discovery_agent.utils.config import data_path
+from discovery_agent.utils.near_duplicates import similar
+from discovery_agent.utils.sqlite_helpers import sqlite_connection
+
+# Trailing legal-form words dropped from company names
+LEGAL_SUFFIXES = {
+    "inc", "incorporated", "corp", "corporation", "co", "company", "llc", "llp", "lp",
+    "ltd", "limited", "plc", "pllc", "pc", "lc",
+}
+# Values the LLM or the APIs use for "no name" / "no website"
+PLACEHOLDERS = {"", "unknown", "n/a", "na", "none", "null", "not mentioned"}
+# Hosts that say nothing about the company (job boards and applicant tracking systems,
+# social profiles, link shorteners); their subdomains are ignored too
+GENERIC_DOMAINS = {
+    "linkedin.com", "facebook.com", "twitter.com", "x.com", "instagram.com", "youtube.com",
+    "indeed.com", "glassdoor.com", "ziprecruiter.com", "monster.com", "lever.co", "greenhouse.io",
+    "myworkdayjobs.com", "smartrecruiters.com", "icims.com", "google.com", "bit.ly",
+    "crunchbase.com", "wikipedia.org",
+}
+# Location parts too broad to tell two companies apart
+REGION_WORDS = {"texas", "usa", "us", "united states", "remote"}
+SIGNAL_STRENGTHS = ["Low", "Medium", "High", "Very High"]
+# Characters of each name token used for the blocking key
+BLOCK_PREFIX = 5
+# Lead rows read from the database per round trip when indexing
+REFRESH_CHUNK_ROWS = 5000
+
+
+def normalize_company_name(name):
+    """'Acme Corporation, Inc.' -> 'acme' (empty for placeholders such as 'Unknown')."""
+    text = (name or "").lower().replace("&", " and ")
+    if text.strip() in PLACEHOLDERS:
+        return ""
+    # Drop dots first so "L.L.C." becomes one word
+    tokens = re.sub(r"[^\w\s]", " ", text.replace(".", "")).split()
+    if tokens and tokens[0] == "the":
+        tokens = tokens[1:]
+    core = list(tokens)
+    while core and core[-1] in LEGAL_SUFFIXES:
+        core.pop()
+    # A name that is nothing but suffixes ("Company Inc") is kept as written
+    return " ".join(core or tokens)
+
+
+def normalize_domain(value):
+    """'https://www.Acme.com/careers' -> 'acme.com' (empty if missing or generic)."""
+    text = (value or "").strip().lower()
+    if text in PLACEHOLDERS:
+        return ""
+    host = urlsplit(text if "//" in text else "//" + text).hostname or ""
+    if host.startswith("www."):
+        host = host[4:]
+    if "." not in host or host in GENERIC_DOMAINS or any(host.endswith("." + d) for d in GENERIC_DOMAINS):
+        return ""
+    return host
+
+
+def location_places(value):
+    """'Plano, TX 75024' -> {'plano'}: the place names of a location, without states, ZIP codes or placeholders."""
+    places = set()
+    for part in (value or "").lower().split(","):
+        words = [word for word in re.sub(r"[^\w\s]", " ", part).split() if not word.isdigit()]
+        place = " ".join(words)
+        if len(place) > 2 and place not in PLACEHOLDERS and place not in REGION_WORDS:
+            places.add(place)
+    return places
+
+
+def block_key(normalized_name):
+    return " ".join(token[:BLOCK_PREFIX] for token in normalized_name.split())
+
+
+def combine_signals(*values):
+    """Union of comma-separated all_signals values, first-seen order."""
+    signals = []
+    for value in values:
+        for signal in (value or "").split(","):
+            signal = signal.strip()
+            if signal and signal not in signals:
+                signals.append(signal)
+    return ", ".join(signals)
+
+
+def stronger_strength(first, second):
+    rank = {strength: i for i, strength in enumerate(SIGNAL_STRENGTHS)}
+    return max(first or "Medium", second or "Medium", key=lambda strength: rank.get(strength, 1))
+
+
+def merged_signal_note(lead):
+    return (
+        f"Merged signal ({lead.get('discovery_source', '')}, {lead.get('discovery_date', '')}): "
+        f"{lead.get('signal_type', '')} [{lead.get('signal_strength', '')}] - {lead.get('details', '')}\n"
+        f"Source: {lead.get('source_url', '')}"
+    )
+
+
+def merge_lead(record, lead):
+    """Fold lead's signal into record (a lead dict or lead row values) and return record."""
+    record['all_signals'] = combine_signals(record.get('all_signals'), lead.get('all_signals'))
+    record['signal_strength'] = stronger_strength(record.get('signal_strength'), lead.get('signal_strength'))
+    if not record.get('domain') and lead.get('domain'):
+        record['domain'] = lead['domain']
+    note = merged_signal_note(lead)
+    record['notes'] = f"{record['notes']}\n\n{note}" if record.get('notes') else note
+    return record
+
+
+class EntityIndex:
+    """Blocking index from company domains and names to record ids."""
+
+    def __init__(self, name_similarity=0.9):
+        self.name_similarity = name_similarity
+        self._domains = {}
+        # Normalized name -> record ids (same-named companies in different places are different records)
+        self._names = {}
+        self._blocks = {}
+        # Per record: the domains and places seen, which a name match is checked against
+        self._record_domains = {}
+        self._record_places = {}
+
+    def find(self, lead):
+        """Record id of the company lead belongs to, or None."""
+        domain = normalize_domain(lead.get('domain'))
+        if domain and domain in self._domains:
+            return self._domains[domain]
+
+        name = normalize_company_name(lead.get('company_name'))
+        if not name:
+            return None
+        places = location_places(lead.get('location'))
+        # The same name only needs nothing against it; a close spelling needs an agreeing domain or place
+        for record_id in self._names.get(name, ()):
+            if self._consistent(record_id, domain, places):
+                return record_id
+        if any(char.isdigit() for char in name):
+            return None
+        for other in self._blocks.get(block_key(name), ()):
+            if other == name or not similar(name, other, self.name_similarity):
+                continue
+            for record_id in self._names[other]:
+                if self._corroborated(record_id, domain, places):
+                    return record_id
+        return None
+
+    def _consistent(self, record_id, domain, places):
+        # Known on both sides: different domains, or places with nothing in common, are two companies
+        domains = self._record_domains.get(record_id)
+        if domain and domains:
+            return domain in domains
+        record_places = self._record_places.get(record_id)
+        if places and record_places:
+            return not places.isdisjoint(record_places)
+        return True
+
+    def _corroborated(self, record_id, domain, places):
+        # Two different known domains are two companies, whatever the names and places say
+        domains = self._record_domains.get(record_id)
+        if domain and domains:
+            return domain in domains
+        return not places.isdisjoint(self._record_places.get(record_id, ()))
+
+    def add(self, record_id, lead):
+        """Register lead's domain and name for record_id (existing domains keep their record)."""
+        domain = normalize_domain(lead.get('domain'))
+        if domain:
+            self._domains.setdefault(domain, record_id)
+            self._record_domains.setdefault(record_id, set()).add(domain)
+        places = location_places(lead.get('location'))
+        if places:
+            self._record_places.setdefault(record_id, set()).update(places)
+        name = normalize_company_name(lead.get('company_name'))
+        if not name:
+            return
+        if name not in self._names:
+            self._names[name] = []
+            self._blocks.setdefault(block_key(name), []).append(name)
+        if record_id not in self._names[name]:
+            self._names[name].append(record_id)
+
+
+def resolve_leads(leads, name_similarity=0.9):
+    """Merge leads of the same company (first occurrence is the record), keeping order."""
+    index = EntityIndex(name_similarity)
+    records = []
+    for lead in leads:
+        position = index.find(lead)
+        if position is None:
+            position = len(records)
+            records.append(dict(lead))
+        else:
+            merge_lead(records[position], lead)
+        index.add(position, lead)
+    return records
+
+
+class MergedSignalStore:
+    """SQLite log of signal URLs merged into another lead row (they have no row of their own)."""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+
+        with sqlite_connection(self.db_path) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS merged_signals (
+                    source_url TEXT PRIMARY KEY,
+                    lead_id INTEGER NOT NULL,
+                    merged_at REAL NOT NULL
+                )
+            ''')
+
+    @classmethod
+    def from_config(cls, config):
+        """Store from the `entity_resolution` config section, or None if disabled."""
+        settings = (config or {}).get('entity_resolution', {}) or {}
+        if not settings.get('enabled', True):
+            return None
+        return cls(settings.get('path') or data_path("merged_signals.sqlite3"))
+
+    def _query(self, select, days):
+        if days is None:
+            return f'SELECT {select} FROM merged_signals', ()
+        return f'SELECT {select} FROM merged_signals WHERE merged_at >= ?', (time.time() - days * 86400,)
+
+    def count(self, days=None):
+        with sqlite_connection(self.db_path) as conn:
+            return conn.execute(*self._query('COUNT(*)', days)).fetchone()[0]
+
+    def urls(self, days=None):
+        with sqlite_connection(self.db_path) as conn:
+            for (url,) in conn.execute(*self._query('source_url', days)):
+                yield url
+
+    def existing(self, urls):
+        """The subset of urls that were merged already."""
+        urls = list(urls)
+        found = set()
+        with sqlite_connection(self.db_path) as conn:
+            # Chunked: SQLite limits the number of bound parameters
+            for start in range(0, len(urls), 500):
+                chunk = urls[start:start + 500]
+                rows = conn.execute(
+                    f'SELECT source_url FROM merged_signals WHERE source_url IN ({",".join("?" * len(chunk))})', chunk
+                )
+                found.update(url for (url,) in rows)
+        return found
+
+    def add(self, merged):
+        """Record (source_url, lead_id) pairs."""
+        now = time.time()
+        with sqlite_connection(self.db_path) as conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO merged_signals (source_url, lead_id, merged_at) VALUES (?, ?, ?)',
+                [(url, lead_id, now) for url, lead_id in merged]
+            )
+
+
+class CompanyResolver:
+    """Matches incoming leads to existing lead rows, one row per company."""
+
+    def __init__(self, merged_store, name_similarity=0.9, lookback_days=365):
+        self.logger = logging.getLogger(__name__)
+        self.merged_store = merged_store
+        self.index = EntityIndex(name_similarity)
+        # Only companies with a lead created in this window are matched (None: all leads)
+        self.lookback_days = lookback_days
+        self._last_id = 0
+
+    @classmethod
+    def from_config(cls, config):
+        """Resolver from the `entity_resolution` config section, or None if disabled."""
+        merged_store = MergedSignalStore.from_config(config)
+        if merged_store is None:
+            return None
+        settings = (config or {}).get('entity_resolution', {}) or {}
+        return cls(merged_store, settings.get('name_similarity', 0.9), settings.get('lookback_days', 365) or None)
+
+    def refresh(self, conn):
+        """Index lead rows added since the last refresh (by any process), a chunk of rows at a time."""
+        query = 'SELECT id, company_name, domain, location FROM leads_lead WHERE id > ?'
+        params = [self._last_id]
+        if self.lookback_days:
+            query += ' AND created_at >= ?'
+            params.append((datetime.now() - timedelta(days=self.lookback_days)).strftime('%Y-%m-%d'))
+        cursor = conn.execute(query + ' ORDER BY id', params)
+        # Only the index keys are kept, never the rows themselves
+        indexed = 0
+        while True:
+            rows = cursor.fetchmany(REFRESH_CHUNK_ROWS)
+            if not rows:
+                break
+            for row_id, company_name, domain, location in rows:
+                self.index.add(row_id, {'company_name': company_name, 'domain': domain, 'location': location})
+                self._last_id = row_id
+            indexed += len(rows)
+        if indexed > 1000:
+            self.logger.info(f"Indexed {indexed} lead rows for company matching.")
+
+    def match(self, lead):
+        return self.index.find(lead)
+
+    def register(self, row_id, lead):
+        self.index.add(row_id, lead)
@@ -1,15 +1,18 @@
-import pandas as pd
 import os
-from openpyxl import Workbook, load_workbook
+from contextlib import nullcontext
+from discovery_agent.utils.metrics import get_metrics
 
 class ExcelWriter:
-    def __init__(self, filepath):
+    def __init__(self, filepath, lock=None):
         self.filepath = filepath
+        # Optional (multiprocessing) lock so several shard processes can append to one workbook
+        self.lock = lock if lock is not None else nullcontext()
         self.sheets = ["Raw Discoveries", "Enriched", "Scored", "Ready for Outreach", "Historical"]
         self._initialize_workbook()
 
     def _initialize_workbook(self):
         if not os.path.exists(self.filepath):
+            from openpyxl import Workbook
             wb = Workbook()
             # Remove default sheet
             default_sheet = wb.active
@@ -31,26 +34,30 @@ class ExcelWriter:
             print(f"Created new leads repository at {self.filepath}")
 
     def save_leads(self, leads, sheet_name="Raw Discoveries"):
-        # leads is a list of dictionaries
+        """
+        Append leads (one sink batch when streaming) to the sheet.
+        Returns (saved_count, skipped_count) like DatabaseWriter; a failed write raises.
+        """
         if not leads:
-            return
-            
-        df_new = pd.DataFrame(leads)
-        
+            return (0, 0)
+
+        with get_metrics().stage("excel_writer", "save_leads", len(leads)) as stage:
+            with self.lock:
+                self._append_leads(leads, sheet_name)
+            stage.items_out = len(leads)
+        return (len(leads), 0)
+
+    def _append_leads(self, leads, sheet_name):
+        # Imported on first write: openpyxl (and numpy) dominate `run` startup otherwise
+        from openpyxl import load_workbook
         try:
-            # Load existing data
-            with pd.ExcelWriter(self.filepath, mode='a', engine='openpyxl', if_sheet_exists='overlay') as writer:
-                # We need to find the last row to append
-                # For now, let's just read existing and append (inefficient for huge files but safe)
-                # Better approach for openpyxl:
-                pass
-                
             # Using openpyxl directly for appending
             wb = load_workbook(self.filepath)
             if sheet_name not in wb.sheetnames:
                 wb.create_sheet(sheet_name)
             ws = wb[sheet_name]
-            
+            headers = [cell.value for cell in ws[1]]
+
             for lead in leads:
                 # Map dictionary to row based on headers
                 # This assumes headers are in the first row
@@ -59,7 +66,6 @@ class ExcelWriter:
                 
                 row = []
                 # Based on the headers we defined
-                headers = [cell.value for cell in ws[1]]
                 for header in headers:
                     # Convert header to key (e.g. "Discovery Date" -> "discovery_date")
                     # But the incoming data might use different keys. 
@@ -75,6 +81,7 @@ class ExcelWriter:
                 
             wb.save(self.filepath)
             print(f"Saved {len(leads)} leads to {sheet_name}")
-            
+
         except Exception as e:
             print(f"Error saving leads: {e}")
+            raise
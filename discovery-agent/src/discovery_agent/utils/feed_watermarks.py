@@ -0,0 +1,165 @@
+"""
+Per-feed watermarks for incremental RSS ingestion.
+
+For every feed (one Google News query URL or direct feed, per scraper and metro)
+we persist the newest published date and the ids of entries already processed.
+Right after parsing, entries that were seen before, or that are older than the
+watermark (minus a grace period for late-indexed articles), are dropped, so
+per-run work scales with new articles only. A feed whose 304 confirms the exact
+content committed last time is skipped without being parsed at all.
+
+Marks are only committed once the scraper has finished its run (see
+FeedWatermarks.commit), so entries from an interrupted run are processed again.
+"""
+
+import calendar
+import logging
+import threading
+import time
+
+from discovery_agent.utils.config import data_path
+from discovery_agent.utils.sqlite_helpers import sqlite_connection
+
+
+class FeedWatermarkStore:
+    """SQLite store of per-feed watermarks and seen entry ids."""
+
+    def __init__(self, db_path, retention_days=14):
+        self.logger = logging.getLogger(__name__)
+        self.db_path = db_path
+        self._lock = threading.Lock()
+
+        with sqlite_connection(self.db_path) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS feed_watermarks (
+                    feed_key TEXT PRIMARY KEY,
+                    last_published REAL,
+                    validator TEXT,
+                    updated_at REAL NOT NULL
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS feed_seen (
+                    feed_key TEXT NOT NULL,
+                    entry_id TEXT NOT NULL,
+                    seen_at REAL NOT NULL,
+                    PRIMARY KEY (feed_key, entry_id)
+                )
+            ''')
+            # Seen ids only need to outlive the grace period and the feeds' own windows
+            conn.execute('DELETE FROM feed_seen WHERE seen_at < ?', (time.time() - retention_days * 86400,))
+
+    def load(self, feed_key):
+        """Return (last_published, validator, seen_ids) for feed_key."""
+        with sqlite_connection(self.db_path) as conn:
+            row = conn.execute(
+                'SELECT last_published, validator FROM feed_watermarks WHERE feed_key = ?', (feed_key,)
+            ).fetchone()
+            seen = conn.execute('SELECT entry_id FROM feed_seen WHERE feed_key = ?', (feed_key,)).fetchall()
+        last_published, validator = row if row else (None, None)
+        return last_published, validator, {entry_id for (entry_id,) in seen}
+
+    def commit(self, marks):
+        """Persist marks: {feed_key: {"last_published", "validator", "entry_ids"}}."""
+        now = time.time()
+        with self._lock, sqlite_connection(self.db_path) as conn:
+            for feed_key, mark in marks.items():
+                previous = conn.execute(
+                    'SELECT last_published FROM feed_watermarks WHERE feed_key = ?', (feed_key,)
+                ).fetchone()
+                last_published = max(filter(None, [mark.get("last_published"), previous[0] if previous else None]), default=None)
+                conn.execute(
+                    'INSERT OR REPLACE INTO feed_watermarks (feed_key, last_published, validator, updated_at) VALUES (?, ?, ?, ?)',
+                    (feed_key, last_published, mark.get("validator"), now)
+                )
+                conn.executemany(
+                    'INSERT OR REPLACE INTO feed_seen (feed_key, entry_id, seen_at) VALUES (?, ?, ?)',
+                    [(feed_key, entry_id, now) for entry_id in mark.get("entry_ids", [])]
+                )
+
+
+class FeedWatermarks:
+    """
+    A scraper's view of the watermark store: filters parsed entries and collects
+    the marks to commit once the scraper's run has completed.
+    """
+
+    def __init__(self, store, prefix, grace_hours=24):
+        self.store = store
+        self.prefix = prefix
+        self.grace_seconds = grace_hours * 3600
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config, prefix):
+        """Watermarks for one scraper/metro from the `feed_watermarks` section, or None if disabled."""
+        settings = (config or {}).get('feed_watermarks', {}) or {}
+        if not settings.get('enabled', True):
+            return None
+        store = FeedWatermarkStore(
+            settings.get('path') or data_path("feed_watermarks.sqlite3"),
+            retention_days=settings.get('retention_days', 14),
+        )
+        return cls(store, prefix, settings.get('grace_hours', 24))
+
+    def _key(self, feed_url):
+        return f"{self.prefix}|{feed_url}"
+
+    @staticmethod
+    def _validator(response):
+        return response.headers.get("etag") or response.headers.get("last-modified")
+
+    @staticmethod
+    def entry_id(entry):
+        return entry.get('id') or entry.get('link') or entry.get('title', '')
+
+    @staticmethod
+    def published_ts(entry):
+        parsed = entry.get('published_parsed') or entry.get('updated_parsed')
+        return calendar.timegm(parsed) if parsed else None
+
+    def is_unchanged(self, feed_url, response):
+        """True if the server confirmed (304) the exact feed version we committed last time."""
+        if not getattr(response, "not_modified", False):
+            return False
+        validator = self._validator(response)
+        return bool(validator) and validator == self.store.load(self._key(feed_url))[1]
+
+    def new_entries(self, feed_url, response, entries):
+        """Drop entries already seen or older than the watermark; remember the rest as pending."""
+        key = self._key(feed_url)
+        last_published, _, seen = self.store.load(key)
+        cutoff = last_published - self.grace_seconds if last_published else None
+
+        fresh = []
+        newest = None
+        for entry in entries:
+            entry_id = self.entry_id(entry)
+            published = self.published_ts(entry)
+            if published and (newest is None or published > newest):
+                newest = published
+            if entry_id in seen or (cutoff and published and published < cutoff):
+                continue
+            fresh.append(entry)
+
+        with self._lock:
+            self._pending[key] = {
+                "last_published": newest,
+                "validator": self._validator(response),
+                "entry_ids": [self.entry_id(entry) for entry in fresh],
+            }
+        return fresh
+
+    def reset(self):
+        """Forget pending marks (start of a new run of a long-lived scraper)."""
+        with self._lock:
+            self._pending = {}
+
+    def pending(self):
+        """Marks collected since the scraper started (JSON-serializable, so they can be checkpointed)."""
+        with self._lock:
+            return dict(self._pending)
+
+    def commit(self, marks=None):
+        self.store.commit(self.pending() if marks is None else marks)
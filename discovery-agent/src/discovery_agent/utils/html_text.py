@@ -0,0 +1,65 @@
+"""
+HTML-to-text cleanup for feed summaries.
+
+RSS descriptions usually arrive as HTML fragments (links, images, tracking
+markup). Both RSS scrapers strip them to plain text before filtering and before
+the text goes into an LLM prompt.
+
+Well-formed fragments go through a single-pass regex tag stripper and html.unescape,
+which is far cheaper than building a BeautifulSoup tree per entry. Anything the
+stripper can't account for (a stray "<", an unterminated tag or comment) falls back
+to BeautifulSoup, so the output matches `get_text(separator=" ", strip=True)`.
+"""
+
+import html
+import re
+
+# Comments, script/style blocks (whose text BeautifulSoup's get_text also skips), and
+# tags, allowing ">" inside quoted attribute values. CDATA sections are left for the fallback.
+_MARKUP_RE = re.compile(
+    r"<!--.*?-->"
+    r"|<(script|style)\b(?:[^>\"']|\"[^\"]*\"|'[^']*')*>.*?</\1\s*>"
+    r"|<(?!!\[)[A-Za-z/!?](?:[^>\"']|\"[^\"]*\"|'[^']*')*>",
+    re.DOTALL | re.IGNORECASE,
+)
+
+
+def strip_html(raw_summary):
+    """
+    Fast path: visible text of a well-formed fragment, or None if the markup looks
+    malformed and needs a real parser.
+    """
+    if "<" not in raw_summary:
+        text = html.unescape(raw_summary) if "&" in raw_summary else raw_summary
+        return text.strip()
+
+    parts = []
+    for piece in _MARKUP_RE.sub("\x00", raw_summary).split("\x00"):
+        if "<" in piece:
+            return None
+        if "&" in piece:
+            piece = html.unescape(piece)
+        piece = piece.strip()
+        if piece:
+            parts.append(piece)
+    return " ".join(parts)
+
+
+def clean_html_summary(raw_summary):
+    """Return the visible text of an HTML fragment, or the raw string if parsing fails."""
+    if not raw_summary:
+        return raw_summary
+    text = strip_html(raw_summary)
+    if text is not None:
+        return text
+    return _clean_with_soup(raw_summary)
+
+
+def _clean_with_soup(raw_summary):
+    # Imported here: the fast path handles nearly every feed entry
+    try:
+        from bs4 import BeautifulSoup
+        soup = BeautifulSoup(raw_summary, "html.parser")
+        return soup.get_text(separator=" ", strip=True)
+    except Exception:
+        return raw_summary # Fallback to raw if BS4 fails
@@ -0,0 +1,237 @@
+"""
+Persistent conditional-GET cache for the shared HTTP client.
+
+Successful GET responses are stored in SQLite (body, headers, ETag and
+Last-Modified). Within a short freshness window a cached response is served
+without touching the network; this is what lets both news scrapers share one
+download of a feed they both read (e.g. dallasinnovates). After that the
+request is revalidated with If-None-Match / If-Modified-Since and a 304 is
+answered from disk. Entries expire after a TTL and the store is trimmed to a
+size cap, least recently used first.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+import urllib.parse
+from contextlib import contextmanager
+
+from requests import Request
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from discovery_agent.utils.config import data_path
+from discovery_agent.utils.metrics import get_metrics
+from discovery_agent.utils.sqlite_helpers import sqlite_connection
+
+# Response headers worth replaying from the cache. Not content-encoding: the stored body
+# is already decoded, so replaying "gzip" would misdescribe it
+_STORED_HEADERS = ("content-type", "etag", "last-modified", "cache-control", "date")
+
+
+class CacheEntry:
+    """A stored response."""
+
+    def __init__(self, url, body, headers, stored_at):
+        self.url = url
+        self.body = body
+        self.headers = headers
+        self.stored_at = stored_at
+
+    def age(self):
+        return time.time() - self.stored_at
+
+    def conditional_headers(self):
+        headers = {}
+        if self.headers.get("etag"):
+            headers["If-None-Match"] = self.headers["etag"]
+        if self.headers.get("last-modified"):
+            headers["If-Modified-Since"] = self.headers["last-modified"]
+        return headers
+
+    def to_response(self, not_modified=False):
+        """
+        Rebuild a 200 requests.Response. from_cache is True on every cached response;
+        not_modified is True when the server confirmed (304) the body is unchanged.
+        """
+        response = Response()
+        response.status_code = 200
+        response._content = self.body
+        response.headers = CaseInsensitiveDict(self.headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = self.url
+        response.reason = "OK"
+        response.from_cache = True
+        response.not_modified = not_modified
+        return response
+
+
+class HttpCache:
+    """SQLite-backed response store with freshness window, TTL eviction and a size cap."""
+
+    def __init__(self, db_path, ttl_seconds=3 * 24 * 3600, max_bytes=200 * 1024 * 1024, fresh_seconds=600, hosts=None):
+        self.logger = logging.getLogger(__name__)
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.fresh_seconds = fresh_seconds
+        # Per-host overrides: {host: {"fresh_seconds": s}}
+        self.hosts = hosts or {}
+        # One lock per URL being fetched: concurrent requests for the same URL wait for one
+        # download, requests for other URLs don't wait at all. {url: [lock, holders]}
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+        with sqlite_connection(self.db_path) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS responses (
+                    url_hash TEXT PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    headers TEXT NOT NULL,
+                    body BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    stored_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            ''')
+        self.evict()
+
+    @classmethod
+    def from_config(cls, config):
+        """Build the cache from the `http_cache` section of config.yaml, or return None if disabled."""
+        settings = (config or {}).get('http_cache', {}) or {}
+        if not settings.get('enabled', True):
+            return None
+        return cls(
+            settings.get('path') or data_path("http_cache.sqlite3"),
+            ttl_seconds=settings.get('ttl_hours', 72) * 3600,
+            max_bytes=int(settings.get('max_mb', 200) * 1024 * 1024),
+            fresh_seconds=settings.get('fresh_seconds', 600),
+            hosts=settings.get('hosts'),
+        )
+
+    @staticmethod
+    def _hash(url):
+        return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+    @contextmanager
+    def lock_for(self, url):
+        """Hold url's lock; it is dropped again once nobody holds or waits for it."""
+        with self._locks_guard:
+            slot = self._locks.setdefault(url, [threading.Lock(), 0])
+            slot[1] += 1
+        try:
+            with slot[0]:
+                yield
+        finally:
+            with self._locks_guard:
+                slot[1] -= 1
+                if not slot[1]:
+                    del self._locks[url]
+
+    def fresh_seconds_for(self, url):
+        host = urllib.parse.urlparse(url).netloc.lower()
+        return (self.hosts.get(host) or {}).get('fresh_seconds', self.fresh_seconds)
+
+    def is_fresh(self, url, entry):
+        return entry is not None and entry.age() < self.fresh_seconds_for(url)
+
+    def fresh(self, url, params=None):
+        """The cached response for url if it is within its freshness window (no request needed), else None."""
+        key = Request("GET", url, params=params).prepare().url
+        entry = self.get(key)
+        if not self.is_fresh(key, entry):
+            return None
+        get_metrics().record("http_cache", "fresh_hit", items_out=1)
+        return entry.to_response()
+
+    def get(self, url):
+        with sqlite_connection(self.db_path) as conn:
+            row = conn.execute(
+                'SELECT headers, body, stored_at FROM responses WHERE url_hash = ?', (self._hash(url),)
+            ).fetchone()
+            if row is None:
+                return None
+            if time.time() - row[2] > self.ttl_seconds:
+                conn.execute('DELETE FROM responses WHERE url_hash = ?', (self._hash(url),))
+                return None
+            conn.execute('UPDATE responses SET last_used = ? WHERE url_hash = ?', (time.time(), self._hash(url)))
+        # Entries stored before content-encoding was dropped from _STORED_HEADERS may still carry it
+        headers = {name: value for name, value in json.loads(row[0]).items() if name in _STORED_HEADERS}
+        return CacheEntry(url, row[1], headers, row[2])
+
+    def put(self, url, response):
+        """Store a 200 response unless the server forbids it."""
+        if "no-store" in response.headers.get("cache-control", "").lower():
+            return
+        headers = {name: response.headers[name] for name in _STORED_HEADERS if name in response.headers}
+        body = response.content
+        now = time.time()
+        with sqlite_connection(self.db_path) as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO responses (url_hash, url, headers, body, size, stored_at, last_used) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (self._hash(url), url, json.dumps(headers), body, len(body), now, now)
+            )
+        self._trim()
+
+    def revalidated(self, url, response):
+        """Mark an entry as fresh again after a 304, picking up any new validators."""
+        updates = {name: response.headers[name] for name in ("etag", "last-modified", "date") if name in response.headers}
+        with sqlite_connection(self.db_path) as conn:
+            row = conn.execute('SELECT headers FROM responses WHERE url_hash = ?', (self._hash(url),)).fetchone()
+            if row is None:
+                return
+            headers = json.loads(row[0])
+            headers.update(updates)
+            conn.execute(
+                'UPDATE responses SET headers = ?, stored_at = ?, last_used = ? WHERE url_hash = ?',
+                (json.dumps(headers), time.time(), time.time(), self._hash(url))
+            )
+
+    def evict(self):
+        """Drop entries older than the TTL, then trim to the size cap."""
+        with sqlite_connection(self.db_path) as conn:
+            conn.execute('DELETE FROM responses WHERE stored_at < ?', (time.time() - self.ttl_seconds,))
+        self._trim()
+
+    def _trim(self):
+        with sqlite_connection(self.db_path) as conn:
+            total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            # Least recently used first
+            for url_hash, size in conn.execute('SELECT url_hash, size FROM responses ORDER BY last_used').fetchall():
+                conn.execute('DELETE FROM responses WHERE url_hash = ?', (url_hash,))
+                total -= size
+                if total <= self.max_bytes:
+                    break
+
+    def fetch(self, url, send, params=None, headers=None):
+        """
+        GET through the cache. send(url, params, headers) performs the real request.
+        Returns a requests.Response (a rebuilt one when served from disk).
+        """
+        key = Request("GET", url, params=params).prepare().url
+        metrics = get_metrics()
+        with self.lock_for(key):
+            entry = self.get(key)
+            if self.is_fresh(key, entry):
+                metrics.record("http_cache", "fresh_hit", items_out=1)
+                return entry.to_response()
+
+            request_headers = dict(headers or {})
+            if entry is not None:
+                request_headers.update(entry.conditional_headers())
+            response = send(url, params, request_headers)
+
+            if response.status_code == 304 and entry is not None:
+                self.revalidated(key, response)
+                metrics.record("http_cache", "not_modified", items_out=1)
+                return entry.to_response(not_modified=True)
+            if response.status_code == 200:
+                self.put(key, response)
+            metrics.record("http_cache", "miss", items_out=1)
+            return response
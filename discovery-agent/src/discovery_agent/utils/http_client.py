@@ -0,0 +1,159 @@
+"""
+Shared HTTP client for all scrapers.
+
+One requests.Session per process with per-host connection pools, so repeated
+calls to the same host (news.google.com, JSearch, Dallas Open Data) reuse
+keep-alive TCP/TLS connections instead of opening a new one per request.
+Idempotent requests are retried with exponential backoff on connection errors,
+429 and 5xx responses, honoring Retry-After (capped so a misbehaving server
+can't stall a run). A retry waits for rate-limit tokens like any other request. Timeouts come from the `http` section of config.yaml.
+GET responses go through the on-disk conditional-GET cache (utils/http_cache.py)
+unless it is disabled under `http_cache`, and requests that do hit the network
+wait for their host's (and API key's) token bucket (utils/rate_limiter.py).
+"""
+
+import logging
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from discovery_agent.utils.http_cache import HttpCache
+from discovery_agent.utils.rate_limiter import get_rate_limiter
+
+DEFAULT_USER_AGENT = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+    'Chrome/91.0.4472.124 Safari/537.36'
+)
+
+
+class CappedRetry(Retry):
+    """urllib3 Retry whose backoff and Retry-After waits are bounded."""
+
+    max_backoff = 30.0
+    max_retry_after = 60.0
+    # Called before every resend, once the backoff is over (HttpClient waits for tokens there)
+    before_resend = None
+
+    def new(self, **kwargs):
+        retry = super().new(**kwargs)
+        retry.max_backoff = self.max_backoff
+        retry.max_retry_after = self.max_retry_after
+        retry.before_resend = self.before_resend
+        return retry
+
+    def sleep(self, response=None):
+        super().sleep(response)
+        if self.before_resend is not None:
+            self.before_resend()
+
+    def get_backoff_time(self):
+        return min(super().get_backoff_time(), self.max_backoff)
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, self.max_retry_after)
+
+
+class HttpClient:
+    """Pooled, retrying HTTP client. Safe to share between the orchestrator's worker threads."""
+
+    def __init__(self, connect_timeout=5.0, read_timeout=20.0, max_retries=3, backoff_factor=1.0,
+                 max_backoff=30.0, max_retry_after=60.0, pool_connections=20, pool_maxsize=10,
+                 status_forcelist=(429, 500, 502, 503, 504), user_agent=DEFAULT_USER_AGENT, cache=None, rate_limiter=None):
+        self.logger = logging.getLogger(__name__)
+        self.timeout = (connect_timeout, read_timeout)
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        # The buckets of the request in flight on this thread, for its retries
+        self._in_flight = threading.local()
+
+        retry = CappedRetry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=list(status_forcelist),
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            respect_retry_after_header=True,
+            # Hand the last 429/5xx back to the caller instead of raising, so scrapers log the status
+            raise_on_status=False,
+        )
+        retry.max_backoff = max_backoff
+        retry.max_retry_after = max_retry_after
+        retry.before_resend = self._before_resend
+
+        # pool_connections = number of hosts kept pooled, pool_maxsize = connections per host
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers["User-Agent"] = user_agent
+
+    @classmethod
+    def from_config(cls, config):
+        """Build a client from the `http` section of config.yaml."""
+        settings = (config or {}).get('http', {}) or {}
+        return cls(
+            connect_timeout=settings.get('connect_timeout_seconds', 5.0),
+            read_timeout=settings.get('read_timeout_seconds', 20.0),
+            max_retries=settings.get('max_retries', 3),
+            backoff_factor=settings.get('backoff_factor', 1.0),
+            max_backoff=settings.get('max_backoff_seconds', 30.0),
+            max_retry_after=settings.get('max_retry_after_seconds', 60.0),
+            pool_maxsize=settings.get('pool_maxsize', 10),
+            user_agent=settings.get('user_agent') or DEFAULT_USER_AGENT,
+            cache=HttpCache.from_config(config),
+            rate_limiter=get_rate_limiter(config),
+        )
+
+    def get(self, url, params=None, headers=None, timeout=None, use_cache=True, rate_key=None, rate_limited=True, stream=False):
+        """
+        GET url (retried per the client's policy, cached unless use_cache is False).
+        rate_key bills the call to an API key's bucket as well as the host's; pass
+        rate_limited=False if the caller already waited for its tokens. stream=True
+        leaves the body unread for the caller to consume (and close); it bypasses the cache.
+        Connection errors still raise requests exceptions.
+        """
+        def send(url, params, headers):
+            # Only requests that actually go out spend tokens (cache hits don't)
+            if self.rate_limiter is not None and rate_limited:
+                self.rate_limiter.acquire(url, rate_key)
+            self._in_flight.rate = (url, rate_key)
+            try:
+                return self.session.get(url, params=params, headers=headers, timeout=timeout or self.timeout, stream=stream)
+            finally:
+                self._in_flight.rate = None
+
+        if self.cache is None or not use_cache or stream:
+            return send(url, params, headers)
+        return self.cache.fetch(url, send, params, headers)
+
+    def cached(self, url, params=None):
+        """A still-fresh cached response for url, or None if a GET would have to go out."""
+        if self.cache is None:
+            return None
+        return self.cache.fresh(url, params)
+
+    def _before_resend(self):
+        # A retry is another request to the provider: it waits for tokens like the first attempt did
+        rate = getattr(self._in_flight, 'rate', None)
+        if self.rate_limiter is not None and rate is not None:
+            self.rate_limiter.acquire(*rate)
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_http_client(config=None):
+    """Return the process-wide HttpClient, creating it from config on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient.from_config(config)
+        return _client
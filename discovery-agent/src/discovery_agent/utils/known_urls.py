@@ -0,0 +1,89 @@
+"""
+Known-URL filter applied right after feed/API parsing.
+
+Articles and job links that are already leads (the `source_url` column of the
+leads table) would otherwise be fetched, cleaned and analyzed again, only to be
+dropped at insert time by the unique constraint. A KnownUrls index is loaded
+once per scraper run and drops them before they cost any LLM tokens. (Items the
+LLM rejected are skipped by the verdict store instead, see verdict_store.py.)
+
+Small stores are held in a set. Above `bloom_threshold` URLs a Bloom filter keeps
+memory flat; its false positives (about `bloom_error_rate` of new URLs) are
+skipped as if already known.
+"""
+
+import hashlib
+import logging
+import math
+
+from discovery_agent.utils.metrics import get_metrics
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (double hashing of one blake2b digest)."""
+
+    def __init__(self, capacity, error_rate=0.001):
+        capacity = max(1, capacity)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class KnownUrls:
+    """Membership index of lead URLs."""
+
+    def __init__(self, source, index):
+        self.logger = logging.getLogger(__name__)
+        self.source = source
+        self.index = index
+
+    @classmethod
+    def load(cls, config, source, db_writer=None):
+        """
+        Build the index from the pipeline's DatabaseWriter and the `known_urls` config section.
+        Returns None if disabled or without a writer (Excel-only mode: no lead URLs to skip).
+        """
+        settings = (config or {}).get('known_urls', {}) or {}
+        if not settings.get('enabled', True) or db_writer is None:
+            return None
+        logger = logging.getLogger(__name__)
+
+        days = settings.get('lookback_days', 90)
+        total = db_writer.count_source_urls(days)
+
+        with get_metrics().stage(source, "known_urls_load") as stage:
+            if total > settings.get('bloom_threshold', 200000):
+                index = BloomFilter(total, settings.get('bloom_error_rate', 0.001))
+                for url in db_writer.iter_source_urls(days):
+                    index.add(url)
+            else:
+                index = db_writer.get_recent_source_urls(days)
+            stage.items_out = total
+
+        logger.info(f"Loaded {total} known URLs for {source} ({type(index).__name__}).")
+        return cls(source, index)
+
+    def __contains__(self, url):
+        return url in self.index
+
+    def filter(self, items, key):
+        """Return the items whose URL (item[key]) is not known yet."""
+        with get_metrics().stage(self.source, "known_url_filter", len(items)) as stage:
+            fresh = [item for item in items if not item.get(key) or item.get(key) not in self.index]
+            stage.items_out = len(fresh)
+        if len(fresh) < len(items):
+            self.logger.info(f"Skipped {len(items) - len(fresh)} already known URLs.")
+        return fresh
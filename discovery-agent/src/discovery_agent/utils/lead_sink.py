@@ -0,0 +1,132 @@
+"""
+Streaming sink layer for discovered leads.
+
+Scrapers push leads one at a time into a bounded queue (producers block when it
+is full, which gives backpressure). A single background thread drains the queue
+and writes small batches to each target (SQLite, Excel), so leads land in the
+database while other sources are still running and memory stays flat.
+"""
+
+import logging
+import queue
+import threading
+import time
+
+_STOP = object()
+
+
+class SinkTarget:
+    """A batched destination such as DatabaseWriter.save_leads or ExcelWriter.save_leads."""
+
+    def __init__(self, name, write_fn, batch_size=25):
+        self.name = name
+        self.write_fn = write_fn
+        self.batch_size = max(1, int(batch_size))
+        self.buffer = []
+        self.saved = 0
+        self.skipped = 0
+        self.errors = 0
+
+
+class LeadSink:
+    """Bounded, batching lead sink with a single background writer thread."""
+
+    def __init__(self, targets, queue_size=200, flush_interval=5.0):
+        self.logger = logging.getLogger(__name__)
+        self.targets = targets
+        self.flush_interval = flush_interval
+        self.received = 0
+        self._queue = queue.Queue(maxsize=max(1, int(queue_size)))
+        self._thread = None
+
+    @classmethod
+    def from_config(cls, config, excel_writer=None, db_writer=None):
+        """Build a sink for the available writers using the `sink` section of config.yaml."""
+        settings = (config or {}).get('sink', {}) or {}
+        targets = []
+        if db_writer is not None:
+            targets.append(SinkTarget("database", db_writer.save_leads, settings.get('db_batch_size', 25)))
+        if excel_writer is not None:
+            targets.append(SinkTarget("excel", excel_writer.save_leads, settings.get('excel_batch_size', 100)))
+        return cls(
+            targets,
+            queue_size=settings.get('queue_size', 200),
+            flush_interval=settings.get('flush_interval_seconds', 5.0),
+        )
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._drain, name="lead-sink", daemon=True)
+            self._thread.start()
+
+    def put(self, lead):
+        """Queue a lead for writing. Blocks while the queue is full."""
+        self._queue.put(lead)
+
+    def stats(self):
+        """Counts per target, e.g. for reporting a shard's results to the parent process."""
+        return {
+            "received": self.received,
+            "targets": {t.name: {"saved": t.saved, "skipped": t.skipped, "errors": t.errors} for t in self.targets},
+        }
+
+    def close(self):
+        """Flush everything still buffered and stop the writer thread."""
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._thread = None
+
+    def _drain(self):
+        last_flush = time.monotonic()
+        while True:
+            try:
+                lead = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                lead = None
+
+            if lead is _STOP:
+                self._flush_all()
+                return
+
+            if lead is not None:
+                self.received += 1
+                for target in self.targets:
+                    target.buffer.append(lead)
+                    if len(target.buffer) >= target.batch_size:
+                        self._flush(target)
+
+            # Don't let a slow trickle of leads sit in a partially filled batch
+            if time.monotonic() - last_flush >= self.flush_interval:
+                self._flush_all()
+                last_flush = time.monotonic()
+
+    def _flush_all(self):
+        for target in self.targets:
+            self._flush(target)
+
+    def _flush(self, target):
+        if not target.buffer:
+            return
+
+        batch = target.buffer
+        target.buffer = []
+        try:
+            result = target.write_fn(batch)
+            if isinstance(result, tuple):
+                saved, skipped = result
+            else:
+                saved, skipped = len(batch), 0
+            target.saved += saved
+            target.skipped += skipped
+        except Exception as e:
+            target.errors += 1
+            self.logger.error(f"Sink target '{target.name}' failed to write {len(batch)} leads: {e}")
@@ -0,0 +1,43 @@
+"""
+OpenAI / Azure OpenAI client setup shared by the scrapers.
+
+The openai package is only imported once a client is actually built, so commands
+that never call the LLM (e.g. `stats`) don't pay for it at startup. Clients are
+built without retries of their own: calls go through utils/llm_executor.py, which
+retries within the shared request and token budgets.
+"""
+
+import logging
+
+DEFAULT_MODEL = "gpt-4o-mini"
+
+
+def create_llm_client(api_keys, purpose=""):
+    """
+    Build a chat client from the `api_keys` section of config.yaml.
+    Returns (client, model_name); client is None when no usable key is configured.
+    """
+    logger = logging.getLogger(__name__)
+    api_keys = api_keys or {}
+    openai_key = api_keys.get('openai_api_key', '')
+    azure_endpoint = api_keys.get('azure_openai_endpoint', '')
+
+    if not openai_key or "YOUR_" in openai_key:
+        logger.warning("OpenAI API Key not found. AI filtering disabled.")
+        return None, None
+
+    if azure_endpoint and "YOUR_" not in azure_endpoint:
+        from openai import AzureOpenAI
+        # Use Azure OpenAI
+        logger.info(f"Initializing Azure OpenAI Client{' for ' + purpose if purpose else ''}...")
+        client = AzureOpenAI(
+            api_key=openai_key,
+            api_version=api_keys.get('azure_api_version', '2024-02-15-preview'),
+            azure_endpoint=azure_endpoint,
+            max_retries=0
+        )
+        return client, api_keys.get('azure_deployment_name', DEFAULT_MODEL)
+
+    from openai import OpenAI
+    # Use Standard OpenAI
+    return OpenAI(api_key=openai_key, max_retries=0), DEFAULT_MODEL
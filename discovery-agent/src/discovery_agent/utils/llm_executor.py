@@ -0,0 +1,198 @@
+"""
+Concurrent LLM calls within request and token budgets.
+
+The scrapers used to send one analysis batch at a time and wait for each chat
+completion in turn, so a run with 30 batches spent nearly all of its time on the
+network. LLMExecutor.map runs a scraper's batches on up to `max_concurrency`
+threads and yields their results in batch order. Every chat completion goes
+through LLMExecutor.complete, which enforces the limits. The executor is shared
+by the whole process (get_llm_executor), so the limits hold for all sources that
+run in parallel in that process. They are not shared between processes: with
+several metro shards, run_shards builds each shard's executor from an equal share
+of the budgets (shards.shard_config), so together they stay within them.
+
+- At most `max_concurrency` completions are in flight at once.
+- Each call waits for one request from the `requests_per_minute` bucket and for
+  its estimated tokens from the `tokens_per_minute` bucket. Both are TokenBuckets
+  from utils/rate_limiter.py. The estimate is prompt characters / 4 plus the
+  expected completion. Once the API reports the call's actual usage, the token
+  bucket is corrected by the difference.
+- The executor retries the errors the openai client would retry (429, 408, 409,
+  5xx, connection errors) up to `max_retries` times. A 429 waits as long as its
+  headers ask (retry-after-ms, retry-after, x-ratelimit-reset-*), and every call
+  pauses for that wait, not only the throttled one. Errors without a hint use
+  capped exponential backoff.
+"""
+
+import logging
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from discovery_agent.utils.rate_limiter import TokenBucket
+
+# Rough characters per token of English prompt text
+CHARS_PER_TOKEN = 4
+# Budget that can be spent back to back, in seconds of refill
+BURST_SECONDS = 10
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+
+
+def estimate_tokens(text):
+    return len(text or "") // CHARS_PER_TOKEN + 1
+
+
+def parse_duration(value):
+    """'20ms', '1.5s', '6m0s' or '30' (seconds) -> seconds, or None if unreadable."""
+    text = str(value or "").strip().lower()
+    if not text:
+        return None
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(text)
+    if not parts or "".join(number + unit for number, unit in parts) != text:
+        return None
+    scale = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    return sum(float(number) * scale[unit] for number, unit in parts)
+
+
+def retry_hint(error):
+    """Seconds a rate-limited response asked the caller to wait, or None."""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    milliseconds = parse_duration(headers.get('retry-after-ms'))
+    if milliseconds is not None:
+        return milliseconds / 1000
+    seconds = parse_duration(headers.get('retry-after'))
+    if seconds is not None:
+        return seconds
+    resets = [parse_duration(headers.get(name)) for name in ('x-ratelimit-reset-requests', 'x-ratelimit-reset-tokens')]
+    resets = [reset for reset in resets if reset is not None]
+    return max(resets) if resets else None
+
+
+def is_retryable(error):
+    """The errors the openai client itself retries: 408, 409, 429, 5xx and connection errors."""
+    status = getattr(error, 'status_code', None)
+    if status is not None:
+        return status in (408, 409, 429) or status >= 500
+    # APIConnectionError / APITimeoutError never got a response
+    return type(error).__name__ in ("APIConnectionError", "APITimeoutError")
+
+
+class LLMExecutor:
+    """Runs chat completions concurrently within the configured request and token budgets."""
+
+    def __init__(self, max_concurrency=4, requests_per_minute=60, tokens_per_minute=100000,
+                 expected_completion_tokens=1000, max_retries=5, backoff_factor=2.0, max_backoff=60.0):
+        self.logger = logging.getLogger(__name__)
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.expected_completion_tokens = expected_completion_tokens
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.request_bucket = None
+        if requests_per_minute:
+            rate = requests_per_minute / 60.0
+            self.request_bucket = TokenBucket(rate, max(1.0, rate * BURST_SECONDS))
+        self.token_bucket = None
+        if tokens_per_minute:
+            rate = tokens_per_minute / 60.0
+            self.token_bucket = TokenBucket(rate, rate * BURST_SECONDS)
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+
+    @classmethod
+    def from_config(cls, config):
+        """Build the executor from the `llm_executor` section of config.yaml."""
+        settings = (config or {}).get('llm_executor', {}) or {}
+        return cls(
+            max_concurrency=settings.get('max_concurrency', 4),
+            requests_per_minute=settings.get('requests_per_minute', 60),
+            tokens_per_minute=settings.get('tokens_per_minute', 100000),
+            expected_completion_tokens=settings.get('expected_completion_tokens', 1000),
+            max_retries=settings.get('max_retries', 5),
+            max_backoff=settings.get('max_backoff_seconds', 60.0),
+        )
+
+    def map(self, fn, items):
+        """fn(item) for every item, max_concurrency at a time. Results are yielded in item order."""
+        items = list(items)
+        if self.max_concurrency == 1 or len(items) <= 1:
+            for item in items:
+                yield fn(item)
+            return
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(items)), thread_name_prefix="llm") as pool:
+            yield from pool.map(fn, items)
+
+    def complete(self, client, messages, expected_completion_tokens=None, **kwargs):
+        """client.chat.completions.create(messages=messages, **kwargs) within the budgets, with retries."""
+        estimate = sum(estimate_tokens(message.get('content')) for message in messages)
+        estimate += expected_completion_tokens or self.expected_completion_tokens
+        attempt = 0
+        while True:
+            self._wait_for_budget(estimate)
+            try:
+                with self._slots:
+                    response = client.chat.completions.create(messages=messages, **kwargs)
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    raise
+                attempt += 1
+                self._back_off(e, attempt)
+                continue
+            self._settle(estimate, response)
+            return response
+
+    def _wait_for_budget(self, estimate):
+        with self._lock:
+            pause = self._paused_until - time.monotonic()
+        if pause > 0:
+            time.sleep(pause)
+        if self.request_bucket is not None:
+            self.request_bucket.acquire()
+        if self.token_bucket is not None:
+            self.token_bucket.acquire(estimate)
+
+    def _back_off(self, error, attempt):
+        hint = retry_hint(error)
+        if hint is None:
+            wait = min(self.max_backoff, self.backoff_factor * 2 ** (attempt - 1))
+        else:
+            wait = min(self.max_backoff, hint)
+        # Jitter, so the paused calls don't all go out again at the same instant
+        wait += random.uniform(0, 0.5)
+        if getattr(error, 'status_code', None) == 429:
+            # The budget is exhausted for every caller, not just this one
+            with self._lock:
+                self._paused_until = max(self._paused_until, time.monotonic() + wait)
+            self.logger.warning(f"LLM rate limited; pausing calls for {wait:.1f}s (retry {attempt}/{self.max_retries}).")
+        else:
+            self.logger.warning(f"LLM call failed ({error}); retrying in {wait:.1f}s ({attempt}/{self.max_retries}).")
+        time.sleep(wait)
+
+    def _settle(self, estimate, response):
+        usage = getattr(response, 'usage', None)
+        actual = getattr(usage, 'total_tokens', None)
+        if self.token_bucket is not None and actual:
+            # Charge (or refund) the difference between the estimate and the real usage
+            self.token_bucket.reserve(actual - estimate)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_llm_executor(config=None):
+    """Return the process-wide LLMExecutor, creating it from config on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = LLMExecutor.from_config(config)
+        return _executor
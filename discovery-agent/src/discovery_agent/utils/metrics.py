@@ -0,0 +1,202 @@
+"""
+Per-stage run metrics for the discovery agent.
+
+Every stage of a run (feed fetching, HTML cleanup, dedup, LLM batches, Excel/DB
+saves, ...) records its wall-clock span, the summed duration of its calls (which
+overlap when the stage runs concurrently), items in/out and error counts into a process-wide
+RunMetrics, much like loggers are looked up by name. At the end of a run the
+numbers are written as a JSON report plus a Prometheus textfile so runs can be
+compared over time.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from discovery_agent.utils.config import data_path
+
+
+class StageStats:
+    """Accumulated numbers for one (source, stage) pair."""
+
+    def __init__(self):
+        self.calls = 0
+        # Summed call durations, and the span from the first call's start to the last call's end
+        self.busy_seconds = 0.0
+        self.first_start = None
+        self.last_end = None
+        self.max_seconds = 0.0
+        self.items_in = 0
+        self.items_out = 0
+        self.errors = 0
+
+    @property
+    def seconds(self):
+        """Wall time from the first call's start to the last call's end."""
+        if self.first_start is None:
+            return 0.0
+        return self.last_end - self.first_start
+
+    def to_dict(self):
+        return {
+            "calls": self.calls,
+            "seconds": round(self.seconds, 6),
+            "busy_seconds": round(self.busy_seconds, 6),
+            "max_seconds": round(self.max_seconds, 6),
+            "items_in": self.items_in,
+            "items_out": self.items_out,
+            "errors": self.errors,
+        }
+
+
+class StageTimer:
+    """Handle yielded by RunMetrics.stage() so the caller can report item counts."""
+
+    def __init__(self, items_in=0):
+        self.items_in = items_in
+        self.items_out = 0
+        self.errors = 0
+
+
+class RunMetrics:
+    """Thread-safe collection of per-stage timings and counts for one run."""
+
+    def __init__(self, run_id=None, labels=None):
+        self.run_id = run_id
+        self.labels = labels or {}
+        self.started_at = datetime.now()
+        self._stages = {}
+        self._lock = threading.Lock()
+
+    def record(self, source, stage, seconds=0.0, items_in=0, items_out=0, errors=0):
+        """Count one call of the stage that took seconds and ended now."""
+        ended = time.perf_counter()
+        with self._lock:
+            stats = self._stages.setdefault((source, stage), StageStats())
+            stats.calls += 1
+            stats.busy_seconds += seconds
+            started = ended - seconds
+            stats.first_start = started if stats.first_start is None else min(stats.first_start, started)
+            stats.last_end = ended if stats.last_end is None else max(stats.last_end, ended)
+            stats.max_seconds = max(stats.max_seconds, seconds)
+            stats.items_in += items_in
+            stats.items_out += items_out
+            stats.errors += errors
+
+    def record_error(self, source, stage, errors=1):
+        """Count an error that was handled inside a stage (without counting another call)."""
+        with self._lock:
+            self._stages.setdefault((source, stage), StageStats()).errors += errors
+
+    @contextmanager
+    def stage(self, source, stage, items_in=0):
+        """Time a block. Set timer.items_out / timer.errors inside it; an exception counts as an error."""
+        timer = StageTimer(items_in)
+        started = time.perf_counter()
+        try:
+            yield timer
+        except Exception:
+            timer.errors += 1
+            raise
+        finally:
+            self.record(source, stage, time.perf_counter() - started, timer.items_in, timer.items_out, timer.errors)
+
+    def to_dict(self):
+        with self._lock:
+            stages = [
+                dict(source=source, stage=stage, **stats.to_dict())
+                for (source, stage), stats in sorted(self._stages.items())
+            ]
+        return {
+            "run_id": self.run_id,
+            "labels": self.labels,
+            "started_at": self.started_at.isoformat(),
+            "finished_at": datetime.now().isoformat(),
+            "stages": stages,
+        }
+
+    def write_json(self, path):
+        _atomic_write(path, json.dumps(self.to_dict(), indent=2))
+
+    def write_prometheus(self, path):
+        """Write the run as a node_exporter textfile-collector file (gauges for the last run)."""
+        report = self.to_dict()
+        metrics = [
+            ("seconds", "discovery_last_run_stage_seconds", "Wall time from the stage's first start to its last end."),
+            ("busy_seconds", "discovery_last_run_stage_busy_seconds", "Summed duration of the stage's calls."),
+            ("max_seconds", "discovery_last_run_stage_max_seconds", "Longest single call of the stage."),
+            ("calls", "discovery_last_run_stage_calls", "Number of times the stage ran."),
+            ("items_in", "discovery_last_run_stage_items_in", "Items handed to the stage."),
+            ("items_out", "discovery_last_run_stage_items_out", "Items produced by the stage."),
+            ("errors", "discovery_last_run_stage_errors", "Errors raised or logged by the stage."),
+        ]
+
+        lines = []
+        for key, name, help_text in metrics:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            for row in report["stages"]:
+                labels = dict(self.labels, source=row["source"], stage=row["stage"])
+                lines.append(f"{name}{{{_format_labels(labels)}}} {row[key]}")
+
+        lines.append("# HELP discovery_last_run_finished_timestamp_seconds Unix time the last run finished.")
+        lines.append("# TYPE discovery_last_run_finished_timestamp_seconds gauge")
+        label_text = _format_labels(self.labels)
+        lines.append(f"discovery_last_run_finished_timestamp_seconds{{{label_text}}} {time.time():.0f}")
+        _atomic_write(path, "\n".join(lines) + "\n")
+
+    def write_reports(self, metrics_dir, suffix="", textfile_dir=None):
+        """
+        Write run_<id><suffix>.json into metrics_dir and discovery_agent<suffix>.prom into
+        textfile_dir (defaults to metrics_dir).
+        """
+        textfile_dir = textfile_dir or metrics_dir
+        for directory in (metrics_dir, textfile_dir):
+            if not os.path.exists(directory):
+                os.makedirs(directory, exist_ok=True)
+        json_path = os.path.join(metrics_dir, f"run_{self.run_id or 'adhoc'}{suffix}.json")
+        prom_path = os.path.join(textfile_dir, f"discovery_agent{suffix}.prom")
+        self.write_json(json_path)
+        self.write_prometheus(prom_path)
+        return json_path, prom_path
+
+
+def _format_labels(labels):
+    def escape(value):
+        return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+    return ",".join(f'{key}="{escape(value)}"' for key, value in sorted(labels.items()))
+
+
+def _atomic_write(path, text):
+    # Write then rename so readers (e.g. the textfile collector) never see a partial file
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+_current = RunMetrics()
+_current_lock = threading.Lock()
+
+
+def get_metrics():
+    """Return the RunMetrics for the run in progress in this process."""
+    return _current
+
+
+def write_run_reports(config, suffix=""):
+    """Write the current run's reports to the directories configured under `metrics`."""
+    settings = (config or {}).get('metrics', {}) or {}
+    metrics_dir = settings.get('dir') or data_path("metrics")
+    return get_metrics().write_reports(metrics_dir, suffix, settings.get('prometheus_textfile_dir'))
+
+
+def reset_metrics(run_id=None, **labels):
+    """Start a fresh RunMetrics (e.g. at the start of a run or a shard) and return it."""
+    global _current
+    with _current_lock:
+        _current = RunMetrics(run_id, labels)
+    return _current
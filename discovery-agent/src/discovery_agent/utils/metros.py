@@ -0,0 +1,119 @@
+"""
+Metro definitions for discovery.
+
+Everything location-specific the scrapers used to hardcode (JSearch location,
+the city OR-clauses in the Google News queries, the client-side location filter,
+regional direct feeds) lives on a Metro, built from the `metros` list in
+config.yaml. Without that section the agent falls back to DFW.
+"""
+
+# Built-in DFW definition (the values the scrapers originally shipped with)
+DFW_METRO = {
+    "name": "dfw",
+    "display_name": "Dallas/Fort Worth",
+    "short_name": "DFW",
+    "location": "Dallas, TX",
+    "counties": ["Dallas", "Tarrant", "Collin"],
+    "core_cities": ["Dallas", "Plano", "Frisco", "Irving"],
+    "extended_cities": ["Dallas", "Fort Worth", "Plano", "Frisco", "Irving", "Southlake", "Allen"],
+    # Real estate query #3 ("new office"): the core cities plus Southlake and Allen
+    "new_office_cities": ["Dallas", "Plano", "Frisco", "Irving", "Southlake", "Allen"],
+    "funding_cities": ["Dallas", "Plano", "Frisco", "Irving", "Richardson", "Addison"],
+    # The funding scraper filtered on a shorter place list and labeled its leads Dallas/Collin
+    "funding_target_locations": [
+        "dallas", "fort worth", "dfw", "metroplex", "arlington", "plano", "garland",
+        "irving", "mckinney", "frisco", "grand prairie", "mesquite", "denton",
+        "richardson", "lewisville", "addison", "allen", "southlake", "grapevine",
+        "coppell", "rockwall", "carrollton", "farmers branch", "the colony",
+        "flower mound", "keller"
+    ],
+    "funding_counties": ["Dallas", "Collin"],
+    "regional_terms": ["DFW", "Dallas-Fort Worth"],
+    "target_locations": [
+        "dallas", "fort worth", "dfw", "metroplex", "arlington", "plano", "garland",
+        "irving", "mckinney", "frisco", "grand prairie", "mesquite", "denton",
+        "richardson", "lewisville", "addison", "allen", "southlake", "grapevine",
+        "coppell", "rockwall", "carrollton", "farmers branch", "the colony",
+        "flower mound", "keller", "burleson", "mansfield", "north richland hills",
+        "euless", "bedford", "hurst", "lancaster", "desoto", "cedar hill",
+        "las colinas", "legacy west", "uptown", "deep ellum", "bishop arts"
+    ],
+    "realestate_feeds": [
+        "https://rss.bizjournals.com/feed/225b05c17d74d990c84b5a662dbead1d328d16cf/14001?market=dallas&selectortype=channel&selectorvalue=1,2,3,4,5,9,7,15",
+        "https://www.bisnow.com/rss/dallas-ft-worth",
+        "https://fortworthbusiness.com/feed/",
+        "https://dallasinnovates.com/feed/"
+    ],
+    "funding_feeds": [
+        "https://dallasinnovates.com/feed/", # Excellent for local funding
+        "https://techcrunch.com/feed/",      # National, needs filtering
+        "https://feeds.feedburner.com/venturebeat/SZYF" # VentureBeat
+    ],
+}
+
+
+class Metro:
+    """A metro area the scrapers can be pointed at."""
+
+    def __init__(self, settings):
+        self.name = settings['name']
+        self.display_name = settings.get('display_name', self.name)
+        self.short_name = settings.get('short_name', self.name.upper())
+        self.location = settings['location']
+        self.counties = settings.get('counties', [])
+        self.core_cities = settings.get('core_cities', [])
+        self.extended_cities = settings.get('extended_cities', self.core_cities)
+        self.new_office_cities = settings.get('new_office_cities', self.extended_cities)
+        self.funding_cities = settings.get('funding_cities', self.core_cities)
+        self.regional_terms = settings.get('regional_terms', [])
+        self.target_locations = [loc.lower() for loc in settings.get('target_locations', [])]
+        self.funding_target_locations = [loc.lower() for loc in settings.get('funding_target_locations', [])] or self.target_locations
+        self.funding_counties = settings.get('funding_counties', self.counties)
+        self.realestate_feeds = settings.get('realestate_feeds', [])
+        self.funding_feeds = settings.get('funding_feeds', [])
+        self.settings = settings
+        self._matchers = {}
+
+    def _matcher(self, locations):
+        # Compiled once per place list, on first use
+        key = tuple(locations)
+        if key not in self._matchers:
+            from discovery_agent.utils.location_matcher import LocationMatcher
+            self._matchers[key] = LocationMatcher(locations)
+        return self._matchers[key]
+
+    @property
+    def location_matcher(self):
+        """Compiled matcher for target_locations."""
+        return self._matcher(self.target_locations)
+
+    @property
+    def funding_location_matcher(self):
+        """Compiled matcher for funding_target_locations."""
+        return self._matcher(self.funding_target_locations)
+
+    @property
+    def county_label(self):
+        return "/".join(self.counties)
+
+    @property
+    def funding_county_label(self):
+        return "/".join(self.funding_counties)
+
+    @staticmethod
+    def or_clause(terms):
+        """Join terms into a Google News OR-clause, quoting multi-word terms."""
+        return " OR ".join(f'"{term}"' if " " in term or "-" in term else term for term in terms)
+
+    def to_dict(self):
+        return dict(self.settings)
+
+
+def load_metros(config):
+    """Return the configured metros, or just DFW if none are configured."""
+    metros = (config or {}).get('metros') or [DFW_METRO]
+    return [Metro(settings) for settings in metros]
+
+
+def default_metro(config):
+    return load_metros(config)[0]
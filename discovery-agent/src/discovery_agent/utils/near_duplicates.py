@@ -0,0 +1,155 @@
+"""
+Near-duplicate title lookup with MinHash-LSH.
+
+Titles are normalized the way Deduplication always did, split into character
+3-gram shingles (hashed with zlib.crc32) and summarized by a MinHash signature.
+The signature is cut into bands; titles sharing any band land in the same
+bucket and become candidates. Only candidates are compared, and the
+similarity_threshold still decides, so verdicts keep their old meaning while
+lookups stay close to linear overall.
+
+The band layout (many bands of two rows) makes pairs with a shingle Jaccard of
+0.4 candidates with >99% probability. Titles above a 0.85 SequenceMatcher ratio
+sit well above that.
+
+Candidates are first screened with a character-count bound (vectorized over all
+candidates at once). It can only overestimate SequenceMatcher's ratio, so it
+drops hopeless candidates without changing any verdict; the survivors get the
+full difflib.SequenceMatcher.ratio().
+"""
+
+import re
+import zlib
+from difflib import SequenceMatcher
+
+# Characters are counted in this many bins (codepoints above share the last bin)
+_CHAR_BINS = 128
+
+
+def normalize_title(title):
+    """Lowercase title without punctuation (the form Deduplication compares)."""
+    return re.sub(r'[^\w\s]', '', title or '').lower().strip()
+
+
+def shingles(text, size=3):
+    """crc32 hashes of the character n-grams of text (the whole text if shorter)."""
+    if len(text) <= size:
+        return {zlib.crc32(text.encode("utf-8"))}
+    return {zlib.crc32(text[i:i + size].encode("utf-8")) for i in range(len(text) - size + 1)}
+
+
+def similar(title, other, threshold=0.85):
+    """SequenceMatcher ratio test for one pair, cheapest upper bounds first."""
+    # real_quick_ratio's length bound, without building the matcher
+    if 2.0 * min(len(title), len(other)) / (len(title) + len(other)) <= threshold:
+        return False
+    matcher = SequenceMatcher(None, title, other)
+    return matcher.quick_ratio() > threshold and matcher.ratio() > threshold
+
+
+class MinHasher:
+    """MinHash signatures of shingle sets (num_perm values per set)."""
+
+    def __init__(self, num_perm=64, seed=1):
+        # Imported on first use: numpy is only needed once dedup actually runs
+        import numpy as np
+        self.np = np
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        # Multiply-shift hashing: random odd 64-bit multipliers, products wrap mod 2**64
+        # (a small multiplier with a large modulus would barely reorder the crc32 values)
+        self.a = rng.randint(0, 1 << 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self.b = rng.randint(0, 1 << 63, size=num_perm, dtype=np.uint64)
+        self.shift = np.uint64(32)
+
+    def signature(self, hashes):
+        np = self.np
+        values = np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+        # (num_shingles, num_perm) matrix of permuted hashes; the column minima are the signature
+        permuted = (values[:, None] * self.a + self.b) >> self.shift
+        return permuted.min(axis=0)
+
+
+class NearDuplicateIndex:
+    """
+    In-memory LSH index of normalized titles.
+    find() returns a stored title whose SequenceMatcher ratio exceeds the threshold.
+    """
+
+    def __init__(self, similarity_threshold=0.85, num_perm=64, rows_per_band=2, hasher=None):
+        self.similarity_threshold = similarity_threshold
+        self.hasher = hasher or MinHasher(num_perm)
+        self.np = self.hasher.np
+        self.rows = rows_per_band
+        self.bands = self.hasher.num_perm // rows_per_band
+        self.titles = []
+        self._buckets = [dict() for _ in range(self.bands)]
+        # Per-title character counts, grown by doubling
+        self._counts = self.np.zeros((64, _CHAR_BINS), dtype=self.np.int32)
+
+    def band_keys(self, title):
+        """One bucket key (bytes) per band for a normalized title."""
+        signature = self.hasher.signature(shingles(title))
+        rows = self.rows
+        return [signature[band * rows:(band + 1) * rows].tobytes() for band in range(self.bands)]
+
+    def char_counts(self, title):
+        counts = self.np.zeros(_CHAR_BINS, dtype=self.np.int32)
+        codes = self.np.minimum(self.np.fromiter(map(ord, title), dtype=self.np.int64, count=len(title)), _CHAR_BINS - 1)
+        self.np.add.at(counts, codes, 1)
+        return counts
+
+    def candidates(self, keys):
+        """Indexes of stored titles sharing at least one band, oldest first."""
+        found = set()
+        for band, key in enumerate(keys):
+            bucket = self._buckets[band].get(key)
+            if bucket:
+                found.update(bucket)
+        return sorted(found)
+
+    def is_similar(self, title, other):
+        """The similarity_threshold test Deduplication has always used."""
+        return SequenceMatcher(None, title, other).ratio() > self.similarity_threshold
+
+    def find(self, title, keys=None):
+        """Index of a stored title similar to title, or None."""
+        keys = keys if keys is not None else self.band_keys(title)
+        found = self.candidates(keys)
+        if not found:
+            return None
+        np = self.np
+        positions = np.array(found, dtype=np.int64)
+        # Upper bound of SequenceMatcher.ratio(): shared characters, ignoring order
+        # (quick_ratio's bound, for all candidates at once)
+        counts = self._counts[positions]
+        shared = np.minimum(counts, self.char_counts(title)).sum(axis=1)
+        total = counts.sum(axis=1) + len(title)
+        bound = 2.0 * shared / np.maximum(total, 1)
+        # Likeliest matches first: a duplicate usually stops at the first comparison
+        for candidate in np.argsort(-bound, kind="stable"):
+            if bound[candidate] <= self.similarity_threshold:
+                break
+            position = positions[candidate]
+            if self.is_similar(title, self.titles[position]):
+                return int(position)
+        return None
+
+    def add(self, title, keys=None):
+        keys = keys if keys is not None else self.band_keys(title)
+        position = len(self.titles)
+        self.titles.append(title)
+        if position == len(self._counts):
+            self._counts = self.np.concatenate([self._counts, self.np.zeros_like(self._counts)])
+        self._counts[position] = self.char_counts(title)
+        for band, key in enumerate(keys):
+            self._buckets[band].setdefault(key, []).append(position)
+        return position
+
+    def add_if_new(self, title):
+        """Add title unless a similar one is indexed. Returns True if it was new."""
+        keys = self.band_keys(title)
+        if self.find(title, keys) is not None:
+            return False
+        self.add(title, keys)
+        return True
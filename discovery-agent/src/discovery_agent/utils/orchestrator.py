@@ -0,0 +1,172 @@
+"""
+Concurrent orchestrator for the discovery sources.
+
+Runs each source on a bounded pool of worker threads with its own timeout.
+A source that raises or hangs is reported as failed/timed out without
+holding up the others, and the leads of the remaining sources are merged.
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, FIRST_COMPLETED, wait
+
+
+class SourceResult:
+    """Outcome of running a single discovery source."""
+
+    def __init__(self, name, status, leads=None, error=None, elapsed=0.0, count=None):
+        self.name = name
+        self.status = status  # "ok", "failed", "timeout" or "skipped" (already done in a resumed run)
+        self.leads = leads or []
+        self.error = error
+        self.elapsed = elapsed
+        # Streamed runs hand leads to a sink and only keep the count
+        self.count = len(self.leads) if count is None else count
+
+    @property
+    def ok(self):
+        return self.status == "ok"
+
+    @property
+    def complete(self):
+        # Nothing left to redo for this source in the current run
+        return self.status in ("ok", "skipped")
+
+
+class ScraperOrchestrator:
+    """Runs discovery sources concurrently on a bounded worker pool."""
+
+    def __init__(self, max_workers=3, default_timeout=None, timeouts=None):
+        self.logger = logging.getLogger(__name__)
+        self.max_workers = max(1, int(max_workers))
+        self.default_timeout = default_timeout
+        self.timeouts = timeouts or {}
+
+    @classmethod
+    def from_config(cls, config):
+        """Build an orchestrator from the `orchestrator` section of config.yaml."""
+        settings = (config or {}).get('orchestrator', {}) or {}
+        return cls(
+            max_workers=settings.get('max_workers', 3),
+            default_timeout=settings.get('default_timeout_seconds'),
+            timeouts=settings.get('source_timeouts', {}),
+        )
+
+    def _timeout_for(self, name):
+        return self.timeouts.get(name, self.default_timeout)
+
+    def run(self, sources, on_lead=None):
+        """
+        Run (name, callable) pairs concurrently. Each callable returns an iterable of leads.
+        If on_lead is given, leads are handed to it as they are produced instead of being
+        collected, so they can be streamed into a LeadSink.
+        Returns a dict of name -> SourceResult in the order the sources were given.
+        """
+        jobs = queue.Queue()
+        futures = {}
+        started = {}
+        abandoned = set()
+
+        for name, fn in sources:
+            future = Future()
+            futures[name] = future
+            jobs.put((name, fn, future))
+
+        for i in range(min(self.max_workers, len(futures))):
+            self._start_worker(jobs, started, abandoned, on_lead, i)
+
+        results = {}
+        pending = dict(futures)
+        while pending:
+            now = time.monotonic()
+
+            for name, future in list(pending.items()):
+                if future.done():
+                    results[name] = self._collect(name, future, now - started.get(name, now))
+                    del pending[name]
+                    continue
+
+                timeout = self._timeout_for(name)
+                if timeout and name in started and now - started[name] >= timeout:
+                    self.logger.error(f"Source '{name}' timed out after {timeout}s. Abandoning it.")
+                    results[name] = SourceResult(name, "timeout", error=f"Timed out after {timeout}s", elapsed=now - started[name])
+                    abandoned.add(name)
+                    del pending[name]
+                    # The hung worker is lost to us; replace it so queued sources still run.
+                    if not jobs.empty():
+                        self._start_worker(jobs, started, abandoned, on_lead, len(started))
+
+            if not pending:
+                break
+
+            wait(list(pending.values()), timeout=self._next_wakeup(pending, started, now), return_when=FIRST_COMPLETED)
+
+        return {name: results[name] for name in futures}
+
+    def _start_worker(self, jobs, started, abandoned, on_lead, index):
+        # Daemon threads so an abandoned (hung) source never blocks interpreter exit.
+        worker = threading.Thread(
+            target=self._worker, args=(jobs, started, abandoned, on_lead),
+            name=f"discovery-worker-{index}", daemon=True
+        )
+        worker.start()
+
+    def _worker(self, jobs, started, abandoned, on_lead):
+        while True:
+            try:
+                name, fn, future = jobs.get_nowait()
+            except queue.Empty:
+                return
+
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            started[name] = time.monotonic()
+            self.logger.info(f"Source '{name}' started.")
+            try:
+                leads = fn() or []
+                if on_lead is None:
+                    future.set_result((list(leads), None))
+                    continue
+
+                count = 0
+                for lead in leads:
+                    if name in abandoned:
+                        # Timed out: stop forwarding leads from a source we already gave up on
+                        break
+                    on_lead(lead)
+                    count += 1
+                future.set_result(([], count))
+            except Exception as e:
+                future.set_exception(e)
+
+    def _collect(self, name, future, elapsed):
+        error = future.exception()
+        if error is not None:
+            self.logger.error(f"Source '{name}' failed: {error}")
+            return SourceResult(name, "failed", error=str(error), elapsed=elapsed)
+
+        leads, count = future.result()
+        result = SourceResult(name, "ok", leads=leads, elapsed=elapsed, count=count)
+        self.logger.info(f"Source '{name}' finished in {elapsed:.1f}s with {result.count} leads.")
+        return result
+
+    def _next_wakeup(self, pending, started, now):
+        # Sleep until the earliest running source hits its deadline (re-check at least every second
+        # so sources that start later get their deadline tracked too).
+        wakeup = 1.0
+        for name in pending:
+            timeout = self._timeout_for(name)
+            if timeout and name in started:
+                wakeup = min(wakeup, max(0.0, started[name] + timeout - now))
+        return wakeup
+
+    @staticmethod
+    def merge(results):
+        """Merge the leads of all successful sources into a single list."""
+        merged = []
+        for result in results.values():
+            merged.extend(result.leads)
+        return merged
@@ -0,0 +1,130 @@
+"""
+Token-bucket rate limiting for outbound calls.
+
+Each host (and each API key, e.g. the RapidAPI key shared by every JSearch
+call) gets a bucket refilled at `rate_per_second` up to `burst` tokens, as
+configured under `rate_limits` in config.yaml. Callers reserve a token under a
+short lock and then wait outside it, so the same bucket can be shared by the
+orchestrator's worker threads (acquire) and by asyncio tasks (acquire_async)
+without blocking anyone else: calls go out as fast as each provider allows and
+no faster. Buckets are per process; metro shards each get an equal share of the
+configured rates (shards.shard_config).
+"""
+
+import asyncio
+import logging
+import threading
+import time
+import urllib.parse
+
+# Hosts without their own entry, unless rate_limits.default says otherwise (null: unlimited)
+DEFAULT_HOST_LIMIT = {"rate_per_second": 2, "burst": 2}
+
+
+class TokenBucket:
+    """Thread-safe token bucket. Tokens can be reserved ahead, so waiters queue up fairly."""
+
+    def __init__(self, rate_per_second, burst=1):
+        self.rate = float(rate_per_second)
+        self.burst = max(1.0, float(burst))
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, cost=1):
+        """Take cost tokens now and return how long the caller must wait before using them."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= cost
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self, cost=1):
+        wait = self.reserve(cost)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, cost=1):
+        wait = self.reserve(cost)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+
+class RateLimiter:
+    """Per-host and per-API-key token buckets, created on first use."""
+
+    def __init__(self, default=None, hosts=None, api_keys=None):
+        self.logger = logging.getLogger(__name__)
+        # Bucket settings: {"rate_per_second": r, "burst": b}; default=None leaves unlisted hosts unlimited
+        self.default = default
+        self.hosts = hosts or {}
+        self.api_keys = api_keys or {}
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        """Build the limiter from the `rate_limits` section of config.yaml."""
+        config = config or {}
+        settings = config.get('rate_limits', {}) or {}
+        api_keys = dict(settings.get('api_keys') or {})
+
+        # Without an explicit RapidAPI budget, fall back to the job_posting pacing (one call per N seconds)
+        rate_limit_seconds = (config.get('job_posting') or {}).get('rate_limit_seconds')
+        if 'rapidapi' not in api_keys and rate_limit_seconds:
+            api_keys['rapidapi'] = {"rate_per_second": 1.0 / rate_limit_seconds, "burst": 1}
+
+        return cls(
+            default=settings.get('default', DEFAULT_HOST_LIMIT),
+            hosts=settings.get('hosts'),
+            api_keys=api_keys,
+        )
+
+    def _bucket(self, kind, name, settings):
+        key = (kind, name)
+        with self._lock:
+            if key not in self._buckets:
+                self._buckets[key] = TokenBucket(settings['rate_per_second'], settings.get('burst', 1)) if settings else None
+            return self._buckets[key]
+
+    def buckets_for(self, url=None, api_key=None):
+        """The buckets a call to url (optionally billed to api_key) has to pass."""
+        buckets = []
+        if url:
+            host = urllib.parse.urlparse(url).netloc.lower()
+            buckets.append(self._bucket("host", host, self.hosts.get(host, self.default)))
+        if api_key:
+            buckets.append(self._bucket("api_key", api_key, self.api_keys.get(api_key)))
+        return [bucket for bucket in buckets if bucket is not None]
+
+    def acquire(self, url=None, api_key=None, cost=1):
+        """Block the calling thread until the call may go out. Returns the time waited."""
+        waited = 0.0
+        for bucket in self.buckets_for(url, api_key):
+            waited += bucket.acquire(cost)
+        return waited
+
+    async def acquire_async(self, url=None, api_key=None, cost=1):
+        """Like acquire, but yields to the event loop while waiting."""
+        waited = 0.0
+        for bucket in self.buckets_for(url, api_key):
+            waited += await bucket.acquire_async(cost)
+        return waited
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter(config=None):
+    """Return the process-wide RateLimiter, creating it from config on first use."""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter.from_config(config)
+        return _limiter
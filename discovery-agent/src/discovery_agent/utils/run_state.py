@@ -0,0 +1,216 @@
+"""
+Run-state store for checkpointed, resumable discovery runs.
+
+Each run gets an id. Every source records its finished stages (fetched items,
+deduped items, analyzed items) as JSON checkpoints in a small SQLite file,
+so `main.py --resume` can pick up an interrupted run without spending RSS,
+JSearch or LLM quota on work that was already done.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+from discovery_agent.utils.sqlite_helpers import sqlite_connection
+
+
+class RunStateStore:
+    """SQLite-backed store of runs and their per-source stage checkpoints."""
+
+    def __init__(self, db_path):
+        self.logger = logging.getLogger(__name__)
+        self.db_path = db_path
+        self._lock = threading.Lock()
+
+        with self._connect() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS runs (
+                    run_id TEXT PRIMARY KEY,
+                    started_at TEXT NOT NULL,
+                    finished_at TEXT
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS checkpoints (
+                    run_id TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    stage TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    created_at TEXT NOT NULL,
+                    PRIMARY KEY (run_id, source, stage)
+                )
+            ''')
+
+    def _connect(self):
+        return sqlite_connection(self.db_path)
+
+    def start_run(self):
+        """Register a new run and return its id."""
+        run_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        with self._lock, self._connect() as conn:
+            conn.execute('INSERT INTO runs (run_id, started_at) VALUES (?, ?)', (run_id, datetime.now().isoformat()))
+        return run_id
+
+    def latest_unfinished_run(self):
+        """Return the id of the most recent run that never finished, or None."""
+        with self._connect() as conn:
+            row = conn.execute(
+                'SELECT run_id FROM runs WHERE finished_at IS NULL ORDER BY started_at DESC LIMIT 1'
+            ).fetchone()
+        return row[0] if row else None
+
+    def recent_runs(self, limit=5):
+        """Return the latest runs as dicts (run_id, started_at, finished_at, done_sources)."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                'SELECT run_id, started_at, finished_at FROM runs ORDER BY started_at DESC LIMIT ?', (limit,)
+            ).fetchall()
+            runs = []
+            for run_id, started_at, finished_at in rows:
+                done = conn.execute(
+                    "SELECT source FROM checkpoints WHERE run_id = ? AND stage = 'done' ORDER BY source", (run_id,)
+                ).fetchall()
+                runs.append({
+                    "run_id": run_id,
+                    "started_at": started_at,
+                    "finished_at": finished_at,
+                    "done_sources": [row[0] for row in done],
+                })
+        return runs
+
+    def finish_run(self, run_id):
+        with self._lock, self._connect() as conn:
+            conn.execute('UPDATE runs SET finished_at = ? WHERE run_id = ?', (datetime.now().isoformat(), run_id))
+
+    def prune(self, retention_days=7):
+        """Delete runs (and their checkpoints) older than retention_days."""
+        cutoff = (datetime.now() - timedelta(days=retention_days)).isoformat()
+        with self._lock, self._connect() as conn:
+            conn.execute('DELETE FROM checkpoints WHERE run_id IN (SELECT run_id FROM runs WHERE started_at < ?)', (cutoff,))
+            conn.execute('DELETE FROM runs WHERE started_at < ?', (cutoff,))
+
+    def get(self, run_id, source, stage):
+        with self._connect() as conn:
+            row = conn.execute(
+                'SELECT payload FROM checkpoints WHERE run_id = ? AND source = ? AND stage = ?',
+                (run_id, source, stage)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save(self, run_id, source, stage, payload):
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO checkpoints (run_id, source, stage, payload, created_at) VALUES (?, ?, ?, ?, ?)',
+                (run_id, source, stage, json.dumps(payload), datetime.now().isoformat())
+            )
+
+    def get_many(self, run_id, source, stages):
+        """Return {stage: payload} for the given stages that have a checkpoint."""
+        found = {}
+        with self._connect() as conn:
+            for stage in set(stages):
+                row = conn.execute(
+                    'SELECT payload FROM checkpoints WHERE run_id = ? AND source = ? AND stage = ?',
+                    (run_id, source, stage)
+                ).fetchone()
+                if row:
+                    found[stage] = json.loads(row[0])
+        return found
+
+    def save_many(self, run_id, source, payloads):
+        """Checkpoint several stages ({stage: payload}) in one transaction."""
+        created_at = datetime.now().isoformat()
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO checkpoints (run_id, source, stage, payload, created_at) VALUES (?, ?, ?, ?, ?)',
+                [(run_id, source, stage, json.dumps(payload), created_at) for stage, payload in payloads.items()]
+            )
+
+    def checkpoint(self, run_id, source):
+        """Return the checkpoint handle a scraper uses for its own stages."""
+        return SourceCheckpoint(self, run_id, source)
+
+    def mark_done(self, run_id, source):
+        self.save(run_id, source, "done", True)
+
+    def is_done(self, run_id, source):
+        return bool(self.get(run_id, source, "done"))
+
+
+class SourceCheckpoint:
+    """Stage checkpoints for one source within one run."""
+
+    def __init__(self, store, run_id, source):
+        self.store = store
+        self.run_id = run_id
+        self.source = source
+
+    def get(self, stage):
+        return self.store.get(self.run_id, self.source, stage)
+
+    def save(self, stage, payload):
+        self.store.save(self.run_id, self.source, stage, payload)
+
+    def load_or_run(self, stage, fn):
+        """Return the checkpointed payload for stage, or run fn and checkpoint its result."""
+        payload = self.get(stage)
+        if payload is not None:
+            logging.getLogger(__name__).info(f"[{self.source}] Resuming '{stage}' from checkpoint.")
+            return payload
+        payload = fn()
+        self.save(stage, payload)
+        return payload
+
+    def partition_analyzed(self, items, key):
+        """
+        Split items into (pending, leads): the items not yet analyzed in this run, and the
+        leads found for the rest. key(item) returns the item's key.
+        """
+        found = self.store.get_many(self.run_id, self.source, [item_stage(key(item)) for item in items])
+        pending, leads = [], []
+        for item in items:
+            item_leads = found.get(item_stage(key(item)))
+            if item_leads is None:
+                pending.append(item)
+            else:
+                leads.extend(item_leads)
+        if len(pending) < len(items):
+            logging.getLogger(__name__).info(
+                f"[{self.source}] Resuming {len(items) - len(pending)} analyzed items from checkpoint."
+            )
+        return pending, leads
+
+    def save_analyzed(self, results, key):
+        """Checkpoint (item, leads found for it) pairs. key(item) returns the item's key."""
+        if results:
+            self.store.save_many(self.run_id, self.source, {item_stage(key(item)): leads for item, leads in results})
+
+
+class NullCheckpoint:
+    """Checkpoint handle used when a scraper runs without a run-state store."""
+
+    def get(self, stage):
+        return None
+
+    def save(self, stage, payload):
+        pass
+
+    def load_or_run(self, stage, fn):
+        return fn()
+
+    def partition_analyzed(self, items, key):
+        return items, []
+
+    def save_analyzed(self, results, key):
+        pass
+
+
+def item_stage(key):
+    """
+    Stage name for one analyzed item. Items are checkpointed one by one, not per batch,
+    because batches are planned afresh on every run: a resumed run may group them differently.
+    """
+    return f"item:{hashlib.sha1(key.encode('utf-8')).hexdigest()}"
@@ -0,0 +1,22 @@
+"""
+Small helpers shared by the SQLite-backed stores in this package.
+"""
+
+import os
+import sqlite3
+from contextlib import contextmanager
+
+
+@contextmanager
+def sqlite_connection(db_path, timeout=30):
+    """Open a connection that commits on success, rolls back on error and always closes."""
+    db_dir = os.path.dirname(db_path)
+    if db_dir and not os.path.exists(db_dir):
+        os.makedirs(db_dir, exist_ok=True)
+
+    conn = sqlite3.connect(db_path, timeout=timeout)
+    try:
+        with conn:
+            yield conn
+    finally:
+        conn.close()
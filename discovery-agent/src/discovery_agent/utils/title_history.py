@@ -0,0 +1,128 @@
+"""
+Cross-run near-duplicate titles.
+
+Deduplication.deduplicate_raw_items only compares the titles of one run, so a
+story syndicated on Monday by one outlet and on Wednesday by another reaches the
+LLM twice. TitleHistory keeps the MinHash-LSH band keys of every analyzed title
+(see utils/near_duplicates.py) in SQLite for `retention_days`. A lookup is one
+indexed query for the title's bands plus a SequenceMatcher check of the few
+titles it returns, so it stays near-constant as the history grows and nothing
+but the database file holds past titles. Rows older than the retention window
+are pruned when the history is loaded.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+
+from discovery_agent.utils.config import data_path
+from discovery_agent.utils.metrics import get_metrics
+from discovery_agent.utils.near_duplicates import NearDuplicateIndex, normalize_title, similar
+from discovery_agent.utils.sqlite_helpers import sqlite_connection
+
+
+def _band_id(key):
+    # 64-bit SQLite INTEGER for a band key (collisions only add a candidate to verify)
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little", signed=True)
+
+
+class TitleHistory:
+    """SQLite store of recently analyzed titles for one source, with near-duplicate lookup."""
+
+    def __init__(self, db_path, source, retention_days=14, similarity_threshold=0.85):
+        self.logger = logging.getLogger(__name__)
+        self.db_path = db_path
+        self.source = source
+        self.retention_days = retention_days
+        self.similarity_threshold = similarity_threshold
+        # Only used for its band keys; titles are never added to it
+        self.index = NearDuplicateIndex(similarity_threshold)
+        self._lock = threading.Lock()
+
+        with sqlite_connection(self.db_path) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS titles (
+                    id INTEGER PRIMARY KEY,
+                    source TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    seen_at REAL NOT NULL
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS titles_seen_at ON titles (seen_at)')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS title_bands (
+                    source TEXT NOT NULL,
+                    band INTEGER NOT NULL,
+                    title_id INTEGER NOT NULL,
+                    PRIMARY KEY (source, band, title_id)
+                ) WITHOUT ROWID
+            ''')
+            # Pruning deletes bands by title id, which the (source, band, title_id) key can't look up
+            conn.execute('CREATE INDEX IF NOT EXISTS title_bands_title_id ON title_bands (title_id)')
+            self._prune(conn)
+
+    @classmethod
+    def load(cls, config, source):
+        """Open the history from the `title_history` config section, or return None if disabled."""
+        settings = (config or {}).get('title_history', {}) or {}
+        if not settings.get('enabled', True):
+            return None
+        return cls(
+            settings.get('path') or data_path("title_history.sqlite3"),
+            source,
+            retention_days=settings.get('retention_days', 14),
+            similarity_threshold=settings.get('similarity_threshold', 0.85),
+        )
+
+    def _prune(self, conn):
+        cutoff = time.time() - self.retention_days * 86400
+        conn.execute('DELETE FROM title_bands WHERE title_id IN (SELECT id FROM titles WHERE seen_at < ?)', (cutoff,))
+        deleted = conn.execute('DELETE FROM titles WHERE seen_at < ?', (cutoff,)).rowcount
+        if deleted:
+            self.logger.info(f"Pruned {deleted} titles older than {self.retention_days} days.")
+
+    def _bands(self, clean_title):
+        return sorted({_band_id(key) for key in self.index.band_keys(clean_title)})
+
+    def _match(self, conn, clean_title, bands):
+        placeholders = ",".join("?" * len(bands))
+        # Rows stream from the band index; any() stops at the first similar title
+        rows = conn.execute(f'''
+            SELECT DISTINCT titles.title FROM title_bands
+            JOIN titles ON titles.id = title_bands.title_id
+            WHERE title_bands.source = ? AND title_bands.band IN ({placeholders})
+        ''', [self.source] + bands)
+        return any(similar(clean_title, title, self.similarity_threshold) for (title,) in rows)
+
+    def filter(self, items, key='title'):
+        """Return the items whose title is not a near-duplicate of one analyzed in an earlier run."""
+        with get_metrics().stage(self.source, "title_history_filter", len(items)) as stage:
+            fresh = []
+            with sqlite_connection(self.db_path) as conn:
+                for item in items:
+                    clean_title = normalize_title(item.get(key))
+                    if not clean_title or not self._match(conn, clean_title, self._bands(clean_title)):
+                        fresh.append(item)
+            stage.items_out = len(fresh)
+        if len(fresh) < len(items):
+            self.logger.info(f"Skipped {len(items) - len(fresh)} items seen in earlier runs (similar titles).")
+        return fresh
+
+    def remember(self, items, key='title'):
+        """Record the titles of analyzed items so later runs skip their syndicated repeats."""
+        now = time.time()
+        titles = {normalize_title(item.get(key)) for item in items}
+        titles.discard('')
+        if not titles:
+            return
+        with self._lock, sqlite_connection(self.db_path) as conn:
+            for clean_title in titles:
+                title_id = conn.execute(
+                    'INSERT INTO titles (source, title, seen_at) VALUES (?, ?, ?)',
+                    (self.source, clean_title, now)
+                ).lastrowid
+                conn.executemany(
+                    'INSERT OR IGNORE INTO title_bands (source, band, title_id) VALUES (?, ?, ?)',
+                    [(self.source, band, title_id) for band in self._bands(clean_title)]
+                )
@@ -0,0 +1,136 @@
+"""
+Cross-run store of per-item LLM verdicts.
+
+JSearch is queried for a month of postings and the news feeds for a week, so a
+daily run sees most items again. Each analyzed item's verdict (kept or rejected,
+the extracted fields and the confidence) is stored under the item's key (job id,
+article link, or a content hash when there is neither) together with the model
+and prompt version that produced it. The scrapers look items up before batching
+and only send the misses to the LLM.
+
+A verdict only counts for the same model and prompt version. Each scraper's
+prompt templates are module constants hashed into its PROMPT_VERSION, so editing
+a prompt invalidates the verdicts made with the old one (they are deleted when
+the store is opened). Verdicts also expire after ttl_days.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+
+from discovery_agent.utils.config import data_path
+from discovery_agent.utils.metrics import get_metrics
+from discovery_agent.utils.sqlite_helpers import sqlite_connection
+
+
+def prompt_version(*templates):
+    """Short hash of prompt templates; it changes whenever a template is edited."""
+    return hashlib.sha256("\x00".join(templates).encode("utf-8")).hexdigest()[:12]
+
+
+def content_key(*parts):
+    """Item key from its analyzed content, for items without a job id or link."""
+    return "sha256:" + hashlib.sha256("\x00".join(part or "" for part in parts).encode("utf-8")).hexdigest()[:32]
+
+
+class VerdictStore:
+    """SQLite store of LLM verdicts for one source, model and prompt version."""
+
+    def __init__(self, db_path, source, model, prompt_version, ttl_days=30):
+        self.logger = logging.getLogger(__name__)
+        self.db_path = db_path
+        self.source = source
+        self.model = model or ""
+        self.prompt_version = prompt_version
+        self.ttl_days = ttl_days
+        self._lock = threading.Lock()
+
+        with sqlite_connection(self.db_path) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS verdicts (
+                    source TEXT NOT NULL,
+                    item_key TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    prompt_version TEXT NOT NULL,
+                    accepted INTEGER NOT NULL,
+                    confidence REAL,
+                    fields TEXT NOT NULL,
+                    analyzed_at REAL NOT NULL,
+                    PRIMARY KEY (source, item_key)
+                )
+            ''')
+            conn.execute('DELETE FROM verdicts WHERE analyzed_at < ?', (time.time() - ttl_days * 86400,))
+            invalidated = conn.execute(
+                'DELETE FROM verdicts WHERE source = ? AND (model != ? OR prompt_version != ?)',
+                (self.source, self.model, self.prompt_version)
+            ).rowcount
+        if invalidated:
+            self.logger.info(f"Dropped {invalidated} {source} verdicts from another model or prompt version.")
+
+    @classmethod
+    def from_config(cls, config, source, model, prompt_version):
+        """Store from the `verdict_store` config section, or None if disabled."""
+        settings = (config or {}).get('verdict_store', {}) or {}
+        if not settings.get('enabled', True):
+            return None
+        return cls(
+            settings.get('path') or data_path("llm_verdicts.sqlite3"),
+            source,
+            model,
+            prompt_version,
+            ttl_days=settings.get('ttl_days', 30),
+        )
+
+    def lookup(self, keys):
+        """{key: {"accepted", "confidence", "fields"}} for the keys with a current verdict."""
+        keys = [key for key in set(keys) if key]
+        found = {}
+        with sqlite_connection(self.db_path) as conn:
+            # Chunked: SQLite limits the number of bound parameters
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = conn.execute(f'''
+                    SELECT item_key, accepted, confidence, fields FROM verdicts
+                    WHERE source = ? AND item_key IN ({",".join("?" * len(chunk))})
+                ''', [self.source] + chunk)
+                for key, accepted, confidence, fields in rows:
+                    found[key] = {"accepted": bool(accepted), "confidence": confidence, "fields": json.loads(fields)}
+        return found
+
+    def partition(self, items, key):
+        """
+        Split items into (unseen, cached): the items without a verdict, and (item, verdict)
+        pairs for the rest. key(item) returns the item's key.
+        """
+        with get_metrics().stage(self.source, "verdict_lookup", len(items)) as stage:
+            found = self.lookup(key(item) for item in items)
+            unseen, cached = [], []
+            for item in items:
+                verdict = found.get(key(item))
+                if verdict is None:
+                    unseen.append(item)
+                else:
+                    cached.append((item, verdict))
+            stage.items_out = len(unseen)
+        if cached:
+            kept = sum(1 for _, verdict in cached if verdict["accepted"])
+            self.logger.info(f"Reused {len(cached)} earlier verdicts ({kept} kept); {len(unseen)} items left for the LLM.")
+        return unseen, cached
+
+    def record(self, verdicts):
+        """Store (key, accepted, confidence, fields) tuples for the current model and prompt version."""
+        now = time.time()
+        rows = [
+            (self.source, key, self.model, self.prompt_version, int(bool(accepted)), confidence, json.dumps(fields or {}), now)
+            for key, accepted, confidence, fields in verdicts if key
+        ]
+        if not rows:
+            return
+        with self._lock, sqlite_connection(self.db_path) as conn:
+            conn.executemany('''
+                INSERT OR REPLACE INTO verdicts
+                    (source, item_key, model, prompt_version, accepted, confidence, fields, analyzed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
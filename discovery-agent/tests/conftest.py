@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The package runs from discovery-agent/src (`python -m discovery_agent ...`); make it importable here too
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
@@ -0,0 +1,63 @@
+import sqlite3
+
+import pytest
+
+from discovery_agent.benchmarks.cases import LEADS_TABLE_SQL
+from discovery_agent.utils.db_writer import DatabaseWriter
+from discovery_agent.utils.entity_resolution import CompanyResolver, MergedSignalStore
+
+
+@pytest.fixture
+def writer(tmp_path):
+    db_path = str(tmp_path / "leads.sqlite3")
+    conn = sqlite3.connect(db_path)
+    conn.execute(LEADS_TABLE_SQL)
+    conn.commit()
+    conn.close()
+    return DatabaseWriter(db_path, resolver=CompanyResolver(MergedSignalStore(str(tmp_path / "merged.sqlite3"))))
+
+
+def lead(company_name, source_url, **fields):
+    return dict({
+        "company_name": company_name, "source_url": source_url, "discovery_source": "test",
+        "signal_type": "job_posting", "all_signals": "job_posting", "signal_strength": "Medium",
+    }, **fields)
+
+
+def rows(writer):
+    conn = sqlite3.connect(writer.db_path)
+    try:
+        return conn.execute('SELECT company_name, source_url, all_signals, signal_strength, domain, notes FROM leads_lead ORDER BY id').fetchall()
+    finally:
+        conn.close()
+
+
+def test_signals_of_a_known_company_are_merged_into_its_row(writer):
+    assert writer.save_leads([lead("Acme Corp", "u1")]) == (1, 0)
+    assert writer.save_leads([
+        lead("ACME, Inc.", "u2", all_signals="funding_news", signal_strength="High", domain="acme.com"),
+        lead("Beta LLC", "u3"),
+    ]) == (2, 0)
+
+    (acme, beta) = rows(writer)
+    assert acme[:5] == ("Acme Corp", "u1", "job_posting, funding_news", "High", "acme.com")
+    assert "Source: u2" in acme[5]
+    assert beta[:2] == ("Beta LLC", "u3")
+    assert writer.resolver.merged_store.existing(["u1", "u2", "u3"]) == {"u2"}
+
+
+def test_merged_and_duplicate_urls_are_skipped(writer):
+    writer.save_leads([lead("Acme", "u1"), lead("Acme", "u2")])
+
+    assert writer.save_leads([lead("Acme", "u1"), lead("Acme", "u2")]) == (0, 2)
+    assert len(rows(writer)) == 1
+
+
+def test_rows_written_by_another_writer_are_matched(writer):
+    other = DatabaseWriter(writer.db_path)
+    writer.save_leads([lead("Acme", "u1")])
+    other.save_leads([lead("Gamma Dental", "u2", location="Plano, TX")])
+
+    writer.save_leads([lead("Gamma Dentall", "u3", location="Plano"), lead("Gamma Rental", "u4", location="Frisco")])
+
+    assert [row[1] for row in rows(writer)] == ["u1", "u2", "u4"]
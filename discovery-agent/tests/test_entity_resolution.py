@@ -0,0 +1,96 @@
+import pytest
+
+from discovery_agent.utils.entity_resolution import EntityIndex, location_places, normalize_company_name, resolve_leads
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("Acme Corporation, Inc.", "acme"),
+    ("ACME", "acme"),
+    ("The Acme Company L.L.C.", "acme"),
+    ("Smith & Jones LLP", "smith and jones"),
+    ("Company Inc", "company inc"),
+    ("Unknown", ""),
+    ("  N/A ", ""),
+    (None, ""),
+])
+def test_normalize_company_name(name, expected):
+    assert normalize_company_name(name) == expected
+
+
+def test_location_places():
+    assert location_places("Plano, TX 75024") == {"plano"}
+    assert location_places("Frisco, Plano") == {"frisco", "plano"}
+    assert location_places("Texas, USA") == set()
+    assert location_places("Unknown") == set()
+
+
+def index_of(*leads):
+    index = EntityIndex()
+    for record_id, lead in enumerate(leads):
+        index.add(record_id, lead)
+    return index
+
+
+def test_domain_matches_regardless_of_name():
+    index = index_of({"company_name": "Acme", "domain": "https://www.acme.com/careers"})
+    assert index.find({"company_name": "Totally Different", "domain": "acme.com"}) == 0
+
+
+def test_generic_domains_are_ignored():
+    index = index_of({"company_name": "Acme", "domain": "linkedin.com"})
+    assert index.find({"company_name": "Beta", "domain": "https://www.linkedin.com/company/beta"}) is None
+
+
+def test_normalized_names_match_without_corroboration():
+    index = index_of({"company_name": "Acme Corporation, Inc."})
+    assert index.find({"company_name": "ACME"}) == 0
+    assert index.find({"company_name": "ACME", "domain": "acme.com", "location": "Plano"}) == 0
+
+
+def test_normalized_names_with_conflicting_domains_or_places_do_not_match():
+    index = index_of(
+        {"company_name": "Acme", "location": "Houston"},
+        {"company_name": "First Financial Inc", "domain": "firstfinancial.com"},
+    )
+    assert index.find({"company_name": "Acme", "location": "Dallas"}) is None
+    assert index.find({"company_name": "Acme", "location": "Houston, TX"}) == 0
+    assert index.find({"company_name": "First Financial LLC", "domain": "ffin.com"}) is None
+    assert index.find({"company_name": "First Financial LLC", "location": "Dallas"}) == 1
+
+    # Same-named companies kept apart are both found again by name
+    index.add(2, {"company_name": "Acme", "location": "Dallas"})
+    assert index.find({"company_name": "Acme", "location": "Dallas"}) == 2
+
+
+def test_fuzzy_names_need_an_agreeing_location_or_domain():
+    index = index_of({"company_name": "Acme Dental", "location": "Plano, TX"})
+    assert index.find({"company_name": "Acme Rental", "location": "Frisco, TX"}) is None
+    assert index.find({"company_name": "Acme Rental"}) is None
+    assert index.find({"company_name": "Acme Dentall", "location": "Plano, TX 75024"}) == 0
+
+    index = index_of({"company_name": "Acme Robotics", "domain": "acmerobotics.com"})
+    assert index.find({"company_name": "Acme Robotic", "domain": "acmerobotic.io", "location": "Plano"}) is None
+
+
+def test_names_with_digits_must_match_exactly():
+    index = index_of({"company_name": "Suite 100 Partners", "location": "Dallas"})
+    assert index.find({"company_name": "Suite 200 Partners", "location": "Dallas"}) is None
+
+
+def test_placeholder_names_never_match():
+    index = index_of({"company_name": "Unknown", "location": "Dallas"})
+    assert index.find({"company_name": "Unknown", "location": "Dallas"}) is None
+
+
+def test_resolve_leads_merges_signals_into_the_first_lead():
+    leads = [
+        {"company_name": "Acme Corp", "all_signals": "job_posting", "signal_strength": "Medium", "source_url": "a"},
+        {"company_name": "Beta LLC", "all_signals": "funding_news", "signal_strength": "High", "source_url": "b"},
+        {"company_name": "ACME", "all_signals": "funding_news", "signal_strength": "Very High", "source_url": "c"},
+    ]
+    records = resolve_leads(leads)
+
+    assert [record["source_url"] for record in records] == ["a", "b"]
+    assert records[0]["all_signals"] == "job_posting, funding_news"
+    assert records[0]["signal_strength"] == "Very High"
+    assert "Source: c" in records[0]["notes"]
@@ -0,0 +1,113 @@
+import threading
+import time
+
+from discovery_agent.utils.excel_writer import ExcelWriter
+from discovery_agent.utils.lead_sink import LeadSink, SinkTarget
+
+
+class RecordingWriter:
+    def __init__(self, result=None, fail=False, gate=None):
+        self.batches = []
+        self.result = result
+        self.fail = fail
+        self.gate = gate
+
+    def save_leads(self, leads):
+        if self.gate is not None:
+            self.gate.wait(10)
+        if self.fail:
+            raise IOError("disk full")
+        self.batches.append([lead["id"] for lead in leads])
+        return self.result
+
+
+def leads(count):
+    return [{"id": i} for i in range(count)]
+
+
+def test_close_flushes_partial_batches():
+    writer = RecordingWriter()
+    with LeadSink([SinkTarget("db", writer.save_leads, batch_size=100)], flush_interval=60) as sink:
+        for lead in leads(3):
+            sink.put(lead)
+
+    assert writer.batches == [[0, 1, 2]]
+    assert sink.stats() == {"received": 3, "targets": {"db": {"saved": 3, "skipped": 0, "errors": 0}}}
+
+
+def test_leads_are_written_in_batches_to_every_target():
+    db, excel = RecordingWriter(result=(1, 1)), RecordingWriter()
+    targets = [SinkTarget("db", db.save_leads, batch_size=2), SinkTarget("excel", excel.save_leads, batch_size=3)]
+    with LeadSink(targets, flush_interval=60) as sink:
+        for lead in leads(5):
+            sink.put(lead)
+
+    assert db.batches == [[0, 1], [2, 3], [4]]
+    assert excel.batches == [[0, 1, 2], [3, 4]]
+    # (saved, skipped) tuples from the writer are added up
+    assert sink.stats()["targets"]["db"] == {"saved": 3, "skipped": 3, "errors": 0}
+
+
+def test_trickle_is_flushed_after_flush_interval():
+    writer = RecordingWriter()
+    sink = LeadSink([SinkTarget("db", writer.save_leads, batch_size=100)], flush_interval=0.1)
+    sink.start()
+    try:
+        sink.put({"id": 1})
+        deadline = time.monotonic() + 5
+        while not writer.batches and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert writer.batches == [[1]]
+    finally:
+        sink.close()
+
+
+def test_failing_target_is_counted_and_other_targets_still_write():
+    broken, working = RecordingWriter(fail=True), RecordingWriter()
+    targets = [SinkTarget("db", broken.save_leads, batch_size=1), SinkTarget("excel", working.save_leads, batch_size=1)]
+    with LeadSink(targets, flush_interval=60) as sink:
+        for lead in leads(2):
+            sink.put(lead)
+
+    assert sink.stats()["targets"]["db"]["errors"] == 2
+    assert working.batches == [[0], [1]]
+
+
+def test_full_queue_blocks_producers_until_the_writer_catches_up():
+    gate = threading.Event()
+    writer = RecordingWriter(gate=gate)
+    sink = LeadSink([SinkTarget("db", writer.save_leads, batch_size=1)], queue_size=1, flush_interval=60)
+    sink.start()
+    try:
+        # Lead 0 is taken by the writer (blocked on the gate), lead 1 fills the queue
+        sink.put({"id": 0})
+        time.sleep(0.1)
+        sink.put({"id": 1})
+        producer = threading.Thread(target=sink.put, args=({"id": 2},))
+        producer.start()
+        producer.join(0.3)
+        assert producer.is_alive()
+
+        gate.set()
+        producer.join(5)
+        assert not producer.is_alive()
+    finally:
+        gate.set()
+        sink.close()
+
+    assert writer.batches == [[0], [1], [2]]
+
+
+def test_excel_writes_are_reported_as_saved_or_failed(tmp_path):
+    good = ExcelWriter(str(tmp_path / "leads.xlsx"))
+    broken = ExcelWriter(str(tmp_path / "broken.xlsx"))
+    (tmp_path / "broken.xlsx").write_bytes(b"not a workbook")
+    targets = [SinkTarget("good", good.save_leads, batch_size=2), SinkTarget("broken", broken.save_leads, batch_size=2)]
+    with LeadSink(targets, flush_interval=60) as sink:
+        for lead in [{"company_name": "Acme"}, {"company_name": "Beta"}, {"company_name": "Gamma"}]:
+            sink.put(lead)
+
+    assert sink.stats()["targets"] == {
+        "good": {"saved": 3, "skipped": 0, "errors": 0},
+        "broken": {"saved": 0, "skipped": 0, "errors": 2},
+    }
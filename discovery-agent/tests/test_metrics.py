@@ -0,0 +1,29 @@
+import threading
+import time
+
+from discovery_agent.utils.metrics import RunMetrics
+
+
+def test_overlapping_calls_report_wall_time_and_busy_time(tmp_path):
+    metrics = RunMetrics("run")
+
+    def call():
+        with metrics.stage("rss", "llm_batch", 1):
+            time.sleep(0.1)
+
+    threads = [threading.Thread(target=call) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    (row,) = metrics.to_dict()["stages"]
+    assert row["calls"] == 4
+    assert row["busy_seconds"] >= 0.4
+    assert 0.1 <= row["seconds"] < row["busy_seconds"]
+
+    path = str(tmp_path / "run.prom")
+    metrics.write_prometheus(path)
+    with open(path) as f:
+        text = f.read()
+    assert "# HELP discovery_last_run_stage_busy_seconds Summed duration of the stage's calls." in text
@@ -0,0 +1,68 @@
+from difflib import SequenceMatcher
+
+from discovery_agent.benchmarks import synthetic
+from discovery_agent.utils.deduplication import Deduplication
+from discovery_agent.utils.near_duplicates import normalize_title
+
+BASE = "Acme Robotics leases 40000 sq ft office in Plano"
+
+
+def items(*titles):
+    return [{"title": title, "id": i} for i, title in enumerate(titles)]
+
+
+def kept(items, threshold=0.85):
+    """Ids kept by the LSH dedup, after checking they match the pairwise reference."""
+    dedup = Deduplication()
+    lsh = [item["id"] for item in dedup.deduplicate_raw_items(items, threshold)]
+    pairwise = [item["id"] for item in dedup._deduplicate_pairwise(items, threshold)]
+    assert lsh == pairwise
+    return lsh
+
+
+def ratio(title, other):
+    return SequenceMatcher(None, normalize_title(title), normalize_title(other)).ratio()
+
+
+def test_short_titles():
+    assert kept(items("Acme HQ", "Acme HQs", "Dallas", "Dalas", "Plano", "Frisco", "HQ")) == [0, 2, 4, 5, 6]
+
+
+def test_titles_shorter_than_one_shingle():
+    assert kept(items("ab", "ab", "a", "ac", "abc", "abd", "!!!", "a")) == [0, 2, 3, 4, 5]
+
+
+def test_non_ascii_titles():
+    titles = (
+        "Café Übersee öffnet Büro in Zürich",
+        "Cafe Ubersee öffnet Buro in Zurich",
+        "東京本社を移転します",
+        "東京本社を移転しました",
+        "大阪支社を開設",
+        "Société Générale ouvre un bureau à Dallas",
+    )
+    assert ratio(titles[0], titles[1]) > 0.85 and ratio(titles[2], titles[3]) > 0.85
+    assert kept(items(*titles)) == [0, 2, 4, 5]
+
+
+def test_pairs_around_the_threshold():
+    just_over = "Acme inks a 40000 sq ft office in Plano"
+    just_under = "Acme Robotics Inc leases 40000 square feet offices in north Plano"
+    assert 0.85 < ratio(BASE, just_over) < 0.851
+    assert 0.849 < ratio(BASE, just_under) < 0.85
+
+    assert kept(items(BASE, just_over)) == [0]
+    assert kept(items(BASE, just_under)) == [0, 1]
+
+
+def test_a_ratio_equal_to_the_threshold_is_not_a_duplicate():
+    title, other = "abcdefghijklmnopqrst", "abcdexghijkxmnopqxst"
+    assert ratio(title, other) == 0.85
+    assert kept(items(title, other)) == [0, 1]
+
+
+def test_synthetic_feed_matches_the_pairwise_reference():
+    feed = synthetic.feed_items(300)
+    for i, item in enumerate(feed):
+        item["id"] = i
+    assert len(kept(feed)) < len(feed)
@@ -0,0 +1,31 @@
+import pytest
+
+from discovery_agent.scrapers.funding_news import FundingNewsDiscovery
+from discovery_agent.scrapers.real_estate_news import RealEstateDiscovery
+from discovery_agent.utils.verdict_store import VerdictStore
+
+ITEMS = [{"link": f"u{i}"} for i in range(4)]
+KEPT = [{"original_index": 0, "company_name": "Acme"}]
+
+
+@pytest.fixture(params=[RealEstateDiscovery, FundingNewsDiscovery])
+def scraper(request, tmp_path):
+    scraper = request.param.__new__(request.param)
+    scraper.verdicts = VerdictStore(str(tmp_path / "verdicts.sqlite3"), "news", "model", "v1")
+    return scraper
+
+
+def stored(scraper):
+    found = scraper.verdicts.lookup(item["link"] for item in ITEMS)
+    return {key: verdict["accepted"] for key, verdict in found.items()}
+
+
+def test_only_explicit_rejections_are_stored(scraper):
+    # u2 was left out as a same-event duplicate of u0, u3 was not returned at all
+    scraper._record_verdicts(ITEMS, KEPT, [1, 0, "x"], complete=True)
+    assert stored(scraper) == {"u0": True, "u1": False}
+
+
+def test_a_truncated_response_stores_no_rejections(scraper):
+    scraper._record_verdicts(ITEMS, KEPT, [1], complete=False)
+    assert stored(scraper) == {"u0": True}
@@ -0,0 +1,85 @@
+import threading
+import time
+
+from discovery_agent.utils.orchestrator import ScraperOrchestrator
+
+
+def leads_of(*names):
+    return lambda: [{"company_name": name} for name in names]
+
+
+def failing():
+    raise RuntimeError("feed exploded")
+
+
+def test_results_keep_source_order_and_merge_leads():
+    orchestrator = ScraperOrchestrator(max_workers=2)
+    results = orchestrator.run([("b", leads_of("B1", "B2")), ("a", leads_of("A1"))])
+
+    assert list(results) == ["b", "a"]
+    assert all(result.ok for result in results.values())
+    assert [lead["company_name"] for lead in ScraperOrchestrator.merge(results)] == ["B1", "B2", "A1"]
+
+
+def test_failing_source_does_not_affect_the_others():
+    results = ScraperOrchestrator(max_workers=2).run([("bad", failing), ("good", leads_of("G"))])
+
+    assert results["bad"].status == "failed"
+    assert "feed exploded" in results["bad"].error
+    assert results["good"].ok and results["good"].count == 1
+
+
+def test_hung_source_times_out_and_is_replaced_so_queued_sources_run():
+    release = threading.Event()
+
+    def hangs():
+        release.wait(10)
+        return []
+
+    # One worker: the queued source only runs if the hung worker gets replaced
+    orchestrator = ScraperOrchestrator(max_workers=1, timeouts={"slow": 0.2})
+    try:
+        started = time.monotonic()
+        results = orchestrator.run([("slow", hangs), ("next", leads_of("N"))])
+        elapsed = time.monotonic() - started
+    finally:
+        release.set()
+
+    assert results["slow"].status == "timeout"
+    assert results["next"].ok and results["next"].count == 1
+    assert elapsed < 5
+
+
+def test_streamed_leads_go_to_on_lead_and_only_counts_are_kept():
+    received = []
+    lock = threading.Lock()
+
+    def on_lead(lead):
+        with lock:
+            received.append(lead["company_name"])
+
+    results = ScraperOrchestrator(max_workers=2).run([("a", leads_of("A1", "A2")), ("b", leads_of("B1"))], on_lead=on_lead)
+
+    assert sorted(received) == ["A1", "A2", "B1"]
+    assert results["a"].count == 2 and results["a"].leads == []
+
+
+def test_timed_out_source_stops_forwarding_leads():
+    received = []
+    timed_out = threading.Event()
+
+    def trickles():
+        yield {"company_name": "before"}
+        timed_out.wait(10)
+        time.sleep(0.1)
+        yield {"company_name": "after"}
+
+    orchestrator = ScraperOrchestrator(max_workers=1, timeouts={"trickle": 0.2})
+    try:
+        results = orchestrator.run([("trickle", trickles)], on_lead=lambda lead: received.append(lead["company_name"]))
+    finally:
+        timed_out.set()
+    time.sleep(0.3)
+
+    assert results["trickle"].status == "timeout"
+    assert received == ["before"]
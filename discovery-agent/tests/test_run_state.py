@@ -0,0 +1,22 @@
+from discovery_agent.utils.run_state import RunStateStore
+
+
+def key(item):
+    return item["link"]
+
+
+def test_analyzed_items_resume_whatever_the_batches(tmp_path):
+    store = RunStateStore(str(tmp_path / "run_state.sqlite3"))
+    checkpoint = store.checkpoint(store.start_run(), "rss")
+    items = [{"link": f"u{i}"} for i in range(5)]
+
+    # First run analyzed the batch [u0, u1, u2] before it was interrupted
+    checkpoint.save_analyzed([(items[0], [{"source_url": "u0"}]), (items[1], []), (items[2], [])], key)
+
+    # The resumed run plans [u1, u2, u3, u4]: only u3 and u4 are left for the LLM
+    pending, leads = checkpoint.partition_analyzed(items, key)
+    assert pending == items[3:]
+    assert leads == [{"source_url": "u0"}]
+
+    other = store.checkpoint(checkpoint.run_id, "jobs")
+    assert other.partition_analyzed(items, key) == (items, [])
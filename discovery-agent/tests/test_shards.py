@@ -0,0 +1,30 @@
+from discovery_agent.shards import shard_config
+
+
+def test_one_shard_keeps_the_full_budgets():
+    config = {"llm_executor": {"requests_per_minute": 60}}
+    assert shard_config(config, 1) is config
+
+
+def test_llm_budgets_are_split_between_shards():
+    config = {"llm_executor": {"requests_per_minute": 60, "tokens_per_minute": None, "max_concurrency": 4}}
+    shared = shard_config(config, 3)
+
+    assert shared["llm_executor"] == {"requests_per_minute": 20, "tokens_per_minute": None, "max_concurrency": 1}
+    # Defaults are split too, and the original config is left alone
+    assert shard_config({}, 4)["llm_executor"]["tokens_per_minute"] == 25000
+    assert config["llm_executor"]["requests_per_minute"] == 60
+
+
+def test_rate_limits_are_split_between_shards():
+    config = {
+        "rate_limits": {"hosts": {"news.google.com": {"rate_per_second": 2, "burst": 4}}, "api_keys": {"rapidapi": None}},
+        "job_posting": {"rate_limit_seconds": 2},
+    }
+    limits = shard_config(config, 2)["rate_limits"]
+
+    assert limits["default"] == {"rate_per_second": 1, "burst": 1}
+    assert limits["hosts"]["news.google.com"] == {"rate_per_second": 1, "burst": 2}
+    assert limits["api_keys"] == {"rapidapi": None}
+    assert shard_config(config, 2)["job_posting"]["rate_limit_seconds"] == 4
+    assert shard_config({"rate_limits": {"default": None}}, 2)["rate_limits"]["default"] is None